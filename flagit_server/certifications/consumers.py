@@ -0,0 +1,52 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .services import load_certification, status_payload, store_group
+
+
+class CertificationStatusConsumer(AsyncJsonWebsocketConsumer):
+    """
+    인증 상태 알림 (WebSocket /ws/certifications/<certification_id>/?token=<access token>)
+    연결하면 현재 상태를 한 번 보내고, 가게 그룹에서 완료 알림이 오면 최종 상태를 보낸 뒤 연결을 닫습니다.
+    대기 중인 인증자가 상태를 반복 조회(polling)하지 않아도 됩니다.
+    """
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.certification_id = self.scope['url_route']['kwargs']['certification_id']
+        certification = await database_sync_to_async(load_certification)(self.certification_id, user)
+        if certification is None:
+            await self.close(code=4404)
+            return
+
+        self.group_name = store_group(certification.store_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        # 그룹에 들어간 뒤 상태를 읽으므로 그 사이에 완료되어도 알림을 놓치지 않음
+        await self.send_status()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def certification_completed(self, event):
+        if self.certification_id in event['certification_ids']:
+            await self.send_status()
+
+    async def send_status(self):
+        payload = await database_sync_to_async(self._status)()
+        await self.send_json(payload)
+        if payload['status'] != 'pending':
+            await self.close()
+
+    def _status(self):
+        certification = load_certification(self.certification_id)
+        if certification is None:
+            return {'status': 'error', 'code': 404, 'message': '인증 요청을 찾을 수 없습니다.'}
+        payload, _ = status_payload(certification)
+        return payload
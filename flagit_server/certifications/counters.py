@@ -0,0 +1,61 @@
+from typing import List, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Certification, StorePendingCounter
+
+
+def _add(store_id: int, delta: int) -> None:
+    if not delta:
+        return
+    values = dict(pending=F('pending') + delta, updated_at=timezone.now())
+    if not StorePendingCounter.objects.filter(store_id=store_id).update(**values):
+        StorePendingCounter.objects.get_or_create(store_id=store_id)
+        StorePendingCounter.objects.filter(store_id=store_id).update(**values)
+
+
+def increment_pending(store_id: int) -> None:
+    """
+    대기 중 인증 하나가 생겼을 때 (인증 행을 넣는 트랜잭션 안에서 호출)
+    """
+    _add(store_id, 1)
+
+
+def decrement_pending(store_id: int, count: int) -> None:
+    """
+    대기 중 인증 count건이 완료/만료되었을 때 (상태를 바꾸는 트랜잭션 안에서 호출)
+    """
+    _add(store_id, -count)
+
+
+def count_pending(store_id: int) -> int:
+    """
+    실제 인증 행으로 센 대기 중 인증 수 (접수 시 인증 범위를 확인하므로 거리 조건 없음)
+    """
+    return Certification.objects.filter(store_id=store_id, status='pending').count()
+
+
+def reconcile_store(store_id: int) -> Tuple[int, int]:
+    """
+    가게의 카운터를 실제 행 수로 맞춥니다. -> (이전 값, 실제 값)
+    카운터 행을 잠근 뒤 세므로, 동시에 들어온 인증의 증가분은 커밋 후 이 값 위에 더해집니다.
+    """
+    with transaction.atomic():
+        StorePendingCounter.objects.get_or_create(store_id=store_id)
+        counter = StorePendingCounter.objects.select_for_update().get(store_id=store_id)
+        before, actual = counter.pending, count_pending(store_id)
+        if before != actual:
+            counter.pending = actual
+            counter.save(update_fields=['pending', 'updated_at'])
+        return before, actual
+
+
+def reconcile_candidates() -> List[int]:
+    """
+    맞춰 볼 가게 id 목록 (대기 중 인증이 있거나 카운터가 0이 아닌 가게)
+    """
+    with_pending = Certification.objects.filter(status='pending').values_list('store_id', flat=True).distinct()
+    nonzero = StorePendingCounter.objects.exclude(pending=0).values_list('store_id', flat=True)
+    return sorted(set(with_pending) | set(nonzero))
@@ -0,0 +1,131 @@
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from certifications.counters import reconcile_store
+from certifications.models import Certification
+from certifications.services import complete_if_threshold_reached, load_certification, status_payload
+from coupons.models import Coupon
+from stores.models import Store
+
+
+def legacy_poll(certification_id):
+    # 기존 CertificationStatusView2.get: 조회할 때마다 store 행 잠금 + 거리 조건 count
+    certification = Certification.objects.get(certification_id=certification_id)
+    if certification.status == 'pending':
+        with transaction.atomic():
+            store = Store.objects.select_for_update().get(pk=certification.store.pk)
+            nearby_certifications = Certification.objects.filter(
+                store=store,
+                status='pending',
+                location__distance_lte=(Point(store.lng, store.lat, srid=4326), D(km=5))
+            )
+            if nearby_certifications.count() >= store.required_count:
+                nearby_certifications.update(status='completed')
+        certification.refresh_from_db(fields=['status'])
+    return status_payload(certification)
+
+
+def cached_poll(certification_id):
+    # 현재 CertificationStatusView2.get: 캐시된 가게 상태로 문턱 확인, 전환 시에만 advisory lock
+    certification = load_certification(certification_id)
+    if certification.status == 'pending':
+        complete_if_threshold_reached(certification.store_id)
+        certification.refresh_from_db(fields=['status'])
+    return status_payload(certification)
+
+
+class Command(BaseCommand):
+    help = (
+        "한 가게에 동시에 상태를 조회하는 인증자 --pollers명으로 기존(행 잠금) 조회와 현재(캐시, 잠금 없음) 조회의 "
+        "처리량/지연 시간을 비교합니다. (스레드마다 DB 연결을 쓰므로 데이터는 커밋 후 마지막에 삭제)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pollers', type=int, default=200, help="동시에 조회하는 인증자 수")
+        parser.add_argument('--polls', type=int, default=10, help="인증자당 조회 횟수")
+        parser.add_argument('--connections', type=int, default=64,
+                            help="동시 DB 연결(스레드) 수, Postgres max_connections보다 작게")
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        store, certification_ids = self._setup(options)
+        try:
+            self.stdout.write(f"{'mode':<8} {'polls':>7} {'polls/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+            self._run('legacy', legacy_poll, certification_ids, options)
+            self._run('cached', cached_poll, certification_ids, options)
+        finally:
+            User = get_user_model()
+            Store.objects.filter(pk=store.pk).delete()
+            User.objects.filter(email__startswith='bench-poll-').delete()
+
+    def _setup(self, options):
+        rng = random.Random(options['seed'])
+        lat, lng = (float(v) for v in options['center'].split(','))
+        pollers = options['pollers']
+        # 문턱에 닿지 않도록 required_count를 인원보다 크게 (순수 조회 부하)
+        store = Store.objects.create(
+            name='벤치마크 가게', lat=lat, lng=lng, location=Point(lng, lat, srid=4326), required_count=pollers + 1,
+        )
+        Coupon.objects.bulk_create([Coupon(store=store, coupon_name='벤치마크 쿠폰')])
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(email=f'bench-poll-{i}@example.com', nickname=f'bench-poll-{i}', password='!')
+            for i in range(pollers)
+        ])
+        certifications = []
+        for member in User.objects.filter(email__startswith='bench-poll-'):
+            angle, offset = rng.uniform(0, 2 * math.pi), rng.uniform(0, 100)
+            c_lat = lat + offset * math.sin(angle) / 111320.0
+            c_lng = lng + offset * math.cos(angle) / (111320.0 * math.cos(math.radians(lat)))
+            certifications.append(Certification(
+                member=member, store=store, lat=c_lat, lng=c_lng, location=Point(c_lng, c_lat, srid=4326),
+            ))
+        Certification.objects.bulk_create(certifications)
+        # bulk_create는 serializer를 거치지 않으므로 대기 카운터를 실제 행으로 채움
+        reconcile_store(store.pk)
+        return store, list(Certification.objects.filter(store=store).values_list('certification_id', flat=True))
+
+    def _run(self, name, poll, certification_ids, options):
+        start = threading.Barrier(options['connections'])
+        durations = []
+        lock = threading.Lock()
+
+        def worker(ids):
+            try:
+                start.wait()
+                local = []
+                for _ in range(options['polls']):
+                    for certification_id in ids:
+                        started = time.perf_counter()
+                        poll(certification_id)
+                        local.append((time.perf_counter() - started) * 1000)
+                with lock:
+                    durations.extend(local)
+            finally:
+                connection.close()
+
+        # 인증자를 연결 수만큼 나눠 각 스레드가 번갈아 조회
+        groups = [certification_ids[i::options['connections']] for i in range(options['connections'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['connections']) as executor:
+            for future in [executor.submit(worker, ids) for ids in groups]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        durations.sort()
+        p99 = durations[max(0, int(len(durations) * 0.99) - 1)]
+        self.stdout.write(
+            f"{name:<8} {len(durations):>7} {len(durations) / elapsed:>9.0f} {statistics.median(durations):>9.2f} "
+            f"{p99:>9.2f} {durations[-1]:>9.2f}"
+        )
@@ -0,0 +1,156 @@
+import heapq
+import math
+import random
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import TestCase
+
+from certifications.models import Certification
+from certifications.services import complete_if_threshold_reached, status_payload, store_group
+from coupons.models import Coupon
+from stores.models import Store
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+        self.locks = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if 'FOR UPDATE' in sql:
+            self.locks += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "같은 가게의 함께 인증을 상태 반복 조회(polling)와 완료 알림(push)으로 처리할 때의 DB 쿼리/행 잠금 수를 비교합니다. "
+        "(도착/조회 시각은 가상 시간, 데이터는 트랜잭션 롤백으로 삭제)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help="함께 인증하는 인원 (= 가게 required_count)")
+        parser.add_argument('--arrival-seconds', type=float, default=1.0, help="인증자 도착 간격(가상 초)")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="polling 클라이언트의 조회 간격(가상 초)")
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            store, members = self._setup(options)
+            self.stdout.write(f"{'mode':<8} {'clients':>8} {'queries':>8} {'q/client':>9} {'row locks':>10} {'delay avg s':>12} {'wall s':>8}")
+            self._polling(store, members, options)
+            Certification.objects.filter(store=store).delete()
+            self._push(store, members, options)
+            transaction.set_rollback(True)
+
+    def _setup(self, options):
+        lat, lng = (float(v) for v in options['center'].split(','))
+        store = Store.objects.create(
+            name='벤치마크 가게', lat=lat, lng=lng, location=Point(lng, lat, srid=4326), required_count=options['clients'],
+        )
+        # save()의 QR 이미지 업로드를 피하려고 bulk_create
+        Coupon.objects.bulk_create([Coupon(store=store, coupon_name='벤치마크 쿠폰')])
+        User = get_user_model()
+        User.objects.bulk_create([
+            User(email=f'bench-cert-{i}@example.com', nickname=f'bench-cert-{i}', password='!')
+            for i in range(options['clients'])
+        ])
+        members = list(User.objects.filter(email__startswith='bench-cert-').order_by('id'))
+        return store, members
+
+    def _arrive(self, store, member, rng):
+        # 가게 100m 안의 임의 위치에서 인증 요청
+        angle, offset = rng.uniform(0, 2 * math.pi), rng.uniform(0, 100)
+        return Certification.objects.create(
+            member=member,
+            store=store,
+            lat=store.lat + offset * math.sin(angle) / 111320.0,
+            lng=store.lng + offset * math.cos(angle) / (111320.0 * math.cos(math.radians(store.lat))),
+        )
+
+    def _polling(self, store, members, options):
+        """
+        기존 방식: 인증 요청 후 각자 poll_interval마다 상태 조회 (조회할 때마다 store 행 잠금 + 거리 조건 count)
+        """
+        rng = random.Random(options['seed'])
+        interval = options['poll_interval']
+        events = [(i * options['arrival_seconds'], 0, i) for i in range(len(members))]
+        heapq.heapify(events)
+        certifications, delays = {}, []
+        completed_at = None
+        counter = QueryCounter()
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            while events:
+                now, kind, i = heapq.heappop(events)
+                if kind == 0:
+                    certifications[i] = self._arrive(store, members[i], rng)
+                    heapq.heappush(events, (now + interval, 1, i))
+                    continue
+                # CertificationStatusView2.get과 같은 처리
+                certification = certifications[i]
+                certification.refresh_from_db(fields=['status'])
+                if certification.status == 'pending':
+                    complete_if_threshold_reached(store.store_id)
+                    certification.refresh_from_db(fields=['status'])
+                status_payload(certification)
+                if certification.status == 'completed':
+                    completed_at = completed_at if completed_at is not None else now
+                    delays.append(now - completed_at)
+                else:
+                    heapq.heappush(events, (now + interval, 1, i))
+        self._report('polling', len(members), counter, delays, time.perf_counter() - started)
+
+    def _push(self, store, members, options):
+        """
+        알림 방식: 인증 요청 때 한 번 문턱 확인, 각자 WebSocket 연결 시 상태 1회 조회 후 완료 알림 대기
+        """
+        rng = random.Random(options['seed'])
+        layer = get_channel_layer()
+        group = store_group(store.store_id)
+        channels, certifications = [], []
+        counter = QueryCounter()
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            for member in members:
+                # 롤백할 트랜잭션 안이므로 on_commit 알림을 바로 실행
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    certification = self._arrive(store, member, rng)
+                    complete_if_threshold_reached(store.store_id)
+                # CertificationStatusConsumer.connect: 그룹 참여 후 현재 상태 1회 조회
+                channel = async_to_sync(layer.new_channel)()
+                async_to_sync(layer.group_add)(group, channel)
+                certification.refresh_from_db(fields=['status'])
+                status_payload(certification)
+                channels.append(channel)
+                certifications.append(certification)
+
+            # 완료 알림을 받은 연결만 최종 상태 조회
+            delivered = 0
+            for channel, certification in zip(channels, certifications):
+                if certification.status == 'completed':
+                    continue
+                message = async_to_sync(layer.receive)(channel)
+                if certification.certification_id in message['certification_ids']:
+                    delivered += 1
+                    certification.refresh_from_db(fields=['status'])
+                    status_payload(certification)
+        self._report('push', len(members), counter, [0.0] * len(members), time.perf_counter() - started)
+        self.stdout.write(f"         완료 알림 전달 {delivered}건 (연결 시점에 이미 완료된 인증 제외)")
+
+    def _report(self, mode, clients, counter, delays, wall):
+        self.stdout.write(
+            f"{mode:<8} {clients:>8} {counter.queries:>8} {counter.queries / clients:>9.1f} {counter.locks:>10} "
+            f"{statistics.mean(delays) if delays else float('nan'):>12.2f} {wall:>8.2f}"
+        )
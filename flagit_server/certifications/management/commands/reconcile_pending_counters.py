@@ -0,0 +1,44 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from certifications.counters import reconcile_candidates, reconcile_store
+from certifications.state import invalidate_store_state
+
+class Command(BaseCommand):
+    help = (
+        "가게별 대기 중 인증 카운터(StorePendingCounter)를 실제 인증 행 수로 맞춥니다. "
+        "배포 후 한 번 실행해 카운터를 채우고, --loop로 주기적으로 실행합니다. (SIGINT/SIGTERM으로 종료)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', help="맞출 가게 id (여러 번 지정 가능), 미지정 시 대상 가게 전체")
+        parser.add_argument('--loop', action='store_true', help="주기적으로 반복 실행")
+        parser.add_argument('--interval', type=float, default=None, help="반복 주기(초), 미지정 시 CERTIFICATION_COUNTER_RECONCILE_SECONDS")
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self._reconcile(options['store'])
+            return
+
+        interval = options['interval'] or getattr(settings, 'CERTIFICATION_COUNTER_RECONCILE_SECONDS', 300)
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        self.stdout.write(f"대기 카운터 맞추기 시작 (interval {interval}s)")
+        while not stop.is_set():
+            self._reconcile(options['store'])
+            stop.wait(interval)
+
+    def _reconcile(self, store_ids):
+        store_ids = store_ids or reconcile_candidates()
+        drifted = 0
+        for store_id in store_ids:
+            before, actual = reconcile_store(store_id)
+            if before != actual:
+                drifted += 1
+                invalidate_store_state(store_id)
+                self.stdout.write(f"store {store_id}: {before} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"가게 {len(store_ids)}곳 확인, {drifted}곳 보정"))
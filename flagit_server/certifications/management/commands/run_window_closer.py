@@ -0,0 +1,30 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from certifications.windows import WindowCloser
+
+
+class Command(BaseCommand):
+    help = "유예 창(success window)을 마감 시각에 닫고 대기 중 인증을 일괄 완료하는 워커를 실행합니다. (SIGINT/SIGTERM으로 종료)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scan-seconds', type=float, default=None, help="열린 창을 다시 읽는 주기(초), 미지정 시 CERTIFICATION_WINDOW_SCAN_SECONDS")
+        parser.add_argument('--once', action='store_true', help="현재 마감이 지난 창만 닫고 종료")
+
+    def handle(self, *args, **options):
+        closer = WindowCloser(scan_seconds=options['scan_seconds'])
+        if options['once']:
+            closer.scan()
+            closer.close_due()
+        else:
+            stop = threading.Event()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: stop.set())
+            self.stdout.write(f"유예 창 닫기 워커 시작 (scan {closer.scan_seconds}s)")
+            closer.run(stop)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"닫은 창 {closer.closed_windows}개, 완료 인증 {closer.completed}건, 최대 지연 {closer.max_lag:.3f}s"
+        ))
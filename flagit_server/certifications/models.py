@@ -25,3 +25,10 @@ class Certification(models.Model):
         if self.lat and self.lng:
             self.location = Point(self.lng, self.lat, srid=4326)  # WGS84 좌표계
         super().save(*args, **kwargs)
+
+
+class StorePendingCounter(models.Model):
+    # 가게별 대기 중 인증 수 (인증 생성/완료 시 증감, manage.py reconcile_pending_counters로 실제 행과 맞춤)
+    store = models.OneToOneField(Store, on_delete=models.CASCADE, primary_key=True, related_name='pending_counter')
+    pending = models.IntegerField(default=0)  # 대기 중 인증 수 (모두 가게 인증 범위 안에서 접수됨)
+    updated_at = models.DateTimeField(auto_now=True)
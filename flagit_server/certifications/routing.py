@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import CertificationStatusConsumer
+
+websocket_urlpatterns = [
+    path('ws/certifications/<int:certification_id>/', CertificationStatusConsumer.as_asgi()), # 인증 상태 알림
+]
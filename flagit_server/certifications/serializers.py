@@ -1,5 +1,10 @@
+from django.db import transaction
 from rest_framework import serializers
+from .counters import increment_pending
 from .models import Certification
+from .state import invalidate_store_state
+
+OUT_OF_RANGE = 'out_of_range'
 
 class CertificationSerializer(serializers.ModelSerializer):
     certification_id = serializers.IntegerField(read_only=True)
@@ -11,11 +16,24 @@ class CertificationSerializer(serializers.ModelSerializer):
         model = Certification
         fields = ['certification_id', 'lat', 'lng', 'member', 'store', 'status']
 
+    def validate(self, attrs):
+        # 가게 인증 범위 밖의 요청은 대기 중 인증으로 남기지 않고 바로 거절
+        fence = self.context['fence']
+        if not fence.contains(attrs['lat'], attrs['lng']):
+            raise serializers.ValidationError({'location': '가게 인증 범위 밖입니다.'}, code=OUT_OF_RANGE)
+        return attrs
+
     def create(self, validated_data):
         member = self.context['request'].user
-        store = self.context['store']
+        fence = self.context['fence']
         validated_data['member'] = member
-        validated_data['store'] = store
+        validated_data['store_id'] = fence.store_id
         validated_data['status'] = 'pending'
-        return super().create(validated_data)
+        with transaction.atomic():
+            # 인증 행과 가게별 대기 카운터를 같은 트랜잭션에서 갱신
+            certification = super().create(validated_data)
+            increment_pending(fence.store_id)
+            # 다음 상태 조회가 늘어난 대기 수를 바로 보도록 캐시된 가게 상태 삭제 (커밋 후)
+            invalidate_store_state(fence.store_id)
+        return certification
 
@@ -0,0 +1,199 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from coupons.models import Coupon
+from stores.models import Store
+from .counters import decrement_pending, reconcile_store
+from .models import Certification
+from .state import (
+    get_store_state,
+    load_store_state,
+    invalidate_store_state,
+    store_transition_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_EVENT = 'certification.completed'
+
+
+def store_group(store_id: int) -> str:
+    """
+    가게별 인증 알림 그룹 이름 (channel layer group)
+    """
+    return f'certifications.store.{store_id}'
+
+
+def coupon_payload(coupon: Coupon) -> Dict[str, Any]:
+    return {
+        'coupon_id': coupon.coupon_id,
+        'coupon_name': coupon.coupon_name,
+        'code': str(coupon.code),
+        'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
+    }
+
+
+def status_payload(certification: Certification) -> Tuple[Dict[str, Any], int]:
+    """
+    인증 상태 응답 -> (응답 본문, HTTP 상태 코드)
+    상태 조회 API와 WebSocket 알림이 같은 형식을 사용합니다.
+    """
+    if certification.status == 'completed':
+        try:
+            coupon = Coupon.objects.get(store_id=certification.store_id)
+        except Coupon.DoesNotExist:
+            return {'status': 'error', 'code': 404, 'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'}, status.HTTP_404_NOT_FOUND
+        return {
+            'status': 'completed',
+            'code': 200,
+            'message': '인증이 완료되었습니다!',
+            'coupon': coupon_payload(coupon)
+        }, status.HTTP_200_OK
+    if certification.status == 'pending':
+        return {
+            'status': 'pending',
+            'code': 200,
+            'message': '인증 진행 중..',
+            'certification_id': certification.certification_id
+        }, status.HTTP_200_OK
+    return {'status': 'error', 'code': 404, 'message': '인증 상태를 찾을 수 없습니다.'}, status.HTTP_404_NOT_FOUND
+
+
+def notify_completed(store_id: int, certification_ids: List[int]) -> None:
+    """
+    가게 그룹에 완료된 인증 id 목록을 한 번에 보냅니다. (WebSocket으로 기다리는 인증자 전원에게 전달)
+    알림 실패는 완료 처리에 영향을 주지 않으며, 클라이언트는 상태 조회로 최종 상태를 확인할 수 있습니다.
+    """
+    from channels.layers import get_channel_layer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(store_group(store_id), {
+            'type': COMPLETED_EVENT,
+            'store_id': store_id,
+            'certification_ids': certification_ids,
+        })
+    except Exception:
+        logger.exception("인증 완료 알림 실패: store %s", store_id)
+
+
+def _pending(store_id: int):
+    # 인증 범위는 접수 시 확인하므로 거리 조건 없이 가게와 상태만으로 조회
+    return Certification.objects.filter(store_id=store_id, status='pending')
+
+
+def complete_if_threshold_reached(store_id: int, refresh: bool = False) -> List[int]:
+    """
+    가게의 대기 중(pending) 인증 수가 required_count 이상이면 모두 완료 처리합니다. -> 완료한 인증 id 목록
+    - 문턱 확인은 캐시된 가게 상태의 대기 카운터로 (행 잠금/공간 집계 없음, refresh=True면 DB에서 새로 읽음)
+    - 문턱을 넘는 경우에만 가게 advisory lock을 잡고 다시 확인한 뒤 일괄 완료
+    button 흐름에서는 인증 접수(CertificationView.post) 직후와 상태 조회(CertificationStatusView2)에서 확인하므로,
+    WebSocket으로 기다리는 인증자가 반복해서 조회하지 않아도 마지막 인증이 들어올 때 완료됩니다.
+    완료 알림은 커밋 후 가게 그룹으로 보냅니다.
+    """
+    state = get_store_state(store_id, refresh=refresh)
+    if state.pending < state.required_count:
+        return []
+
+    with store_transition_lock(store_id):
+        # 잠금 안에서 카운터를 다시 확인 (O(1)), 문턱을 넘을 때만 실제 행을 읽음
+        current = load_store_state(store_id)
+        invalidate_store_state(store_id)
+        if current.pending < current.required_count:
+            # 다른 요청이 먼저 완료 처리함
+            return []
+        pending_ids = list(_pending(store_id).values_list('certification_id', flat=True))
+        if len(pending_ids) < current.required_count:
+            # 카운터가 실제 행보다 많음 -> 바로 맞춤
+            reconcile_store(store_id)
+            return []
+
+        # 문턱 달성 -> 일괄 완료
+        Certification.objects.filter(certification_id__in=pending_ids).update(status='completed')
+        decrement_pending(store_id, len(pending_ids))
+        transaction.on_commit(lambda: notify_completed(store_id, pending_ids))
+        return pending_ids
+
+
+def load_certification(certification_id: int, member=None) -> Optional[Certification]:
+    queryset = Certification.objects.filter(certification_id=certification_id)
+    if member is not None:
+        queryset = queryset.filter(member=member)
+    return queryset.first()
+
+
+class WindowState(NamedTuple):
+    """
+    가게의 유예 창(success window) 상태
+    """
+    current_count: int
+    required_count: int
+    started_at: Optional[datetime]
+    seconds: int
+    opened: bool  # 이번 호출에서 창을 열었는지
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        if self.started_at is None:
+            return None
+        return self.started_at + timedelta(seconds=self.seconds)
+
+
+def open_window_if_threshold_reached(store_id: int) -> WindowState:
+    """
+    창이 닫혀 있고 가게의 대기 중 인증 수가 required_count 이상이면 유예 창을 엽니다.
+    - 창이 이미 열렸거나 문턱 전이면 캐시된 가게 상태만 반환 (행 잠금 없음)
+    - 창을 여는 경우에만 가게 advisory lock을 잡고 다시 확인
+    창을 닫는(일괄 완료) 일은 요청이 아니라 창 닫기 워커(certifications.windows)가 마감 시각에 합니다.
+    """
+    state = get_store_state(store_id)
+    if state.window_started_at is not None or state.pending < state.required_count:
+        return WindowState(
+            state.pending, state.required_count, state.window_started_at, state.window_seconds, False,
+        )
+
+    with store_transition_lock(store_id):
+        store = Store.objects.get(pk=store_id)
+        current_count = load_store_state(store_id).pending
+        opened = False
+        if store.success_window_started_at is None and current_count >= store.required_count:
+            store.success_window_started_at = timezone.now()
+            store.save(update_fields=['success_window_started_at'])
+            invalidate_store_state(store_id)
+            opened = True
+        return WindowState(
+            current_count, store.required_count, store.success_window_started_at, store.success_window_seconds, opened,
+        )
+
+
+def close_window(store_id: int, now: Optional[datetime] = None) -> List[int]:
+    """
+    마감 시각이 지난 유예 창을 닫고 창 안에 모인 대기 중 인증을 한 번에 완료합니다. -> 완료한 인증 id 목록
+    이미 닫혔거나 아직 마감 전이면 아무것도 하지 않으므로, 여러 워커가 같은 창을 닫으려 해도 한 번만 처리됩니다.
+    """
+    now = now or timezone.now()
+    with store_transition_lock(store_id):
+        store = Store.objects.get(pk=store_id)
+        started_at = store.success_window_started_at
+        if started_at is None or started_at + timedelta(seconds=store.success_window_seconds) > now:
+            return []
+
+        certification_ids = list(_pending(store_id).values_list('certification_id', flat=True))
+        if certification_ids:
+            Certification.objects.filter(certification_id__in=certification_ids).update(status='completed')
+            decrement_pending(store_id, len(certification_ids))
+        store.success_window_started_at = None
+        store.save(update_fields=['success_window_started_at'])
+        invalidate_store_state(store_id)
+
+        if certification_ids:
+            transaction.on_commit(lambda: notify_completed(store_id, certification_ids))
+        return certification_ids
@@ -0,0 +1,103 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models.functions import Coalesce
+
+from stores.models import Store
+
+# pg_advisory_xact_lock(namespace, store_id)의 namespace ('FLAG')
+LOCK_NAMESPACE = 0x464C4147
+
+# 캐시가 없을 때 같은 가게 상태를 동시에 읽는 요청을 한 번의 DB 조회로 합치는 프로세스 내 잠금 (store_id별로 나눠 씀)
+_load_locks = [threading.Lock() for _ in range(64)]
+
+
+class StoreCertificationState(NamedTuple):
+    """
+    가게의 인증 진행 상태 (상태 조회용, 행 잠금 없이 읽은 값)
+    """
+    pending: int  # 대기 중 인증 수
+    required_count: int
+    window_started_at: Optional[datetime]
+    window_seconds: int
+
+    @property
+    def window_deadline(self) -> Optional[datetime]:
+        if self.window_started_at is None:
+            return None
+        return self.window_started_at + timedelta(seconds=self.window_seconds)
+
+
+def _cache():
+    return caches[getattr(settings, 'CERTIFICATION_STATE_CACHE', 'default')]
+
+
+def _key(store_id: int) -> str:
+    return f'certifications:store:{store_id}:state:v2'
+
+
+def load_store_state(store_id: int) -> StoreCertificationState:
+    """
+    DB에서 가게 상태를 읽습니다. (가게 + 대기 카운터 1행, 공간 집계/잠금 없음)
+    대기 수는 certifications.counters가 증감하는 StorePendingCounter 값입니다.
+    """
+    store = Store.objects.values(
+        'required_count', 'success_window_started_at', 'success_window_seconds'
+    ).annotate(
+        pending=Coalesce('pending_counter__pending', 0),
+    ).get(pk=store_id)
+    return StoreCertificationState(
+        max(store['pending'], 0),
+        store['required_count'],
+        store['success_window_started_at'],
+        store['success_window_seconds'],
+    )
+
+
+def get_store_state(store_id: int, refresh: bool = False) -> StoreCertificationState:
+    """
+    캐시된 가게 상태 (CERTIFICATION_STATE_CACHE_SECONDS 동안 유지, 상태가 바뀌면 invalidate_store_state로 삭제)
+    캐시가 없을 때 동시에 들어온 조회는 한 번의 DB 조회로 합칩니다.
+    """
+    key = _key(store_id)
+    if refresh:
+        return _load(store_id, key)
+
+    cached = _cache().get(key)
+    if cached is None:
+        with _load_locks[store_id % len(_load_locks)]:
+            # 잠금을 기다리는 동안 먼저 들어온 요청이 캐시를 채웠으면 그 값을 사용
+            cached = _cache().get(key)
+            if cached is None:
+                return _load(store_id, key)
+    return StoreCertificationState(*cached)
+
+
+def _load(store_id: int, key: str) -> StoreCertificationState:
+    state = load_store_state(store_id)
+    _cache().set(key, tuple(state), getattr(settings, 'CERTIFICATION_STATE_CACHE_SECONDS', 2))
+    return state
+
+
+def invalidate_store_state(store_id: int) -> None:
+    """
+    가게의 인증 상태가 바뀌었을 때 캐시를 지웁니다. (트랜잭션 안이면 커밋 후)
+    """
+    transaction.on_commit(lambda: _cache().delete(_key(store_id)))
+
+
+@contextmanager
+def store_transition_lock(store_id: int) -> Iterator[None]:
+    """
+    가게 단위 상태 전환(완료 처리, 창 열기/닫기)을 직렬화하는 트랜잭션 + advisory lock
+    store 행 잠금(select_for_update)과 달리 상태 조회나 가게 정보 조회를 막지 않습니다.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [LOCK_NAMESPACE, store_id])
+        yield
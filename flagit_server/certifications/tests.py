@@ -1,3 +1,176 @@
-from django.test import TestCase
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.gis.geos import Point
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from coupons.models import Coupon
+from stores.geofence import StoreFence
+from stores.models import Store
+from .counters import reconcile_store
+from .models import Certification, StorePendingCounter
+from .routing import websocket_urlpatterns
+from .serializers import CertificationSerializer
+from .services import complete_if_threshold_reached, notify_completed
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+LAT, LNG = 37.5665, 126.9780
+
+
+def create_store(**kwargs):
+    store = Store.objects.create(name='테스트 가게', lat=LAT, lng=LNG, location=Point(LNG, LAT, srid=4326), **kwargs)
+    # Coupon.save는 QR 이미지를 S3에 올리므로 bulk_create로 생성
+    Coupon.objects.bulk_create([Coupon(store=store, coupon_name='테스트 쿠폰')])
+    return store
+
+
+def create_member(n=0):
+    return get_user_model().objects.create_user(email=f'member{n}@example.com', nickname=f'member{n}', password='pw')
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS, CERTIFICATION_FLOW='button', STORE_INDEX_ENABLED=False)
+class CertificationStatusConsumerTests(TransactionTestCase):
+    """
+    인증 상태 WebSocket: 연결 -> 현재(pending) 상태 -> 완료 알림 -> 완료 상태 후 연결 종료
+    (스레드의 DB 조회가 테스트 데이터를 볼 수 있도록 TransactionTestCase 사용)
+    """
+
+    def setUp(self):
+        self.store = create_store()
+        self.member = create_member()
+        self.certification = Certification.objects.create(
+            member=self.member, store=self.store, lat=LAT, lng=LNG, status='pending',
+        )
+
+    def communicator(self, user, certification_id=None):
+        certification_id = certification_id or self.certification.certification_id
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/certifications/{certification_id}/')
+        communicator.scope['user'] = user
+        return communicator
+
+    def submit(self, store, member):
+        client = APIClient()
+        client.force_authenticate(member)
+        response = client.post(f'/certifications/{store.store_id}/', {'lat': LAT, 'lng': LNG}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['certification']
+
+    def complete(self):
+        Certification.objects.filter(pk=self.certification.pk).update(status='completed')
+        notify_completed(self.store.store_id, [self.certification.certification_id])
+
+    async def test_pending_then_completed(self):
+        communicator = self.communicator(self.member)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        pending = await communicator.receive_json_from()
+        self.assertEqual(pending['status'], 'pending')
+        self.assertEqual(pending['certification_id'], self.certification.certification_id)
+
+        await database_sync_to_async(self.complete)()
+        completed = await communicator.receive_json_from()
+        self.assertEqual(completed['status'], 'completed')
+        self.assertEqual(completed['coupon']['coupon_name'], '테스트 쿠폰')
+
+        closed = await communicator.receive_output()
+        self.assertEqual(closed['type'], 'websocket.close')
+        await communicator.wait()
+
+    async def test_last_submit_completes_waiting_socket(self):
+        # 대기 중인 인증자는 상태 조회 없이 WebSocket만 열어 두어도 마지막 인증 접수 시 완료 알림을 받음
+        store = await database_sync_to_async(create_store)(required_count=2)
+        first_member, second_member = await database_sync_to_async(lambda: (create_member(1), create_member(2)))()
+        first = await database_sync_to_async(self.submit)(store, first_member)
+        self.assertEqual(first['status'], 'pending')
+
+        communicator = self.communicator(first_member, first['certification_id'])
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['status'], 'pending')
+
+        second = await database_sync_to_async(self.submit)(store, second_member)
+        self.assertEqual(second['status'], 'completed')
+        completed = await communicator.receive_json_from()
+        self.assertEqual(completed['status'], 'completed')
+
+        closed = await communicator.receive_output()
+        self.assertEqual(closed['type'], 'websocket.close')
+        await communicator.wait()
+
+    async def test_rejects_anonymous_user(self):
+        communicator = self.communicator(AnonymousUser())
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+
+class PendingCounterTests(TestCase):
+    """
+    가게별 대기 중 인증 카운터: 접수 시 증가, 완료 시 감소, reconcile_store로 실제 행과 맞춤
+    """
+
+    def setUp(self):
+        self.store = create_store(required_count=2)
+        self.fence = StoreFence(self.store.store_id, LAT, LNG, 50)
+
+    def submit(self, member, lat=LAT, lng=LNG):
+        request = type('Request', (), {'user': member})()
+        serializer = CertificationSerializer(
+            data={'lat': lat, 'lng': lng}, context={'request': request, 'fence': self.fence},
+        )
+        if serializer.is_valid():
+            return serializer.save()
+        return None
+
+    def pending(self):
+        counter = StorePendingCounter.objects.filter(store=self.store).first()
+        return counter.pending if counter else 0
+
+    def test_submit_increments_counter(self):
+        self.assertIsNotNone(self.submit(create_member(1)))
+        self.assertIsNotNone(self.submit(create_member(2), lat=LAT + 20 / 111195.0))
+
+        self.assertEqual(self.pending(), 2)
+
+    def test_out_of_range_submit_is_rejected(self):
+        self.assertIsNone(self.submit(create_member(1), lat=LAT + 0.01))
+
+        self.assertEqual(self.pending(), 0)
+        self.assertFalse(Certification.objects.filter(store=self.store).exists())
+
+    def test_completion_decrements_counter(self):
+        self.submit(create_member(1))
+        self.assertEqual(complete_if_threshold_reached(self.store.store_id, refresh=True), [])
+
+        second = self.submit(create_member(2))
+        completed = complete_if_threshold_reached(self.store.store_id, refresh=True)
+
+        self.assertIn(second.certification_id, completed)
+        self.assertEqual(len(completed), 2)
+        self.assertEqual(self.pending(), 0)
+        self.assertFalse(Certification.objects.filter(store=self.store, status='pending').exists())
+
+    def test_reconcile_store_fixes_drift(self):
+        self.submit(create_member(1))
+        StorePendingCounter.objects.filter(store=self.store).update(pending=5)
+
+        self.assertEqual(reconcile_store(self.store.store_id), (5, 1))
+        self.assertEqual(self.pending(), 1)
+        self.assertEqual(reconcile_store(self.store.store_id), (1, 1))
+
+    def test_reconcile_store_creates_missing_counter(self):
+        Certification.objects.create(member=create_member(1), store=self.store, lat=LAT, lng=LNG, status='pending')
+
+        self.assertEqual(reconcile_store(self.store.store_id), (0, 1))
+        self.assertEqual(self.pending(), 1)
+
+    def test_overcounted_threshold_reconciles_instead_of_completing(self):
+        self.submit(create_member(1))
+        StorePendingCounter.objects.filter(store=self.store).update(pending=2)
+
+        self.assertEqual(complete_if_threshold_reached(self.store.store_id, refresh=True), [])
+        self.assertEqual(self.pending(), 1)
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from .views import CertificationView, CertificationStatusView2
+from .views import CertificationView, CertificationStatusView, CertificationStatusView2
+
+# 인증 흐름(CERTIFICATION_FLOW)에 맞는 상태 조회 (기본 반경도 흐름별로 다름, stores.geofence)
+status_view = CertificationStatusView if getattr(settings, 'CERTIFICATION_FLOW', 'button') == 'window' else CertificationStatusView2
 
 urlpatterns = [
     path('<int:store_id>/', CertificationView.as_view()), # 인증 요청
-    path('status/<int:certification_id>/', CertificationStatusView2.as_view()), # 인증 상태 조회
+    path('status/<int:certification_id>/', status_view.as_view()), # 인증 상태 조회
 ]   
\ No newline at end of file
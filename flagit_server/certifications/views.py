@@ -1,159 +1,89 @@
+from django.conf import settings
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.contrib.gis.geos import Point
-from django.contrib.gis.db.models.functions import Distance
 from django.utils import timezone
-from .serializers import CertificationSerializer
+from .serializers import OUT_OF_RANGE, CertificationSerializer
 from .models import Certification
-from stores.models import Store
-from coupons.models import Coupon
-from django.db import transaction
-from django.contrib.gis.measure import D
-from datetime import timedelta
+from .services import (
+    complete_if_threshold_reached,
+    load_certification,
+    open_window_if_threshold_reached,
+    status_payload,
+)
+from stores.geofence import get_store_fence
 # Create your views here.
 class CertificationView(APIView):
     def post(self, request, store_id):
-        try:
-            store = Store.objects.get(store_id=store_id)
-        except Store.DoesNotExist:
+        # 가게 인증 범위는 프로세스 내 가게 인덱스에서 조회 (인덱스에 없을 때만 DB)
+        fence = get_store_fence(store_id)
+        if fence is None:
             return Response({'status' : 'error', 'code' : 404, 'message' : '가게가 존재하지 않습니다.'}
                             , status=status.HTTP_404_NOT_FOUND)
 
-        serializer = CertificationSerializer(data=request.data, context={'request' : request, 'store' : store})
+        serializer = CertificationSerializer(data=request.data, context={'request' : request, 'fence' : fence})
         if serializer.is_valid():
             certification = serializer.save()
+            # button 흐름: 새 인증으로 문턱에 도달하면 바로 일괄 완료 (WebSocket으로 기다리는 인증자도 상태 조회 없이 알림을 받음)
+            # window 흐름은 상태 조회에서 유예 창을 열고 창 닫기 워커가 완료하므로 접수만 함
+            if getattr(settings, 'CERTIFICATION_FLOW', 'button') != 'window':
+                if certification.certification_id in complete_if_threshold_reached(fence.store_id, refresh=True):
+                    certification.refresh_from_db(fields=['status'])
             response_serializer = CertificationSerializer(certification)
             return Response({'status' : 'success', 'code' : 201, 'message' : '인증 요청을 보냈습니다.', 'certification' : response_serializer.data}
                             , status=status.HTTP_201_CREATED)
+        elif any(error.code == OUT_OF_RANGE for error in serializer.errors.get('location', [])):
+            return Response({'status' : 'error', 'code' : 400, 'message' : '가게 인증 범위 밖입니다.', 'geofence_meters' : fence.geofence_meters}
+                            , status=status.HTTP_400_BAD_REQUEST)
         else:
             return Response({'status' : 'error', 'code' : 400, 'message' : '인증 요청에 실패했습니다.'}
                             , status=status.HTTP_400_BAD_REQUEST)
 
 class CertificationStatusView(APIView):
     def get(self, request, certification_id):
-        try:
-            certification = Certification.objects.get(
-                certification_id=certification_id,
-                member=request.user
-            )
-        except Certification.DoesNotExist:
+        certification = load_certification(certification_id, member=request.user)
+        if certification is None:
             return Response({
                 'status': 'error',
                 'code': 404,
                 'message': '인증 요청을 찾을 수 없습니다.'
             }, status=status.HTTP_404_NOT_FOUND)
-        
-        # 이미 완료된 경우
-        if certification.status == 'completed':
-            try:
-                coupon = Coupon.objects.get(store=certification.store)
-                return Response({
-                    'status': 'completed',
-                    'code': 200,
-                    'message': '인증이 완료되었습니다!',
-                    'coupon': {
-                        'coupon_id': coupon.coupon_id,
-                        'coupon_name': coupon.coupon_name,
-                        'code': str(coupon.code),
-                        'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
-                    }
-                }, status=status.HTTP_200_OK)
-            except Coupon.DoesNotExist:
-                return Response({
-                    'status': 'error',
-                    'code': 404,
-                    'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'
-                }, status=status.HTTP_404_NOT_FOUND)
-        
-
-        with transaction.atomic():
-            store = Store.objects.select_for_update().get(pk=certification.store.pk) # store 행에 락을 걸어서 동시성 문제 방지
-            required_count = store.required_count
-            now = timezone.now()
-            window_secs = store.success_window_seconds
-
-            store_location = Point(store.lng, store.lat, srid=4326)
-
-            nearby_certifications = Certification.objects.filter(
-                store=store,
-                status='pending',
-                location__distance_lte=(store_location, D(m=50))  # 50m 이내
-            )
-        
-            current_count = nearby_certifications.count()
-        
-            # 윈도우가 열려 있는 경우우
-            if store.success_window_started_at:
-                deadline = store.success_window_started_at + timedelta(seconds=window_secs)
 
-                if now > deadline:
-                    # 창 만료되었을 때 모인 pending 인증 일괄 완료
-                    nearby_certifications.update(status='completed')
-                    store.success_window_started_at = None
-                    store.save(update_fields=['success_window_started_at'])
+        # 이미 완료된 경우 (창 닫기 워커가 마감 시각에 일괄 완료)
+        if certification.status != 'pending':
+            payload, http_status = status_payload(certification)
+            return Response(payload, status=http_status)
 
-                    certification.refresh_from_db(fields=['status'])
-
-                    try:
-                        coupon = Coupon.objects.get(store=store)
-                        return Response({
-                            'status': 'completed', 'code': 200,
-                            'message': '인증이 완료되었습니다!(윈도우 종료 시 일괄 확정)',
-                            'required_count': required_count,
-                            'coupon': {
-                                'coupon_id': coupon.coupon_id,
-                                'coupon_name': coupon.coupon_name,
-                                'code': str(coupon.code),
-                                'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
-                            }
-                        }, status=status.HTTP_200_OK)
-                    except Coupon.DoesNotExist:
-                        return Response({'status': 'error', 'code': 404, 'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'},
-                                        status=status.HTTP_404_NOT_FOUND)
-                else:
-                    remaining = (deadline - now).total_seconds()
-                    return Response({
-                        'status': 'pending', 'code': 200,
-                        'message': '아직 윈도우가 닫히지 않았습니다. 곧 함께 완료됩니다다.',
-                        'current_count': current_count,
-                        'required_count': required_count,
-                        'window': {
-                            'open': True,
-                            'ends_at': deadline.isoformat(),
-                            'remaining_seconds': remaining
-                        },
-                        'certification_id': certification_id
-                    }, status=status.HTTP_200_OK)
+        window = open_window_if_threshold_reached(certification.store_id)
 
-            # required_count에 도달한 경우, 창이 닫혀 있는 경우
-            if current_count >= required_count:
-                store.success_window_started_at = now
-                store.save(update_fields=['success_window_started_at'])
-                deadline = now + timedelta(seconds=window_secs)
-                return Response({
-                    'status': 'pending', 'code': 200,
-                    'message': '유예 창이 열렸습니다. 창이 닫히면 함께 완료됩니다.',
-                    'current_count': current_count,
-                    'required_count': required_count,
-                    'window': {
-                        'open': True,
-                        'ends_at': deadline.isoformat(),
-                        'remaining_seconds': window_secs
-                    },
-                    'certification_id': certification_id
-                }, status=status.HTTP_200_OK)
+        # 윈도우가 열려 있는 경우 (마감이 지났으면 워커가 곧 닫음)
+        if window.started_at:
+            if window.opened:
+                message = '유예 창이 열렸습니다. 창이 닫히면 함께 완료됩니다.'
+            else:
+                message = '아직 윈도우가 닫히지 않았습니다. 곧 함께 완료됩니다.'
+            return Response({
+                'status': 'pending', 'code': 200,
+                'message': message,
+                'current_count': window.current_count,
+                'required_count': window.required_count,
+                'window': {
+                    'open': True,
+                    'ends_at': window.deadline.isoformat(),
+                    'remaining_seconds': max(0.0, (window.deadline - timezone.now()).total_seconds())
+                },
+                'certification_id': certification_id
+            }, status=status.HTTP_200_OK)
 
-            
         # 아직 완료되지 않은 경우
         return Response({
             'status': 'pending',
             'code': 200,
             'message': '인증 진행 중...',
-            'current_count': current_count,
-            'required_count': required_count,
+            'current_count': window.current_count,
+            'required_count': window.required_count,
             'window': {'open': False},
             'certification_id': certification_id
         }, status=status.HTTP_200_OK)
@@ -161,86 +91,15 @@ class CertificationStatusView(APIView):
 
 class CertificationStatusView2(APIView): # 인증 완료 버튼 있는 버전
     def get(self, request, certification_id):
-        try:
-            certification = Certification.objects.get(certification_id=certification_id)
-        except Certification.DoesNotExist:
+        certification = load_certification(certification_id)
+        if certification is None:
             return Response({'status': 'error', 'code': 404, 'message': '인증 요청을 찾을 수 없습니다.'},
                             status=status.HTTP_404_NOT_FOUND)
-        
-        if certification.status == 'completed':
-            try:
-                coupon = Coupon.objects.get(store=certification.store)
-                return Response({
-                    'status': 'completed',
-                    'code': 200,
-                    'message': '인증이 완료되었습니다!',
-                    'coupon': {
-                        'coupon_id': coupon.coupon_id,
-                        'coupon_name': coupon.coupon_name,
-                        'code': str(coupon.code),
-                        'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
-                    }
-                }, status=status.HTTP_200_OK)
-            except Coupon.DoesNotExist:
-                return Response({'status': 'error', 'code': 404, 'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'},
-                                status=status.HTTP_404_NOT_FOUND)
-        
-        with transaction.atomic():
-            store = Store.objects.select_for_update().get(pk=certification.store.pk)
-            required_count = store.required_count
 
-            store_location = Point(store.lng, store.lat, srid=4326)
+        if certification.status == 'pending':
+            # 문턱 달성 시 일괄 완료 (완료되면 WebSocket으로 기다리는 인증자에게도 알림)
+            complete_if_threshold_reached(certification.store_id)
+            certification.refresh_from_db(fields=['status'])
 
-            nearby_certifications = Certification.objects.filter(
-                store=store,
-                status='pending',
-                location__distance_lte=(store_location, D(km=5))
-            )
-
-            current_count = nearby_certifications.count()
-
-            if current_count >= required_count: # 문턱 달성, 하지만 아직 pending 상태 -> 일괄 완료로 업데이트
-                nearby_certifications.update(status='completed')
-                certification.refresh_from_db(fields=['status'])
-                try:
-                    coupon = Coupon.objects.get(store=store)
-                except Coupon.DoesNotExist:
-                    return Response({'status': 'error', 'code': 404, 'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'},
-                                    status=status.HTTP_404_NOT_FOUND)
-                
-                return Response({
-                    'status': 'completed',
-                    'code': 200,
-                    'message': '인증이 완료되었습니다!',
-                    'coupon': {
-                        'coupon_id': coupon.coupon_id,
-                        'coupon_name': coupon.coupon_name,
-                        'code': str(coupon.code),
-                        'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
-                    }
-                }, status=status.HTTP_200_OK)
-    
-        certification.refresh_from_db(fields=['status'])
-        if certification.status == 'completed':
-            try:
-                coupon = Coupon.objects.get(store=certification.store)
-                return Response({
-                    'status': 'completed',
-                    'code': 200,
-                    'message': '인증이 완료되었습니다!',
-                    'coupon': {
-                        'coupon_id': coupon.coupon_id,
-                        'coupon_name': coupon.coupon_name,
-                        'code': str(coupon.code),
-                        'qr_code_image': coupon.qr_code_image.url if coupon.qr_code_image else None
-                    }
-                }, status=status.HTTP_200_OK)
-            except Coupon.DoesNotExist:
-                return Response({'status': 'error', 'code': 404, 'message': '해당 가게의 쿠폰을 찾을 수 없습니다.'},
-                                status=status.HTTP_404_NOT_FOUND)
-        elif certification.status == 'pending':
-            return Response({"status" : "pending", "code" : 200, "message" : "인증 진행 중..", "certification_id" : certification_id})
-        else:
-            return Response({"status" : "error", "code" : 404, "message" : "인증 상태를 찾을 수 없습니다."},
-                            status=status.HTTP_404_NOT_FOUND)
-            
+        payload, http_status = status_payload(certification)
+        return Response(payload, status=http_status)
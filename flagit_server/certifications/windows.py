@@ -0,0 +1,108 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from stores.models import Store
+from .services import close_window
+
+logger = logging.getLogger(__name__)
+
+
+class WindowCloser:
+    """
+    열린 유예 창을 마감 시각 순서의 힙(heap)으로 관리하고, 마감 시각이 되면 창을 닫는 워커
+    - scan_seconds마다 열린 창(success_window_started_at이 있는 가게)을 DB에서 다시 읽어 큐에 반영
+    - 마감이 지난 창은 close_window로 닫음 (창 안의 대기 중 인증을 한 번의 update로 완료, 완료 알림 전송)
+    - 창이 다시 열리거나 길이가 바뀌면 가게별 최신 마감 시각만 유효 (힙에 남은 이전 항목은 꺼낼 때 무시)
+    """
+
+    def __init__(self, scan_seconds: Optional[float] = None):
+        self.scan_seconds = scan_seconds or getattr(settings, 'CERTIFICATION_WINDOW_SCAN_SECONDS', 1.0)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._deadlines: Dict[int, datetime] = {}
+        self.closed_windows = 0
+        self.completed = 0
+        self.max_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, store_id: int, deadline: datetime) -> None:
+        if self._deadlines.get(store_id) == deadline:
+            return
+        self._deadlines[store_id] = deadline
+        heapq.heappush(self._heap, (deadline, store_id))
+
+    def scan(self) -> None:
+        """
+        DB의 열린 창으로 큐를 맞춥니다. (다른 프로세스의 요청이 연 창도 반영)
+        """
+        open_windows = Store.objects.filter(success_window_started_at__isnull=False).values_list(
+            'store_id', 'success_window_started_at', 'success_window_seconds'
+        )
+        seen = set()
+        for store_id, started_at, seconds in open_windows:
+            seen.add(store_id)
+            self.schedule(store_id, started_at + timedelta(seconds=seconds))
+        # 이미 닫힌 창은 힙에서 꺼낼 때 무시
+        for store_id in set(self._deadlines) - seen:
+            del self._deadlines[store_id]
+
+    def next_deadline(self) -> Optional[datetime]:
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def close_due(self, now: Optional[datetime] = None) -> List[Tuple[int, List[int]]]:
+        """
+        마감 시각이 지난 창을 모두 닫습니다. -> [(store_id, 완료한 인증 id 목록)]
+        """
+        now = now or timezone.now()
+        closed = []
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                return closed
+            _, store_id = heapq.heappop(self._heap)
+            del self._deadlines[store_id]
+            try:
+                certification_ids = close_window(store_id)
+            except Store.DoesNotExist:
+                continue
+            except Exception:
+                # 다음 scan에서 다시 큐에 들어옴
+                logger.exception("유예 창 닫기 실패: store %s", store_id)
+                continue
+
+            lag = (timezone.now() - deadline).total_seconds()
+            self.max_lag = max(self.max_lag, lag)
+            self.closed_windows += 1
+            self.completed += len(certification_ids)
+            logger.info("유예 창 닫음: store %s, 완료 %d건, 지연 %.3fs", store_id, len(certification_ids), lag)
+            closed.append((store_id, certification_ids))
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        stop이 설정될 때까지 scan/close_due를 반복합니다. 다음 마감 시각이나 다음 scan 중 이른 시각까지 대기
+        """
+        stop = stop or threading.Event()
+        next_scan = timezone.now()
+        while not stop.is_set():
+            close_old_connections()
+            now = timezone.now()
+            if now >= next_scan:
+                self.scan()
+                next_scan = now + timedelta(seconds=self.scan_seconds)
+            self.close_due()
+
+            wake_at = next_scan
+            deadline = self.next_deadline()
+            if deadline is not None and deadline < wake_at:
+                wake_at = deadline
+            stop.wait(max(0.0, (wake_at - timezone.now()).total_seconds()))
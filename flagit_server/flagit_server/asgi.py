@@ -13,4 +13,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flagit_server.settings')
 
-application = get_asgi_application()
+# 앱 레지스트리를 먼저 준비한 뒤 모델을 쓰는 라우팅을 불러옴
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from certifications.middleware import JWTAuthMiddleware  # noqa: E402
+from certifications.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    # 인증 완료 알림 (WebSocket)
+    'websocket': AllowedHostsOriginValidator(JWTAuthMiddleware(URLRouter(websocket_urlpatterns))),
+})
+
+# 가게 공간 인덱스를 미리 적재 (백그라운드)
+from stores.index import warm_up  # noqa: E402
+
+warm_up()
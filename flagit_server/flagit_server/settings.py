@@ -23,7 +23,117 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 GEMINI_API_KEY = config('GEMINI_API_KEY')
 GEMINI_MODEL_NAME = config('GEMINI_MODEL_NAME')
+GEMINI_BACKEND = config('GEMINI_BACKEND', default='google')  # google | fake (테스트/벤치마크용 로컬 모델)
+GEMINI_FAKE_LATENCY = config('GEMINI_FAKE_LATENCY', default=0.0, cast=float)  # fake 모델 응답 지연(초)
+GEMINI_MAX_CONCURRENCY = config('GEMINI_MAX_CONCURRENCY', default=8, cast=int)  # 워커 프로세스당 동시 호출 수
+GEMINI_QUEUE_TIMEOUT = config('GEMINI_QUEUE_TIMEOUT', default=5, cast=float)  # 동시 호출 슬롯 대기 시간(초)
+GEMINI_CIRCUIT_FAILURE_THRESHOLD = config('GEMINI_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)  # 연속 실패 시 차단
+GEMINI_CIRCUIT_RESET_SECONDS = config('GEMINI_CIRCUIT_RESET_SECONDS', default=30, cast=float)  # 차단 유지 시간(초)
+
+# 지오코딩 캐시 (위치 문자열 -> 좌표) 설정
+GEOCODE_CACHE_MEMORY_SIZE = config('GEOCODE_CACHE_MEMORY_SIZE', default=1024, cast=int)  # 프로세스 내 LRU 항목 수
+GEOCODE_CACHE_TTL_SECONDS = config('GEOCODE_CACHE_TTL_SECONDS', default=60 * 60 * 24 * 30, cast=int)  # 30일
+GEOCODE_CACHE_DB_MAX_ENTRIES = config('GEOCODE_CACHE_DB_MAX_ENTRIES', default=50000, cast=int)
+
+# 경로 생성 엔진 설정
+GEMINI_REQUEST_TIMEOUT = config('GEMINI_REQUEST_TIMEOUT', default=15, cast=float)  # Gemini 호출당 제한 시간(초)
+ROUTE_ENGINE_DEFAULT = config('ROUTE_ENGINE_DEFAULT', default='gemini')  # gemini | loop
+ROUTE_ENGINE_FALLBACK = config('ROUTE_ENGINE_FALLBACK', default='loop')  # Gemini 시간 초과 시 대체 엔진 (빈 값이면 대체하지 않음)
+ROUTE_LOOP_TOLERANCE = config('ROUTE_LOOP_TOLERANCE', default=0.02, cast=float)  # 로컬 원형 경로 길이 허용 오차 (목표 거리 대비 비율)
+ROUTE_DISTANCE_TOLERANCE = config('ROUTE_DISTANCE_TOLERANCE', default=0.1, cast=float)  # 생성된 경로를 보정 없이 허용하는 오차 비율
+ROUTE_DISTANCE_REJECT_RATIO = config('ROUTE_DISTANCE_REJECT_RATIO', default=4.0, cast=float)  # 목표 대비 이 배수 이상 차이나면 경로 거부
+
+# Gemini 경로 추천 꼬리 지연 정책 (routes.hedging.HedgePolicy)
+ROUTE_HEDGE_ENABLED = config('ROUTE_HEDGE_ENABLED', default=True, cast=bool)  # 느린 첫 요청에 추가 요청 보내기
+ROUTE_HEDGE_AFTER_SECONDS = config('ROUTE_HEDGE_AFTER_SECONDS', default=4.0, cast=float)  # 최근 지연 표본이 부족할 때의 기준 시간(초)
+ROUTE_HEDGE_PERCENTILE = config('ROUTE_HEDGE_PERCENTILE', default=90, cast=float)  # 최근 성공 호출 지연의 이 백분위를 넘기면 추가 요청
+ROUTE_HEDGE_MIN_SAMPLES = config('ROUTE_HEDGE_MIN_SAMPLES', default=20, cast=int)
+ROUTE_HEDGE_WORKERS = config('ROUTE_HEDGE_WORKERS', default=16, cast=int)  # 워커 프로세스당 Gemini 호출 스레드 수
+ROUTE_LLM_MAX_ATTEMPTS = config('ROUTE_LLM_MAX_ATTEMPTS', default=3, cast=int)  # 추가 요청/형식 오류 재요청 포함 최대 호출 수
+ROUTE_LLM_DEADLINE_SECONDS = config('ROUTE_LLM_DEADLINE_SECONDS', default=20, cast=float)  # 경로 생성 전체 제한 시간(초)
+
+# 경로 재사용 캐시 설정 (관리자 페이지의 경로 캐시 설정이 있으면 그 값이 우선)
+ROUTE_CACHE_ENABLED = config('ROUTE_CACHE_ENABLED', default=True, cast=bool)
+ROUTE_CACHE_TTL_SECONDS = config('ROUTE_CACHE_TTL_SECONDS', default=60 * 60 * 24 * 7, cast=int)  # 7일
+ROUTE_CACHE_GRID_METERS = config('ROUTE_CACHE_GRID_METERS', default=200, cast=float)  # 시작 좌표 격자 크기
+ROUTE_CACHE_DISTANCE_STEP_KM = config('ROUTE_CACHE_DISTANCE_STEP_KM', default=0.5, cast=float)  # 목표 거리 구간 크기
+
+# 제휴 가게 경유지 선택 (routes.waypoints.WaypointPlanner)
+ROUTE_WAYPOINT_STOPS = config('ROUTE_WAYPOINT_STOPS', default=1, cast=int)  # 요청에 max_stops가 없을 때 경유할 가게 수
+ROUTE_WAYPOINT_MAX_STOPS = config('ROUTE_WAYPOINT_MAX_STOPS', default=3, cast=int)  # 요청당 최대 경유 가게 수
+ROUTE_WAYPOINT_CANDIDATES = config('ROUTE_WAYPOINT_CANDIDATES', default=32, cast=int)  # KNN으로 조회할 후보 가게 수
+ROUTE_WAYPOINT_MAX_DETOUR_RATIO = config('ROUTE_WAYPOINT_MAX_DETOUR_RATIO', default=0.25, cast=float)  # 가게당 허용 우회 거리 (목표 거리 대비)
+
+# 동일 요청 합치기: 프로세스 간에도 합치려면 공유 캐시 백엔드(CACHES)의 alias를 지정 (빈 값이면 프로세스 내에서만)
+ROUTE_SINGLEFLIGHT_CACHE = config('ROUTE_SINGLEFLIGHT_CACHE', default='')
+
+# 인기 시작 위치 경로 미리 생성 (manage.py pregenerate_routes, cron 등으로 한가한 시간대에 실행)
+ROUTE_PREGENERATE_TOP = config('ROUTE_PREGENERATE_TOP', default=20, cast=int)  # 미리 생성할 (시작 위치, 거리) 조합 수
+ROUTE_PREGENERATE_LLM_BUDGET = config('ROUTE_PREGENERATE_LLM_BUDGET', default=100, cast=int)  # 실행당 최대 Gemini 호출 수
+ROUTE_PREGENERATE_OFF_PEAK_HOURS = config('ROUTE_PREGENERATE_OFF_PEAK_HOURS', default='2-6')  # 실행 허용 시간대 (현지 시각)
+
+# 일괄 경로 추천 (POST /routes/batch/)
+ROUTE_BATCH_MAX_ITEMS = config('ROUTE_BATCH_MAX_ITEMS', default=10, cast=int)  # 요청당 최대 항목 수
+ROUTE_BATCH_WORKERS = config('ROUTE_BATCH_WORKERS', default=4, cast=int)  # 워커 프로세스당 동시 경로 생성 수
+
+# 비동기 경로 추천 작업 설정
+ROUTE_JOB_BACKEND = config('ROUTE_JOB_BACKEND', default='routes.jobs.ThreadPoolJobBackend')  # 테스트: routes.jobs.ImmediateJobBackend
+ROUTE_JOB_WORKERS = config('ROUTE_JOB_WORKERS', default=4, cast=int)  # 워커 프로세스당 백그라운드 스레드 수
     
+# 주변 가게 조회 (GET /stores/nearby/)
+STORE_NEARBY_DEFAULT_RADIUS_M = config('STORE_NEARBY_DEFAULT_RADIUS_M', default=5000, cast=float)  # radius 미지정 시 검색 반경(m)
+STORE_NEARBY_MAX_RADIUS_M = config('STORE_NEARBY_MAX_RADIUS_M', default=50000, cast=float)  # 허용 최대 검색 반경(m)
+STORE_NEARBY_DEFAULT_LIMIT = config('STORE_NEARBY_DEFAULT_LIMIT', default=50, cast=int)  # limit 미지정 시 페이지 크기
+STORE_NEARBY_MAX_LIMIT = config('STORE_NEARBY_MAX_LIMIT', default=200, cast=int)  # 허용 최대 페이지 크기
+
+# 지도 화면(bbox) 가게 조회 (GET /stores/bbox/)
+STORE_BBOX_MAX_RESULTS = config('STORE_BBOX_MAX_RESULTS', default=500, cast=int)  # 요청당 최대 가게/클러스터 수
+STORE_BBOX_CLUSTER_MAX_ZOOM = config('STORE_BBOX_CLUSTER_MAX_ZOOM', default=14, cast=int)  # 이 줌 미만이면 클러스터로 응답
+STORE_BBOX_CLUSTER_CELL_PX = config('STORE_BBOX_CLUSTER_CELL_PX', default=64, cast=int)  # 클러스터 격자 한 칸의 화면 크기(px)
+
+# 가게 벡터 타일 (GET /stores/tiles/{z}/{x}/{y}.mvt)
+STORE_TILE_CACHE_ENABLED = config('STORE_TILE_CACHE_ENABLED', default=True, cast=bool)  # 렌더링한 타일을 디스크에 캐시
+STORE_TILE_CACHE_DIR = config('STORE_TILE_CACHE_DIR', default=str(BASE_DIR / 'tile_cache' / 'stores'))  # 타일 캐시 디렉터리
+STORE_TILE_MAX_ZOOM = config('STORE_TILE_MAX_ZOOM', default=20, cast=int)  # 제공하는 최대 줌 레벨
+STORE_TILE_MAX_AGE = config('STORE_TILE_MAX_AGE', default=60, cast=int)  # 클라이언트 캐시 시간(초), 이후 ETag로 재검증
+
+# 프로세스 내 가게 공간 인덱스 (stores.index, 주변 가게/경유지 조회에 사용)
+STORE_INDEX_ENABLED = config('STORE_INDEX_ENABLED', default=True, cast=bool)  # 끄면 항상 PostGIS로 조회
+STORE_INDEX_CELL_DEGREES = config('STORE_INDEX_CELL_DEGREES', default=0.01, cast=float)  # 격자 한 칸 크기(도, 약 1km)
+STORE_INDEX_CHECK_SECONDS = config('STORE_INDEX_CHECK_SECONDS', default=5, cast=float)  # DB의 인덱스 버전(StoreIndexVersion) 확인 주기(초), 다른 워커의 가게 변경이 늦게 보일 수 있는 최대 시간
+STORE_INDEX_MAX_AGE_SECONDS = config('STORE_INDEX_MAX_AGE_SECONDS', default=600, cast=float)  # 버전과 무관하게 다시 적재하는 주기(초)
+
+# 가게 일괄 가져오기 (manage.py import_stores, POST /stores/admin/import/)
+STORE_IMPORT_BATCH_SIZE = config('STORE_IMPORT_BATCH_SIZE', default=2000, cast=int)  # upsert 한 번에 보낼 행 수
+STORE_IMPORT_CHUNK_BYTES = config('STORE_IMPORT_CHUNK_BYTES', default=65536, cast=int)  # GeoJSON을 읽는 조각 크기(bytes)
+
+# 인증 완료 알림 (WebSocket, channels)
+# 기본은 프로세스 내 InMemoryChannelLayer (개발/테스트용, 같은 프로세스의 WebSocket에만 전달)
+# 완료 처리는 HTTP 요청(WSGI 워커)이나 창 닫기 워커에서 일어나므로, ASGI 프로세스의 WebSocket까지 알림을 보내려면 CHANNEL_REDIS_URL 필요
+CHANNEL_REDIS_URL = config('CHANNEL_REDIS_URL', default='')  # 예: redis://localhost:6379/0
+CHANNEL_LAYERS = {
+    'default': (
+        {'BACKEND': 'channels_redis.core.RedisChannelLayer', 'CONFIG': {'hosts': [CHANNEL_REDIS_URL]}}
+        if CHANNEL_REDIS_URL else
+        {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+    ),
+}
+
+# 인증 흐름과 흐름별 기본 인증 반경 (가게의 geofence_meters가 비어 있을 때, 반경 밖에서 보낸 인증 요청은 거절)
+CERTIFICATION_FLOW = config('CERTIFICATION_FLOW', default='button')  # button: 인증 완료 버튼(상태 조회 시 일괄 완료) / window: 유예 창
+CERTIFICATION_BUTTON_GEOFENCE_METERS = config('CERTIFICATION_BUTTON_GEOFENCE_METERS', default=5000, cast=int)  # button 흐름 기본 반경(m)
+CERTIFICATION_WINDOW_GEOFENCE_METERS = config('CERTIFICATION_WINDOW_GEOFENCE_METERS', default=50, cast=int)  # window 흐름 기본 반경(m)
+
+# 인증 유예 창 닫기 워커 (manage.py run_window_closer)
+CERTIFICATION_WINDOW_SCAN_SECONDS = config('CERTIFICATION_WINDOW_SCAN_SECONDS', default=1.0, cast=float)  # 열린 창을 DB에서 다시 읽는 주기(초)
+
+# 인증 상태 조회 캐시 (가게별 대기 중 인증 수/유예 창 상태, 상태 전환 시 삭제)
+CERTIFICATION_STATE_CACHE = config('CERTIFICATION_STATE_CACHE', default='default')  # 캐시 alias (여러 프로세스가 공유하려면 공유 캐시)
+CERTIFICATION_STATE_CACHE_SECONDS = config('CERTIFICATION_STATE_CACHE_SECONDS', default=2, cast=float)  # 최대 유지 시간(초), 다른 프로세스의 변경이 늦게 보일 수 있는 최대 시간
+
+# 가게별 대기 중 인증 카운터 맞추기 (manage.py reconcile_pending_counters)
+CERTIFICATION_COUNTER_RECONCILE_SECONDS = config('CERTIFICATION_COUNTER_RECONCILE_SECONDS', default=300, cast=float)  # 대기 카운터를 실제 행과 맞추는 주기(초)
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -26,4 +26,5 @@ urlpatterns = [
     path('coupons/', include('coupons.urls')),
     path('certifications/', include('certifications.urls')),
     path('routes/', include('routes.urls')),
+    path('locations/', include('location.urls')),
 ]
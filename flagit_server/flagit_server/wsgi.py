@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flagit_server.settings')
 
 application = get_wsgi_application()
+
+# 가게 공간 인덱스를 미리 적재 (백그라운드)
+from stores.index import warm_up  # noqa: E402
+
+warm_up()
@@ -1,4 +1,11 @@
 from django.contrib import admin
-from .models import Location
+from .models import Location, GeocodeCache
 
 admin.site.register(Location)
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ('query', 'lat', 'lng', 'hit_count', 'last_hit_at', 'expires_at')
+    search_fields = ('query',)
+    ordering = ('-last_hit_at',)
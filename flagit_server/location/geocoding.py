@@ -0,0 +1,230 @@
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from .models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+
+def normalize_location(location_name: str) -> str:
+    """
+    캐시 키로 사용할 수 있도록 위치 문자열을 정규화합니다.
+    (유니코드 정규화, 공백 정리, 소문자 변환)
+    """
+    normalized = unicodedata.normalize('NFKC', location_name or '')
+    normalized = re.sub(r'\s+', ' ', normalized).strip().lower()
+    return normalized[:255]
+
+
+class GeocodingCache:
+    """
+    위치 문자열 -> 좌표 변환 결과를 2단계로 캐시합니다.
+    1단계: 프로세스 내 LRU (마이크로초 단위 조회)
+    2단계: GeocodeCache 테이블 (워커/재시작 간 공유, TTL 및 최대 행 수 제한)
+    """
+
+    def __init__(self, memory_size: Optional[int] = None, ttl_seconds: Optional[int] = None,
+                 db_max_entries: Optional[int] = None, evict_every: int = 100):
+        self.memory_size = memory_size or getattr(settings, 'GEOCODE_CACHE_MEMORY_SIZE', 1024)
+        self.ttl_seconds = ttl_seconds or getattr(settings, 'GEOCODE_CACHE_TTL_SECONDS', 60 * 60 * 24 * 30)
+        self.db_max_entries = db_max_entries or getattr(settings, 'GEOCODE_CACHE_DB_MAX_ENTRIES', 50000)
+        self.evict_every = evict_every
+
+        self._memory: 'OrderedDict[str, Tuple[float, float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self._counters = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'errors': 0,
+        }
+        # 결과별 누적 지연 시간 (초)
+        self._latency = {
+            'memory_hit': [0, 0.0],
+            'db_hit': [0, 0.0],
+            'miss': [0, 0.0],
+        }
+
+    def _record(self, counter: str, outcome: str, started: float):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counters[counter] += 1
+            bucket = self._latency[outcome]
+            bucket[0] += 1
+            bucket[1] += elapsed
+
+    # 1단계: 메모리 LRU
+    def _memory_get(self, key: str) -> Optional[Coordinates]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            lat, lng, expires = entry
+            if expires <= time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return lat, lng
+
+    def _memory_set(self, key: str, lat: float, lng: float, ttl_seconds: float):
+        with self._lock:
+            self._memory[key] = (lat, lng, time.monotonic() + ttl_seconds)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    # 2단계: DB
+    def _db_get(self, key: str) -> Optional[Tuple[float, float, float]]:
+        now = timezone.now()
+        try:
+            row = (
+                GeocodeCache.objects.filter(query=key, expires_at__gt=now)
+                .values_list('lat', 'lng', 'expires_at')
+                .first()
+            )
+            if row is None:
+                return None
+            GeocodeCache.objects.filter(query=key).update(hit_count=F('hit_count') + 1, last_hit_at=now)
+        except DatabaseError:
+            logger.exception("지오코딩 캐시 DB 조회 실패: %s", key)
+            return None
+        lat, lng, expires_at = row
+        return lat, lng, (expires_at - now).total_seconds()
+
+    def _db_set(self, key: str, lat: float, lng: float):
+        now = timezone.now()
+        try:
+            GeocodeCache.objects.update_or_create(
+                query=key,
+                defaults={
+                    'lat': lat,
+                    'lng': lng,
+                    'expires_at': now + timedelta(seconds=self.ttl_seconds),
+                    'last_hit_at': now,
+                },
+            )
+        except DatabaseError:
+            logger.exception("지오코딩 캐시 DB 저장 실패: %s", key)
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self.evict_every == 0
+        if should_evict:
+            self.evict()
+
+    def get(self, location_name: str) -> Optional[Coordinates]:
+        """
+        캐시된 좌표를 반환합니다. 없으면 None.
+        """
+        started = time.perf_counter()
+        key = normalize_location(location_name)
+
+        coords = self._memory_get(key)
+        if coords is not None:
+            self._record('memory_hits', 'memory_hit', started)
+            return coords
+
+        row = self._db_get(key)
+        if row is not None:
+            lat, lng, remaining = row
+            self._memory_set(key, lat, lng, remaining)
+            self._record('db_hits', 'db_hit', started)
+            return lat, lng
+
+        return None
+
+    def set(self, location_name: str, lat: float, lng: float):
+        key = normalize_location(location_name)
+        self._memory_set(key, lat, lng, self.ttl_seconds)
+        self._db_set(key, lat, lng)
+
+    def get_or_resolve(self, location_name: str, resolver: Callable[[str], Coordinates]) -> Coordinates:
+        """
+        캐시를 먼저 조회하고, 없으면 resolver(원본 위치 문자열)로 변환한 뒤 캐시에 저장합니다.
+        """
+        started = time.perf_counter()
+        coords = self.get(location_name)
+        if coords is not None:
+            return coords
+
+        try:
+            lat, lng = resolver(location_name)
+        except Exception:
+            with self._lock:
+                self._counters['errors'] += 1
+            raise
+
+        self.set(location_name, lat, lng)
+        self._record('misses', 'miss', started)
+        return lat, lng
+
+    def evict(self) -> int:
+        """
+        만료된 행을 삭제하고, 최대 행 수를 넘는 경우 오래 사용되지 않은 행부터 삭제합니다.
+        """
+        try:
+            deleted, _ = GeocodeCache.objects.filter(expires_at__lte=timezone.now()).delete()
+            overflow = GeocodeCache.objects.count() - self.db_max_entries
+            if overflow > 0:
+                stale_ids = list(
+                    GeocodeCache.objects.order_by('last_hit_at').values_list('id', flat=True)[:overflow]
+                )
+                extra, _ = GeocodeCache.objects.filter(id__in=stale_ids).delete()
+                deleted += extra
+        except DatabaseError:
+            logger.exception("지오코딩 캐시 정리 실패")
+            return 0
+        return deleted
+
+    def clear(self):
+        """
+        메모리 계층과 카운터를 초기화합니다. (DB 계층은 유지)
+        """
+        with self._lock:
+            self._memory.clear()
+            self._reset_counters()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        모니터링용 적중/미스 카운터 및 평균 지연 시간(ms)
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            latency = {outcome: list(bucket) for outcome, bucket in self._latency.items()}
+            memory_entries = len(self._memory)
+
+        lookups = counters['memory_hits'] + counters['db_hits'] + counters['misses']
+        hits = counters['memory_hits'] + counters['db_hits']
+        return {
+            **counters,
+            'lookups': lookups,
+            'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': memory_entries,
+            'memory_size': self.memory_size,
+            'avg_latency_ms': {
+                outcome: round(total / count * 1000, 3) if count else None
+                for outcome, (count, total) in latency.items()
+            },
+        }
+
+
+# 프로세스 단위로 공유되는 캐시 인스턴스
+geocode_cache = GeocodingCache()
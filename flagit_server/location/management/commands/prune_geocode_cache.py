@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from location.geocoding import geocode_cache
+
+
+class Command(BaseCommand):
+    help = "만료되었거나 최대 행 수를 초과한 지오코딩 캐시 행을 삭제합니다. (cron 등으로 주기 실행)"
+
+    def handle(self, *args, **options):
+        deleted = geocode_cache.evict()
+        self.stdout.write(self.style.SUCCESS(f"지오코딩 캐시 {deleted}건 삭제"))
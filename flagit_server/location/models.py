@@ -7,4 +7,19 @@ class Location(models.Model):
     location_distance = models.FloatField(default=0.0)
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class GeocodeCache(models.Model):
+    """
+    위치 문자열 -> 좌표 변환 결과 캐시 (DB 계층)
+    """
+    query = models.CharField(max_length=255, unique=True)  # 정규화된 위치 문자열
+    lat = models.FloatField()
+    lng = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    last_hit_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.query} ({self.lat}, {self.lng})"
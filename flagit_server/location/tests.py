@@ -1,3 +1,102 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .geocoding import GeocodingCache, normalize_location
+from .models import GeocodeCache
+
+
+class NormalizeLocationTests(SimpleTestCase):
+    def test_normalizes_width_space_and_case(self):
+        self.assertEqual(normalize_location('  Seoul　 City\tHall '), 'seoul city hall')
+        self.assertEqual(normalize_location('ＧＡＮＧＮＡＭ 역'), 'gangnam 역')
+
+    def test_empty_and_long_values(self):
+        self.assertEqual(normalize_location(None), '')
+        self.assertEqual(len(normalize_location('가' * 300)), 255)
+
+
+class GeocodingCacheTests(TestCase):
+    """
+    메모리 LRU -> GeocodeCache 테이블 -> resolver 순서로 조회하는 2단계 캐시
+    """
+
+    def setUp(self):
+        self.cache = GeocodingCache(memory_size=2, ttl_seconds=3600, db_max_entries=100, evict_every=100)
+        self.resolved = []
+
+    def resolver(self, name):
+        self.resolved.append(name)
+        return 37.5 + len(self.resolved) / 100, 127.0
+
+    def test_memory_then_db_then_resolver(self):
+        first = self.cache.get_or_resolve('서울시청', self.resolver)
+        self.assertEqual(self.cache.get_or_resolve(' 서울시청 ', self.resolver), first)
+        self.assertEqual(self.cache.stats()['memory_hits'], 1)
+
+        # 메모리 계층만 비움 -> DB 계층에서 조회
+        self.cache.clear()
+        self.assertEqual(self.cache.get_or_resolve('서울시청', self.resolver), first)
+
+        stats = self.cache.stats()
+        self.assertEqual(self.resolved, ['서울시청'])
+        self.assertEqual((stats['memory_hits'], stats['db_hits']), (0, 1))
+        self.assertEqual(GeocodeCache.objects.get(query='서울시청').hit_count, 1)
+
+    def test_lru_keeps_recently_used_entries(self):
+        for name in ('a', 'b'):
+            self.cache.get_or_resolve(name, self.resolver)
+        self.cache.get('a')
+        self.cache.get_or_resolve('c', self.resolver)
+
+        self.assertEqual(list(self.cache._memory), ['a', 'c'])
+        # 메모리에서 밀려난 항목은 DB에서 다시 읽음
+        self.cache.get('b')
+        self.assertEqual(self.cache.stats()['db_hits'], 1)
+        self.assertEqual(len(self.resolved), 3)
+
+    def test_expired_db_row_is_not_used(self):
+        self.cache.set('강남역', 37.49, 127.02)
+        GeocodeCache.objects.filter(query='강남역').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get('강남역'))
+        self.cache.get_or_resolve('강남역', self.resolver)
+        self.assertEqual(self.resolved, ['강남역'])
+
+    def test_resolver_error_is_not_cached(self):
+        def failing(name):
+            raise ValueError('위치를 찾을 수 없습니다.')
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_resolve('없는 곳', failing)
+
+        self.assertEqual(self.cache.stats()['errors'], 1)
+        self.assertFalse(GeocodeCache.objects.filter(query='없는 곳').exists())
+
+    def test_evicts_every_n_writes(self):
+        cache = GeocodingCache(memory_size=10, ttl_seconds=3600, db_max_entries=100, evict_every=3)
+        with mock.patch.object(cache, 'evict', return_value=0) as evict:
+            for i in range(7):
+                cache.set(f'위치 {i}', 37.5, 127.0)
+
+        self.assertEqual(evict.call_count, 2)
+
+    def test_evict_removes_expired_then_least_recently_used(self):
+        now = timezone.now()
+        for i in range(5):
+            GeocodeCache.objects.create(
+                query=f'위치 {i}', lat=37.5, lng=127.0,
+                expires_at=now + timedelta(hours=1 if i else -1),
+            )
+        # 위치 1이 가장 오래 사용되지 않음
+        for i in range(1, 5):
+            GeocodeCache.objects.filter(query=f'위치 {i}').update(last_hit_at=now - timedelta(minutes=10 - i))
+
+        cache = GeocodingCache(db_max_entries=3)
+        self.assertEqual(cache.evict(), 2)
+        self.assertEqual(
+            sorted(GeocodeCache.objects.values_list('query', flat=True)), ['위치 2', '위치 3', '위치 4'],
+        )
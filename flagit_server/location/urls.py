@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import GeocodeCacheStatsView
+
+urlpatterns = [
+    path('geocode-cache/stats/', GeocodeCacheStatsView.as_view()), # 지오코딩 캐시 모니터링
+]
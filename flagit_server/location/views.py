@@ -1,3 +1,14 @@
 from django.shortcuts import render
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from .geocoding import geocode_cache
 
 # Create your views here.
+class GeocodeCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request): # 현재 워커 프로세스의 지오코딩 캐시 적중/미스/지연 시간
+        return Response({'status': 'success', 'code': 200, 'message': '지오코딩 캐시 통계 조회 성공',
+                         'data': geocode_cache.stats()}, status=status.HTTP_200_OK)
@@ -1,3 +1,41 @@
 from django.contrib import admin
+from .models import Route, RouteCacheSetting, RouteJob
+from .route_cache import cache_stats, invalidate_cached_routes, reset_cache_policy
 
 # Register your models here.
+@admin.register(Route)
+class RouteAdmin(admin.ModelAdmin):
+    list_display = ('route_id', 'crew_type', 'start_location', 'target_distance', 'actual_distance', 'engine', 'cache_key', 'created_at')
+    list_filter = ('crew_type', 'engine')
+    search_fields = ('start_location', 'cache_key')
+    ordering = ('-route_id',)
+    exclude = ('path',)
+    actions = ['invalidate_cache']
+
+    @admin.action(description='선택한 경로를 캐시에서 제외 (다음 요청 시 새로 생성)')
+    def invalidate_cache(self, request, queryset):
+        count = invalidate_cached_routes(queryset)
+        self.message_user(request, f"{count}개 경로를 캐시에서 제외했습니다.")
+
+
+@admin.register(RouteCacheSetting)
+class RouteCacheSettingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'enabled', 'ttl_seconds', 'updated_at')
+
+    def changelist_view(self, request, extra_context=None):
+        # 현재 워커 프로세스 기준 적중률 표시
+        stats = cache_stats()
+        self.message_user(request, f"경로 캐시 적중 {stats['hits']} / 미스 {stats['misses']} (적중률 {stats['hit_ratio']:.1%})")
+        return super().changelist_view(request, extra_context)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        reset_cache_policy()
+
+
+@admin.register(RouteJob)
+class RouteJobAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'crew_member', 'start_location', 'target_distance', 'status', 'created_at', 'updated_at')
+    list_filter = ('status',)
+    search_fields = ('start_location',)
+    ordering = ('-created_at',)
@@ -0,0 +1,122 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from crew.models import CrewMember
+from location.geocoding import normalize_location
+from .metrics import StageTimer
+from .pipeline import recommend_and_save_route
+from .services import RouteRecommendationService
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+	"""
+	일괄 경로 추천용 프로세스 단위 스레드 풀 (ROUTE_BATCH_WORKERS로 동시 실행 수 제한)
+	"""
+	global _executor
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(
+					max_workers=getattr(settings, 'ROUTE_BATCH_WORKERS', 4),
+					thread_name_prefix='route-batch',
+				)
+	return _executor
+
+def _in_worker(func, *args, **kwargs):
+	# 워커 스레드에서 연 DB 연결은 직접 정리
+	close_old_connections()
+	try:
+		return func(*args, **kwargs)
+	finally:
+		connection.close()
+
+def _error_message(e: Exception) -> str:
+	if isinstance(e, ValueError):
+		return str(e)
+	return f'경로 추천 중 오류 발생: {str(e)}'
+
+def recommend_routes_batch(
+	crew_member: CrewMember,
+	items: List[Dict[str, Any]],
+	engine: Optional[str] = None,
+	max_stops: Optional[int] = None,
+	service: Optional[RouteRecommendationService] = None,
+	timer: Optional[StageTimer] = None,
+) -> List[Dict[str, Any]]:
+	"""
+	여러 (start_location, target_distance) 조합의 경로를 한 번에 추천합니다.
+	- 같은 시작 위치는 위치 변환을 한 번만 수행 (서로 다른 위치는 동시에 변환)
+	- 경로 생성/저장은 스레드 풀에서 동시에 실행하므로 전체 시간은 가장 느린 항목에 가까움
+	- 항목별로 성공/실패를 따로 반환 (한 항목의 실패가 나머지에 영향을 주지 않음)
+	반환 순서는 items 순서와 같습니다.
+	"""
+	service = service or RouteRecommendationService()
+	timer = timer or StageTimer()
+	executor = _get_executor()
+
+	# 1. 위치 변환 (정규화한 위치 이름당 1회)
+	locations: Dict[str, str] = {}
+	for item in items:
+		locations.setdefault(normalize_location(item['start_location']), item['start_location'])
+
+	coords: Dict[str, Tuple[float, float]] = {}
+	geocode_errors: Dict[str, Exception] = {}
+	with timer.stage('geocode'):
+		futures = {
+			key: executor.submit(_in_worker, service.convert_location_to_coordinates, name)
+			for key, name in locations.items()
+		}
+		for key, future in futures.items():
+			try:
+				coords[key] = future.result()
+			except Exception as e:
+				geocode_errors[key] = e
+
+	# 2. 경로 생성 및 저장 (항목별 동시 실행)
+	results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+	route_futures = {}
+	with timer.stage('generate'):
+		for index, item in enumerate(items):
+			key = normalize_location(item['start_location'])
+			if key in geocode_errors:
+				results[index] = {'index': index, 'status': 'error', 'message': _error_message(geocode_errors[key])}
+				continue
+			route_futures[index] = executor.submit(
+				_in_worker,
+				recommend_and_save_route,
+				crew_member=crew_member,
+				start_location=item['start_location'],
+				target_distance=item['target_distance'],
+				service=service,
+				start_coords=coords[key],
+				engine=engine,
+				max_stops=max_stops,
+			)
+
+		for index, future in route_futures.items():
+			try:
+				result = future.result()
+			except Exception as e:
+				logger.warning("일괄 경로 추천 항목 %s 실패: %s", index, e)
+				results[index] = {'index': index, 'status': 'error', 'message': _error_message(e)}
+				continue
+			results[index] = {
+				'index': index,
+				'status': 'success',
+				'route_id': result.route.route_id,
+				'engine': result.route.engine,
+				'actual_distance': result.route.actual_distance,
+				'cached': result.cached,
+				'route_path': result.route_path,
+			}
+
+	return results
@@ -0,0 +1,288 @@
+import logging
+import math
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+import numpy as np
+
+from .geometry import LocalProjection, RouteValidationError, cheapest_insertion, fit_route_to_distance, path_length_km
+from .llm import CircuitOpenError, InvalidModelOutput
+from .services import RouteGenerationTimeout, RouteRecommendationService
+
+logger = logging.getLogger(__name__)
+
+# 이 오류로 실패하면 대체 엔진(ROUTE_ENGINE_FALLBACK)으로 다시 생성
+FALLBACK_ERRORS = (RouteGenerationTimeout, CircuitOpenError, InvalidModelOutput, RouteValidationError)
+
+class RouteEngine(ABC):
+	"""
+	경로 생성 엔진 인터페이스
+	시작 좌표, 목표 거리(km), 크루 타입, (선택) 경유할 제휴 가게 목록(순서대로)을 받아 route_path를 반환합니다.
+	"""
+	name = ''
+
+	def __init__(self, service: Optional[RouteRecommendationService] = None):
+		self._service = service
+
+	@abstractmethod
+	def generate(
+		self,
+		start_location: str,
+		start_lat: float,
+		start_lng: float,
+		target_distance: float,
+		crew_type: str = 'running',
+		waypoints: Optional[List[Dict[str, Any]]] = None,
+	) -> List[Dict[str, Any]]:
+		raise NotImplementedError
+
+class GeminiRouteEngine(RouteEngine):
+	"""
+	Gemini 기반 경로 추천 (기존 RouteRecommendationService.recommend_route)
+	"""
+	name = 'gemini'
+
+	@property
+	def service(self) -> RouteRecommendationService:
+		if self._service is None:
+			self._service = RouteRecommendationService()
+		return self._service
+
+	def generate(self, start_location, start_lat, start_lng, target_distance, crew_type='running', waypoints=None):
+		return self.service.recommend_route(
+			start_location=start_location,
+			target_distance=target_distance,
+			crew_type=crew_type,
+			waypoints=waypoints,
+			start_coords=(start_lat, start_lng),
+		)
+
+class LoopRouteEngine(RouteEngine):
+	"""
+	네트워크 호출 없이 시작점에서 출발해 돌아오는 원형 경로를 기하학적으로 생성합니다.
+	- 경유지가 없으면 시작점을 지나는 원, 1곳이면 시작점과 경유지를 모두 지나는 원을 사용
+	- 경유지가 여러 곳이면 시작점을 지나는 원에 우회 거리가 가장 작은 위치부터 경유지를 끼워 넣음
+	- 원의 반지름을 이분 탐색으로 조정해 haversine 총 길이를 목표 거리 허용 오차 안으로 맞춤
+	- 같은 입력에는 항상 같은 경로를 반환 (방향은 시작 좌표/크루 타입으로 결정)
+	"""
+	name = 'loop'
+
+	# 크루 타입별 지점 간격 (km)
+	POINT_SPACING_KM = {
+		'running': 0.2,
+		'hiking': 0.15,
+		'riding': 0.5,
+	}
+	MIN_POINTS = 8
+	MAX_POINTS = 240
+	MAX_ITERATIONS = 60
+
+	def __init__(self, service: Optional[RouteRecommendationService] = None, tolerance: Optional[float] = None):
+		super().__init__(service)
+		self.tolerance = tolerance if tolerance is not None else getattr(settings, 'ROUTE_LOOP_TOLERANCE', 0.02)
+
+	def generate(self, start_location, start_lat, start_lng, target_distance, crew_type='running', waypoints=None):
+		if target_distance <= 0:
+			raise ValueError("목표 거리는 0보다 커야 합니다.")
+
+		projection = LocalProjection(start_lat, start_lng)
+		seed = zlib.crc32(f"{start_lat:.5f},{start_lng:.5f},{crew_type}".encode())
+		spacing = self.POINT_SPACING_KM.get(crew_type, self.POINT_SPACING_KM['running'])
+		n = max(self.MIN_POINTS, min(self.MAX_POINTS, int(round(target_distance / spacing))))
+
+		# 시작점과 사실상 같은 위치의 경유지는 제외
+		waypoints = [
+			waypoint for waypoint in (waypoints or [])
+			if math.hypot(*projection.to_xy(float(waypoint['lat']), float(waypoint['lng']))) >= 1.0
+		]
+		heading = math.radians(seed % 360)
+		if not waypoints:
+			build = lambda radius: self._circle(n, radius, heading)
+			min_radius = 0.0
+		elif len(waypoints) == 1:
+			waypoint_xy = projection.to_xy(float(waypoints[0]['lat']), float(waypoints[0]['lng']))
+			side = 1 if seed & 1 else -1
+			build = lambda radius: self._circle_through(n, radius, waypoint_xy, side)
+			min_radius = math.hypot(*waypoint_xy) / 2
+		else:
+			stops_xy = np.array([projection.to_xy(float(w['lat']), float(w['lng'])) for w in waypoints])
+			build = lambda radius: [tuple(xy) for xy in cheapest_insertion(self._circle(n, radius, heading), stops_xy)[0]]
+			min_radius = 0.0
+
+		def length_of(radius: float) -> Tuple[float, List[Tuple[float, float]]]:
+			points = [projection.to_latlng(x, y) for x, y in build(radius)]
+			return self._length_km(points), points
+
+		radius = self._solve_radius(length_of, min_radius, target_distance)
+		_, points = length_of(radius)
+		return self._to_route_path(points, start_location, start_lat, start_lng, waypoints)
+
+	def _solve_radius(self, length_of: Callable, min_radius: float, target_km: float) -> float:
+		"""
+		총 길이가 목표 거리 허용 오차 안에 들어오는 반지름(m)을 이분 탐색으로 찾습니다.
+		경유지가 너무 멀어 목표 거리를 맞출 수 없으면 가능한 가장 짧은 원을 사용합니다.
+		"""
+		lo = min_radius
+		low_length, _ = length_of(lo)
+		if lo > 0 and low_length >= target_km:
+			return lo
+
+		hi = max(lo * 2, target_km * 1000 / math.pi)
+		while length_of(hi)[0] < target_km:
+			hi *= 2
+
+		radius = hi
+		for _ in range(self.MAX_ITERATIONS):
+			radius = (lo + hi) / 2
+			length, _ = length_of(radius)
+			if abs(length - target_km) <= self.tolerance * target_km / 4:
+				break
+			if length < target_km:
+				lo = radius
+			else:
+				hi = radius
+		return radius
+
+	@staticmethod
+	def _circle(n: int, radius: float, heading: float) -> List[Tuple[float, float]]:
+		"""
+		시작점(원점)을 지나고, 중심이 heading 방향에 있는 원 위의 n각형 (닫힌 경로)
+		"""
+		cx, cy = radius * math.sin(heading), radius * math.cos(heading)
+		start_angle = math.atan2(-cy, -cx)
+		points = [(0.0, 0.0)]
+		for k in range(1, n):
+			angle = start_angle + 2 * math.pi * k / n
+			points.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+		points.append((0.0, 0.0))
+		return points
+
+	@staticmethod
+	def _circle_through(n: int, radius: float, waypoint_xy: Tuple[float, float], side: int) -> List[Tuple[float, float]]:
+		"""
+		시작점(원점)과 경유지를 모두 지나는 원 위의 n각형 (경유지는 정확히 꼭짓점으로 포함)
+		"""
+		wx, wy = waypoint_xy
+		d = math.hypot(wx, wy)
+		h = math.sqrt(max(radius * radius - d * d / 4, 0.0))
+		cx = wx / 2 - side * h * wy / d
+		cy = wy / 2 + side * h * wx / d
+
+		start_angle = math.atan2(-cy, -cx)
+		waypoint_angle = math.atan2(wy - cy, wx - cx)
+		first_arc = (waypoint_angle - start_angle) % (2 * math.pi)
+		first_count = max(1, min(n - 1, int(round(n * first_arc / (2 * math.pi)))))
+		second_arc = 2 * math.pi - first_arc
+		second_count = n - first_count
+
+		points = [(0.0, 0.0)]
+		for k in range(1, first_count):
+			angle = start_angle + first_arc * k / first_count
+			points.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+		points.append((wx, wy))
+		for k in range(1, second_count):
+			angle = waypoint_angle + second_arc * k / second_count
+			points.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+		points.append((0.0, 0.0))
+		return points
+
+	@staticmethod
+	def _length_km(points: List[Tuple[float, float]]) -> float:
+		return path_length_km({'lat': lat, 'lng': lng} for lat, lng in points)
+
+	@staticmethod
+	def _to_route_path(points, start_location, start_lat, start_lng, waypoints) -> List[Dict[str, Any]]:
+		route_path = []
+		last = len(points) - 1
+		for i, (lat, lng) in enumerate(points):
+			if i == 0 or i == last:
+				route_path.append({'lat': start_lat, 'lng': start_lng, 'name': start_location, 'is_partner': False})
+			else:
+				route_path.append({'lat': round(lat, 6), 'lng': round(lng, 6), 'name': '', 'is_partner': False})
+
+		# 경유지는 정확한 좌표로 꼭짓점에 들어가 있으므로 가장 가까운 꼭짓점을 교체
+		used = set()
+		for waypoint in waypoints or []:
+			w_lat, w_lng = float(waypoint['lat']), float(waypoint['lng'])
+			index = min(
+				(i for i in range(1, last) if i not in used),
+				key=lambda i: (route_path[i]['lat'] - w_lat) ** 2 + (route_path[i]['lng'] - w_lng) ** 2,
+				default=None,
+			)
+			if index is None:
+				break
+			used.add(index)
+			route_path[index] = {
+				'lat': w_lat,
+				'lng': w_lng,
+				'name': waypoint.get('name', '제휴 가게'),
+				'is_partner': True,
+			}
+		return route_path
+
+# 요청/설정에서 선택 가능한 엔진
+ROUTE_ENGINES = {
+	GeminiRouteEngine.name: GeminiRouteEngine,
+	LoopRouteEngine.name: LoopRouteEngine,
+}
+
+def get_route_engine(name: str, service: Optional[RouteRecommendationService] = None) -> RouteEngine:
+	engine_cls = ROUTE_ENGINES.get(name)
+	if engine_cls is None:
+		raise ValueError(f"지원하지 않는 경로 엔진입니다: {name}")
+	return engine_cls(service=service)
+
+def fit_generated_route(
+	route_path: List[Dict[str, Any]],
+	start_coords: Tuple[float, float],
+	target_distance: float,
+) -> Tuple[List[Dict[str, Any]], float]:
+	"""
+	생성된 경로의 실제 길이를 측정하고 목표 거리에 맞게 보정합니다. (보정 불가하면 RouteValidationError)
+	"""
+	start_lat, start_lng = start_coords
+	return fit_route_to_distance(
+		route_path,
+		start_lat,
+		start_lng,
+		target_distance,
+		tolerance=getattr(settings, 'ROUTE_DISTANCE_TOLERANCE', 0.1),
+		reject_ratio=getattr(settings, 'ROUTE_DISTANCE_REJECT_RATIO', 4.0),
+	)
+
+def _generate_fitted(engine_name, service, start_location, start_coords, target_distance, crew_type, waypoints):
+	start_lat, start_lng = start_coords
+	route_path = get_route_engine(engine_name, service).generate(
+		start_location, start_lat, start_lng, target_distance, crew_type, waypoints,
+	)
+	return fit_generated_route(route_path, start_coords, target_distance)
+
+def generate_route(
+	start_location: str,
+	start_coords: Tuple[float, float],
+	target_distance: float,
+	crew_type: str = 'running',
+	waypoints: Optional[List[Dict[str, Any]]] = None,
+	engine: Optional[str] = None,
+	service: Optional[RouteRecommendationService] = None,
+) -> Tuple[List[Dict[str, Any]], str, float]:
+	"""
+	선택한 엔진(기본값: ROUTE_ENGINE_DEFAULT)으로 경로를 생성하고 거리 검증/보정을 거칩니다.
+	Gemini가 시간 초과/차단되거나 재요청 후에도 형식이 잘못된/보정할 수 없는 경로를 반환하면 다시 요청하지 않고 ROUTE_ENGINE_FALLBACK 엔진으로 대체합니다.
+	반환값: (route_path, 실제 사용된 엔진 이름, 실제 길이 km)
+	"""
+	engine_name = engine or getattr(settings, 'ROUTE_ENGINE_DEFAULT', GeminiRouteEngine.name)
+	args = (start_location, start_coords, target_distance, crew_type, waypoints)
+	try:
+		route_path, actual_distance = _generate_fitted(engine_name, service, *args)
+		return route_path, engine_name, actual_distance
+	except FALLBACK_ERRORS as e:
+		fallback = getattr(settings, 'ROUTE_ENGINE_FALLBACK', LoopRouteEngine.name)
+		if not fallback or fallback == engine_name:
+			raise
+		logger.warning("%s 엔진 실패(%s), %s 엔진으로 대체합니다.", engine_name, e, fallback)
+		route_path, actual_distance = _generate_fitted(fallback, service, *args)
+		return route_path, fallback, actual_distance
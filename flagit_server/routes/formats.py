@@ -0,0 +1,135 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .geometry import route_to_array
+
+# route_path 출력 형식
+PATH_FORMAT_DEFAULT = 'json'
+PATH_FORMAT_POLYLINE = 'polyline'
+PATH_FORMAT_GEOJSON = 'geojson'
+
+def encode_polyline(coords: np.ndarray, precision: int = 5) -> str:
+	"""
+	(n, 2) [lat, lng] 배열 -> Google encoded polyline 문자열
+	좌표를 정수로 반올림한 뒤의 차분은 한 번에 계산하고, 5비트 단위 인코딩만 반복합니다.
+	"""
+	if len(coords) == 0:
+		return ''
+	scaled = np.round(np.asarray(coords, dtype=float) * (10 ** precision)).astype(np.int64)
+	deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+	# 부호 비트를 최하위로 옮김 (zigzag)
+	values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+
+	out = []
+	append = out.append
+	for value in values:
+		while value >= 0x20:
+			append(chr((0x20 | (value & 0x1f)) + 63))
+			value >>= 5
+		append(chr(value + 63))
+	return ''.join(out)
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+	"""
+	Google encoded polyline 문자열 -> [[lat, lng], ...]
+	"""
+	values = []
+	value = shift = 0
+	for char in encoded:
+		byte = ord(char) - 63
+		value |= (byte & 0x1f) << shift
+		shift += 5
+		if byte < 0x20:
+			values.append(~(value >> 1) if value & 1 else value >> 1)
+			value = shift = 0
+
+	factor = 10 ** precision
+	coords = np.cumsum(np.array(values, dtype=np.int64).reshape(-1, 2), axis=0) / factor
+	return coords.tolist()
+
+def sparse_points(route_path: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""
+	이름이 있거나 제휴 가게인 지점만 (index는 route_path에서의 위치)
+	"""
+	return [
+		{
+			'index': index,
+			'lat': point['lat'],
+			'lng': point['lng'],
+			'name': point.get('name', ''),
+			'is_partner': bool(point.get('is_partner')),
+		}
+		for index, point in enumerate(route_path)
+		if point.get('name') or point.get('is_partner')
+	]
+
+def route_path_to_geojson(route_path: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+	"""
+	route_path -> GeoJSON Feature (LineString, 좌표 순서는 [lng, lat])
+	"""
+	return {
+		'type': 'Feature',
+		'geometry': {
+			'type': 'LineString',
+			'coordinates': [[point['lng'], point['lat']] for point in route_path],
+		},
+		'properties': {'points': sparse_points(route_path)},
+	}
+
+def format_route_path(route_path: Sequence[Dict[str, Any]], path_format: str) -> Dict[str, Any]:
+	"""
+	응답 data에 들어갈 경로 필드
+	- json: {'route_path': [...]} (기존 형식)
+	- polyline: {'route_polyline': '...', 'route_points': [이름/제휴 가게 지점]}
+	- geojson: {'route_geojson': Feature(LineString)}
+	"""
+	if path_format == PATH_FORMAT_POLYLINE:
+		return {
+			'route_polyline': encode_polyline(route_to_array(route_path)),
+			'route_points': sparse_points(route_path),
+		}
+	if path_format == PATH_FORMAT_GEOJSON:
+		return {'route_geojson': route_path_to_geojson(route_path)}
+	return {'route_path': list(route_path)}
+
+class PolylineRenderer(JSONRenderer):
+	"""
+	Accept: application/vnd.flagit.polyline+json 또는 ?format=polyline
+	"""
+	media_type = 'application/vnd.flagit.polyline+json'
+	format = PATH_FORMAT_POLYLINE
+
+class GeoJSONRenderer(JSONRenderer):
+	"""
+	Accept: application/geo+json 또는 ?format=geojson
+	"""
+	media_type = 'application/geo+json'
+	format = PATH_FORMAT_GEOJSON
+
+class RoutePathFormatMixin:
+	"""
+	경로 응답의 route_path 형식을 Accept 헤더(또는 ?format=)로 선택하는 APIView 믹스인
+	기본 JSON 응답은 기존과 같습니다.
+	"""
+	renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [PolylineRenderer, GeoJSONRenderer]
+
+	def path_format(self, request) -> str:
+		renderer = getattr(request, 'accepted_renderer', None)
+		return getattr(renderer, 'format', PATH_FORMAT_DEFAULT) if renderer else PATH_FORMAT_DEFAULT
+
+	def with_path(self, request, data: Dict[str, Any], route_path: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+		"""
+		data의 route_path를 요청한 형식으로 바꿉니다.
+		"""
+		data = {key: value for key, value in data.items() if key != 'route_path'}
+		data.update(format_route_path(route_path, self.path_format(request)))
+		return data
+
+	def finalize_response(self, request, response, *args, **kwargs):
+		response = super().finalize_response(request, response, *args, **kwargs)
+		patch_vary_headers(response, ('Accept',))
+		return response
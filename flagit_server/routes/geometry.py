@@ -0,0 +1,205 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 평균 지구 반경 (m)
+EARTH_RADIUS_M = 6371008.8
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+	"""
+	두 좌표 사이의 대원 거리(km)
+	"""
+	p1 = math.radians(lat1)
+	p2 = math.radians(lat2)
+	dp = p2 - p1
+	dl = math.radians(lng2 - lng1)
+	a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+	return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a))) / 1000
+
+def route_to_array(route_path: Iterable[Dict[str, Any]]) -> np.ndarray:
+	"""
+	route_path([{lat, lng, ...}, ...]) -> (n, 2) float 배열 [lat, lng]
+	"""
+	coords = np.array([(point['lat'], point['lng']) for point in route_path], dtype=float)
+	return coords.reshape(-1, 2)
+
+def segment_lengths_km(coords: np.ndarray) -> np.ndarray:
+	"""
+	(n, 2) [lat, lng] 배열의 구간별 haversine 거리(km)를 한 번에 계산합니다. 반환 길이는 n - 1
+	"""
+	if len(coords) < 2:
+		return np.zeros(0)
+	rad = np.radians(coords)
+	lat = rad[:, 0]
+	dlat = np.diff(lat)
+	dlng = np.diff(rad[:, 1])
+	a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlng / 2) ** 2
+	return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) / 1000
+
+def path_length_km(route_path: Iterable[Dict[str, Any]]) -> float:
+	"""
+	route_path([{lat, lng, ...}, ...])의 총 길이(km)
+	"""
+	return float(segment_lengths_km(route_to_array(route_path)).sum())
+
+def bbox_around(lat: float, lng: float, meters: float) -> Tuple[float, float, float, float]:
+	"""
+	지점을 중심으로 반경 meters를 모두 포함하는 (min_lng, min_lat, max_lng, max_lat)
+	"""
+	dlat = math.degrees(meters / EARTH_RADIUS_M)
+	# 위도가 높은 쪽 경계 기준으로 경도 폭을 잡아야 반경을 빠짐없이 포함
+	cos_lat = max(math.cos(math.radians(min(90.0, abs(lat) + dlat))), 1e-6)
+	dlng = min(180.0, dlat / cos_lat)
+	return (
+		max(-180.0, lng - dlng),
+		max(-90.0, lat - dlat),
+		min(180.0, lng + dlng),
+		min(90.0, lat + dlat),
+	)
+
+class LocalProjection:
+	"""
+	기준점 주변을 평면(m)으로 근사하는 등거리 원통 투영 (수 km 범위의 경로 생성용)
+	"""
+
+	def __init__(self, lat0: float, lng0: float):
+		self.lat0 = lat0
+		self.lng0 = lng0
+		self.ky = EARTH_RADIUS_M * math.pi / 180
+		self.kx = self.ky * math.cos(math.radians(lat0))
+
+	def to_xy(self, lat: float, lng: float) -> Tuple[float, float]:
+		return (lng - self.lng0) * self.kx, (lat - self.lat0) * self.ky
+
+	def to_latlng(self, x: float, y: float) -> Tuple[float, float]:
+		return self.lat0 + y / self.ky, self.lng0 + x / self.kx
+
+class RouteValidationError(ValueError):
+	"""
+	생성된 경로가 목표 거리와 너무 다르거나 좌표가 올바르지 않아 보정할 수 없는 경우
+	"""
+
+def fit_route_to_distance(
+	route_path: Sequence[Dict[str, Any]],
+	start_lat: float,
+	start_lng: float,
+	target_km: float,
+	tolerance: float = 0.1,
+	reject_ratio: float = 4.0,
+	max_iterations: int = 8,
+) -> Tuple[List[Dict[str, Any]], float]:
+	"""
+	경로 길이를 벡터 연산으로 측정하고, 목표 거리 허용 오차를 벗어나면 시작점을 기준으로 축척을 조정합니다.
+	- 시작점에서 시작해 시작점으로 끝나도록 닫고, 시작점 이후 다시 시작점에 도달하면 그 뒤는 잘라냅니다
+	- 제휴 가게(is_partner) 지점은 위치를 유지하고 나머지 지점만 축척 조정
+	- 실제 길이가 목표의 1/reject_ratio 미만이거나 reject_ratio배 초과면 RouteValidationError
+	반환값: (보정된 route_path, 실제 길이 km)
+	"""
+	points = [dict(point) for point in route_path]
+	if len(points) < 2:
+		raise RouteValidationError("경로 지점이 부족합니다.")
+
+	coords = route_to_array(points)
+	if not np.isfinite(coords).all() or (np.abs(coords[:, 0]) > 90).any() or (np.abs(coords[:, 1]) > 180).any():
+		raise RouteValidationError("경로에 올바르지 않은 좌표가 있습니다.")
+
+	# 시작점과 10m 이내면 같은 지점으로 간주
+	start = np.array([start_lat, start_lng])
+	projection = LocalProjection(start_lat, start_lng)
+	scale = np.array([projection.ky, projection.kx])
+	offsets = (coords - start) * scale
+	at_start = np.hypot(offsets[:, 0], offsets[:, 1]) <= 10.0
+
+	# 경로 중간에 시작점으로 돌아온 경우 그 이후는 잘라냄
+	returns = np.flatnonzero(at_start[1:]) + 1
+	if len(returns) and returns[0] < len(points) - 1 and returns[0] > 1:
+		points = points[:returns[0] + 1]
+		coords = coords[:returns[0] + 1]
+		offsets = offsets[:returns[0] + 1]
+
+	start_point = {'lat': start_lat, 'lng': start_lng, 'name': points[0].get('name', ''), 'is_partner': False}
+	if not at_start[0]:
+		points.insert(0, dict(start_point))
+		coords = np.vstack([start, coords])
+		offsets = np.vstack([[0.0, 0.0], offsets])
+	if np.hypot(*offsets[-1]) > 10.0:
+		points.append(dict(start_point))
+		coords = np.vstack([coords, start])
+		offsets = np.vstack([offsets, [0.0, 0.0]])
+
+	actual = float(segment_lengths_km(coords).sum())
+	if actual <= 0 or not (target_km / reject_ratio <= actual <= target_km * reject_ratio):
+		raise RouteValidationError(f"생성된 경로 길이({actual:.2f}km)가 목표 거리({target_km}km)와 너무 다릅니다.")
+
+	if abs(actual - target_km) <= tolerance * target_km:
+		return points, round(actual, 3)
+
+	fixed = np.array([bool(point.get('is_partner')) for point in points])
+	fixed[0] = fixed[-1] = True
+
+	def scaled(factor: float) -> np.ndarray:
+		result = offsets.copy()
+		result[~fixed] *= factor
+		return start + result / scale
+
+	# 축척 계수에 대한 할선법 (길이는 계수에 대해 거의 선형)
+	prev_factor, prev_length = 1.0, actual
+	factor = target_km / actual
+	best_coords, best_length = coords, actual
+	for _ in range(max_iterations):
+		candidate = scaled(factor)
+		length = float(segment_lengths_km(candidate).sum())
+		if abs(length - target_km) < abs(best_length - target_km):
+			best_coords, best_length = candidate, length
+		if abs(length - target_km) <= tolerance * target_km / 4 or length == prev_length:
+			break
+		prev_factor, prev_length, factor = factor, length, max(
+			0.05, factor + (target_km - length) * (factor - prev_factor) / (length - prev_length)
+		)
+
+	rounded = np.round(best_coords, 6)
+	for point, (lat, lng), is_fixed in zip(points, rounded.tolist(), fixed):
+		if not is_fixed:
+			point['lat'], point['lng'] = lat, lng
+	return points, round(best_length, 3)
+
+def cheapest_insertion(
+	loop_xy: np.ndarray,
+	stops_xy: np.ndarray,
+	max_stops: Optional[int] = None,
+	max_detour: float = math.inf,
+) -> Tuple[np.ndarray, List[Tuple[int, float]]]:
+	"""
+	닫힌 경로(loop_xy, 평면 좌표 m)에 경유지 후보를 우회 거리가 가장 작은 것부터 하나씩 끼워 넣습니다.
+	- 우회 거리: 구간 (a, b)에 s를 넣을 때 |as| + |sb| - |ab| (후보 x 구간을 한 번에 계산)
+	- 우회 거리가 max_detour(m)를 넘는 후보는 넣지 않음
+	반환값: (경유지가 들어간 경로, 경로 순서대로 [(후보 번호, 우회 거리 m)])
+	"""
+	loop = np.asarray(loop_xy, dtype=float).reshape(-1, 2)
+	stops = np.asarray(stops_xy, dtype=float).reshape(-1, 2)
+	remaining = np.ones(len(stops), dtype=bool)
+	limit = len(stops) if max_stops is None else min(max_stops, len(stops))
+	inserted: List[Tuple[int, int, float]] = []  # (경로상 위치, 후보 번호, 우회 거리)
+
+	while len(inserted) < limit and remaining.any():
+		a, b = loop[:-1], loop[1:]
+		segment = np.hypot(b[:, 0] - a[:, 0], b[:, 1] - a[:, 1])
+		indices = np.flatnonzero(remaining)
+		candidates = stops[indices]
+		to_a = np.hypot(candidates[:, None, 0] - a[None, :, 0], candidates[:, None, 1] - a[None, :, 1])
+		to_b = np.hypot(candidates[:, None, 0] - b[None, :, 0], candidates[:, None, 1] - b[None, :, 1])
+		cost = to_a + to_b - segment[None, :]
+
+		k, s = divmod(int(cost.argmin()), cost.shape[1])
+		detour = float(cost[k, s])
+		if detour > max_detour:
+			break
+		stop = int(indices[k])
+		loop = np.insert(loop, s + 1, stops[stop], axis=0)
+		remaining[stop] = False
+		inserted = [(pos + 1 if pos >= s + 1 else pos, i, d) for pos, i, d in inserted]
+		inserted.append((s + 1, stop, detour))
+
+	inserted.sort()
+	return loop, [(i, d) for _, i, d in inserted]
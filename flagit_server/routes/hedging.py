@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, NamedTuple, Optional
+
+from django.conf import settings
+
+from .llm import CircuitOpenError, InvalidModelOutput, RouteGenerationTimeout
+from .metrics import LatencyRecorder, route_counters, route_metrics
+
+logger = logging.getLogger(__name__)
+
+class HedgePolicy(NamedTuple):
+	"""
+	Gemini 호출 꼬리 지연 정책
+	- hedge_after: 첫 요청이 이 시간(초)을 넘기면 같은 요청을 한 번 더 보냄 (None이면 보내지 않음)
+	- hedge_percentile: 최근 성공 호출 지연 시간의 이 백분위를 hedge_after 대신 사용 (표본이 min_samples개 이상일 때)
+	- max_attempts: 추가 요청/재시도를 포함한 최대 호출 수
+	- deadline: 전체 제한 시간(초)
+	"""
+	hedge_after: Optional[float] = 4.0
+	hedge_percentile: float = 90
+	min_samples: int = 20
+	max_attempts: int = 3
+	deadline: float = 20.0
+
+	@classmethod
+	def from_settings(cls) -> 'HedgePolicy':
+		enabled = getattr(settings, 'ROUTE_HEDGE_ENABLED', True)
+		return cls(
+			hedge_after=getattr(settings, 'ROUTE_HEDGE_AFTER_SECONDS', 4.0) if enabled else None,
+			hedge_percentile=getattr(settings, 'ROUTE_HEDGE_PERCENTILE', 90),
+			min_samples=getattr(settings, 'ROUTE_HEDGE_MIN_SAMPLES', 20),
+			max_attempts=max(1, getattr(settings, 'ROUTE_LLM_MAX_ATTEMPTS', 3)),
+			deadline=getattr(settings, 'ROUTE_LLM_DEADLINE_SECONDS', 20.0),
+		)
+
+	def hedge_budget(self, recorder: LatencyRecorder, stage: str) -> Optional[float]:
+		if self.hedge_after is None:
+			return None
+		observed = recorder.percentile(stage, self.hedge_percentile, self.min_samples)
+		return observed if observed is not None else self.hedge_after
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+	"""
+	추가 요청을 보내는 프로세스 단위 스레드 풀
+	(버려진 느린 요청은 각자의 호출 제한 시간이 지나면 끝나므로 여유 있게 잡음)
+	"""
+	global _executor
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(
+					max_workers=getattr(settings, 'ROUTE_HEDGE_WORKERS', 16),
+					thread_name_prefix='route-hedge',
+				)
+	return _executor
+
+def call_with_hedging(
+	attempt: Callable[[float], Any],
+	policy: Optional[HedgePolicy] = None,
+	stage: str = 'gemini_route',
+	recorder: Optional[LatencyRecorder] = None,
+) -> Any:
+	"""
+	attempt(남은 시간 초)를 정책에 따라 여러 번 호출하고, 먼저 도착한 올바른 결과를 반환합니다.
+	- 요청이 hedge 기준 시간(요청을 보낸 시각부터)을 넘기면 같은 요청을 한 번 더 보내고, 먼저 성공한 쪽을 사용
+	- InvalidModelOutput(형식 오류)/RouteGenerationTimeout(개별 호출 시간 초과)은 max_attempts까지 다시 요청
+	- 전체 제한 시간(deadline)이 지나면 RouteGenerationTimeout
+	- CircuitOpenError 등 그 외 오류는 진행 중인 다른 요청이 없으면 바로 전달
+	성공한 호출의 지연 시간은 recorder의 stage에 기록되어 다음 hedge 기준 시간 계산에 쓰입니다.
+	"""
+	policy = policy or HedgePolicy.from_settings()
+	recorder = recorder or route_metrics
+	executor = _get_executor()
+
+	started = time.monotonic()
+	deadline = started + policy.deadline
+	pending = {}
+	attempts = 0
+	last_error: Optional[BaseException] = None
+
+	budget = policy.hedge_budget(recorder, stage)
+	hedge_at = None
+
+	def launch():
+		# hedge 기준 시간은 마지막으로 보낸 요청부터 (재요청도 다시 budget만큼 기다린 뒤 추가 요청)
+		nonlocal attempts, hedge_at
+		attempts += 1
+		launched_at = time.monotonic()
+		pending[executor.submit(attempt, max(0.1, deadline - launched_at))] = launched_at
+		hedge_at = launched_at + budget if budget is not None else None
+
+	launch()
+
+	while pending:
+		now = time.monotonic()
+		if now >= deadline:
+			break
+		wait_for = deadline - now
+		if hedge_at is not None and attempts < policy.max_attempts:
+			wait_for = min(wait_for, max(0.0, hedge_at - now))
+
+		done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+		if not done:
+			if hedge_at is not None and attempts < policy.max_attempts and time.monotonic() >= hedge_at:
+				route_counters.incr(f'{stage}_hedged')
+				launch()
+				# 추가 요청에는 다시 추가 요청을 보내지 않음
+				hedge_at = None
+			continue
+
+		for future in done:
+			launched_at = pending.pop(future)
+			try:
+				result = future.result()
+			except (InvalidModelOutput, RouteGenerationTimeout) as e:
+				last_error = e
+				route_counters.incr(f'{stage}_retried' if isinstance(e, InvalidModelOutput) else f'{stage}_timeouts')
+				if attempts < policy.max_attempts and time.monotonic() < deadline:
+					logger.info("Gemini 응답 재요청 (%s/%s): %s", attempts + 1, policy.max_attempts, e)
+					launch()
+			except CircuitOpenError:
+				raise
+			except Exception as e:
+				last_error = e
+			else:
+				recorder.observe(stage, time.monotonic() - launched_at)
+				if attempts > 1:
+					route_counters.incr(f'{stage}_recovered')
+				return result
+
+	if last_error is not None and not isinstance(last_error, (InvalidModelOutput, RouteGenerationTimeout)):
+		raise last_error
+	if time.monotonic() >= deadline:
+		route_counters.incr(f'{stage}_deadline_exceeded')
+		raise RouteGenerationTimeout(f"경로 추천 제한 시간({policy.deadline}초)을 초과했습니다.")
+	raise last_error
@@ -0,0 +1,93 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import RouteJob
+from .pipeline import recommend_and_save_route
+
+logger = logging.getLogger(__name__)
+
+class ThreadPoolJobBackend:
+	"""
+	프로세스 내 스레드 풀에서 작업을 실행합니다. (기본 백엔드)
+	"""
+
+	def __init__(self, max_workers: int = None):
+		max_workers = max_workers or getattr(settings, 'ROUTE_JOB_WORKERS', 4)
+		self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='route-job')
+
+	def submit(self, func: Callable, *args):
+		return self.executor.submit(func, *args)
+
+class ImmediateJobBackend:
+	"""
+	요청 스레드에서 바로 실행합니다. (테스트용)
+	"""
+
+	def submit(self, func: Callable, *args):
+		return func(*args)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_job_backend():
+	"""
+	settings.ROUTE_JOB_BACKEND에 지정된 백엔드를 프로세스당 한 번만 생성합니다.
+	"""
+	global _backend
+	if _backend is None:
+		with _backend_lock:
+			if _backend is None:
+				backend_path = getattr(settings, 'ROUTE_JOB_BACKEND', 'routes.jobs.ThreadPoolJobBackend')
+				_backend = import_string(backend_path)()
+	return _backend
+
+def run_route_job(job_id):
+	"""
+	작업 하나를 실행합니다: 경로 추천 파이프라인 실행 후 결과(Route) 또는 오류를 기록
+	"""
+	close_old_connections()
+	try:
+		updated = RouteJob.objects.filter(job_id=job_id, status='pending').update(status='running', updated_at=timezone.now())
+		if not updated:
+			return
+
+		job = RouteJob.objects.select_related('crew_member__crew').get(job_id=job_id)
+		try:
+			result = recommend_and_save_route(
+				crew_member=job.crew_member,
+				start_location=job.start_location,
+				target_distance=job.target_distance,
+				engine=job.engine or None,
+				max_stops=job.max_stops,
+			)
+		except Exception as e:
+			logger.exception("경로 추천 작업 실패: %s", job_id)
+			RouteJob.objects.filter(job_id=job_id).update(status='failed', error=str(e), updated_at=timezone.now())
+			return
+
+		RouteJob.objects.filter(job_id=job_id).update(status='succeeded', route=result.route, updated_at=timezone.now())
+	finally:
+		# 워커 스레드에서 연 DB 연결은 직접 정리
+		if not isinstance(get_job_backend(), ImmediateJobBackend):
+			connection.close()
+
+def enqueue_route_job(crew_member, start_location: str, target_distance: float, engine: str = None, max_stops: int = None) -> RouteJob:
+	"""
+	작업을 생성하고 커밋 이후 백그라운드 워커에 등록합니다.
+	"""
+	job = RouteJob.objects.create(
+		crew_member=crew_member,
+		start_location=start_location,
+		target_distance=target_distance,
+		engine=engine or '',
+		max_stops=max_stops,
+	)
+	transaction.on_commit(lambda: get_job_backend().submit(run_route_job, job.job_id))
+	return job
@@ -0,0 +1,342 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+class RouteGenerationTimeout(ValueError):
+	"""
+	Gemini 호출이 제한 시간(GEMINI_REQUEST_TIMEOUT) 안에 끝나지 않은 경우
+	"""
+
+class CircuitOpenError(ValueError):
+	"""
+	최근 Gemini 호출 실패가 누적되어 회로 차단기가 열린 상태 (호출하지 않고 즉시 실패)
+	"""
+
+class InvalidModelOutput(ValueError):
+	"""
+	Gemini 응답이 JSON이 아니거나 요구한 형식(스키마)과 다른 경우 (다시 요청하면 성공할 수 있음)
+	"""
+
+class CircuitBreaker:
+	"""
+	연속 실패가 failure_threshold회에 도달하면 reset_timeout초 동안 호출을 차단합니다.
+	차단 시간이 지나면 한 번의 시험 호출(half-open)을 허용하고, 성공하면 다시 닫습니다.
+	"""
+	CLOSED = 'closed'
+	OPEN = 'open'
+	HALF_OPEN = 'half_open'
+
+	def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.state = self.CLOSED
+		self.failures = 0
+		self.opened_at = 0.0
+		self.rejected = 0
+		self._trial_in_flight = False
+		self._lock = threading.Lock()
+
+	def before_call(self):
+		with self._lock:
+			if self.state == self.CLOSED:
+				return
+			if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+				self.state = self.HALF_OPEN
+				self._trial_in_flight = False
+			if self.state == self.HALF_OPEN and not self._trial_in_flight:
+				self._trial_in_flight = True
+				return
+			self.rejected += 1
+		raise CircuitOpenError("Gemini 호출이 일시적으로 차단되었습니다. (연속 실패)")
+
+	def cancel_trial(self):
+		# 시험 호출이 실제로 나가지 못한 경우 (대기열 시간 초과 등)
+		with self._lock:
+			self._trial_in_flight = False
+
+	def record_success(self):
+		with self._lock:
+			self.state = self.CLOSED
+			self.failures = 0
+			self._trial_in_flight = False
+
+	def record_failure(self):
+		with self._lock:
+			self.failures += 1
+			if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+				self.state = self.OPEN
+				self.opened_at = time.monotonic()
+			self._trial_in_flight = False
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {'state': self.state, 'failures': self.failures, 'rejected': self.rejected}
+
+class FakeResponse:
+	def __init__(self, text: str):
+		self.text = text
+
+class FakeGenerativeModel:
+	"""
+	테스트/벤치마크용 로컬 모델 (네트워크 호출 없음)
+	- 위치 변환: 위치 이름으로부터 서울 근처의 결정적인 좌표를 반환
+	- 경로 추천: 프롬프트의 시작 좌표/목표 거리로 로컬 원형 경로를 반환
+	responses를 주면 순서대로 그 텍스트(또는 예외)를 반환합니다.
+	slow_ratio/garbage_ratio를 주면 그 비율만큼 느린 응답(slow_latency초)/깨진 JSON을 섞습니다.
+	지연이 request_options의 timeout보다 길면 timeout만큼 기다린 뒤 TimeoutError를 발생시킵니다.
+	"""
+
+	GARBAGE_RESPONSES = (
+		'[{"lat": 37.5, "lng": 12',
+		'경로를 추천해 드릴게요!',
+		'{"route": []}',
+		'[]',
+	)
+
+	def __init__(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None,
+				 latency: float = 0.0, responses: Optional[List[Any]] = None,
+				 slow_ratio: float = 0.0, slow_latency: float = 0.0, garbage_ratio: float = 0.0,
+				 seed: Optional[int] = None):
+		self.model_name = model_name
+		self.generation_config = generation_config or {}
+		self.latency = latency
+		self.responses = list(responses or [])
+		self.slow_ratio = slow_ratio
+		self.slow_latency = slow_latency
+		self.garbage_ratio = garbage_ratio
+		self.calls = 0
+		self._random = random.Random(seed)
+		self._lock = threading.Lock()
+
+	# stream=True일 때 조각 크기(문자)
+	STREAM_CHUNK_SIZE = 48
+	# stream=True일 때 전체 지연 중 첫 조각까지의 비율 (나머지는 조각 사이에 나눔)
+	STREAM_FIRST_CHUNK_RATIO = 0.2
+
+	def generate_content(self, prompt: str, request_options: Optional[Dict[str, Any]] = None, stream: bool = False, **kwargs):
+		with self._lock:
+			self.calls += 1
+			scripted = self.responses.pop(0) if self.responses else None
+			slow = self._random.random() < self.slow_ratio
+			garbage = self._random.choice(self.GARBAGE_RESPONSES) if self._random.random() < self.garbage_ratio else None
+
+		delay = self.slow_latency if slow else self.latency
+		timeout = (request_options or {}).get('timeout')
+		if timeout and delay > timeout:
+			time.sleep(timeout)
+			raise TimeoutError(f"fake 모델 응답이 {timeout}초 안에 오지 않았습니다.")
+		if stream:
+			first_delay = delay * self.STREAM_FIRST_CHUNK_RATIO
+			delay -= first_delay
+			time.sleep(first_delay)
+		elif delay:
+			time.sleep(delay)
+
+		if isinstance(scripted, Exception):
+			raise scripted
+		if scripted is not None:
+			text = scripted
+		elif garbage is not None:
+			text = garbage
+		elif self.generation_config.get('response_schema', {}).get('type') == 'array':
+			text = json.dumps(self._fake_route(prompt), ensure_ascii=False)
+		else:
+			text = json.dumps(self._fake_location(prompt))
+
+		if stream:
+			return self._stream(text, delay)
+		return FakeResponse(text)
+
+	def _stream(self, text: str, delay: float) -> Iterator[FakeResponse]:
+		chunks = [text[i:i + self.STREAM_CHUNK_SIZE] for i in range(0, len(text), self.STREAM_CHUNK_SIZE)]
+		for index, chunk in enumerate(chunks):
+			if index and delay:
+				time.sleep(delay / max(len(chunks) - 1, 1))
+			yield FakeResponse(chunk)
+
+	@staticmethod
+	def _fake_location(prompt: str) -> Dict[str, float]:
+		match = re.search(r'위치:\s*(.+)', prompt)
+		seed = zlib.crc32((match.group(1).strip() if match else prompt).encode())
+		return {
+			'lat': round(37.45 + (seed % 1000) / 1000 * 0.2, 6),
+			'lng': round(126.85 + (seed // 1000 % 1000) / 1000 * 0.3, 6),
+		}
+
+	@staticmethod
+	def _fake_route(prompt: str) -> List[Dict[str, Any]]:
+		from .engines import LoopRouteEngine
+
+		coords = re.search(r'위도\s*(-?[\d.]+),\s*경도\s*(-?[\d.]+)', prompt)
+		distance = re.search(r'목표 거리:\s*([\d.]+)km', prompt)
+		lat, lng = (float(coords.group(1)), float(coords.group(2))) if coords else (37.5665, 126.9780)
+		target = float(distance.group(1)) if distance else 5.0
+		return LoopRouteEngine(tolerance=0.05).generate('출발지', lat, lng, target)
+
+class GeminiClientManager:
+	"""
+	워커 프로세스당 하나만 생성되는 Gemini 클라이언트 관리자
+	- genai.configure와 GenerativeModel 생성은 처음 한 번만 수행하고 재사용
+	- 세마포어로 동시에 진행 중인 호출 수를 GEMINI_MAX_CONCURRENCY로 제한
+	- 호출마다 제한 시간(request_options.timeout) 적용
+	- 연속 실패 시 회로 차단기로 즉시 실패 (상위에서 대체 엔진 사용)
+	GEMINI_BACKEND='fake'이면 FakeGenerativeModel을 사용합니다.
+	"""
+
+	def __init__(self):
+		self.backend = getattr(settings, 'GEMINI_BACKEND', 'google')
+		self.model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-1.5-flash')
+		self.request_timeout = getattr(settings, 'GEMINI_REQUEST_TIMEOUT', 15)
+		self.queue_timeout = getattr(settings, 'GEMINI_QUEUE_TIMEOUT', 5)
+		self.max_concurrency = getattr(settings, 'GEMINI_MAX_CONCURRENCY', 8)
+		self.semaphore = threading.BoundedSemaphore(self.max_concurrency)
+		self.breaker = CircuitBreaker(
+			failure_threshold=getattr(settings, 'GEMINI_CIRCUIT_FAILURE_THRESHOLD', 5),
+			reset_timeout=getattr(settings, 'GEMINI_CIRCUIT_RESET_SECONDS', 30),
+		)
+		self._models: Dict[str, Any] = {}
+		self._lock = threading.Lock()
+		self._configured = False
+		self._in_flight = 0
+		self._calls = 0
+		self._errors = 0
+
+	def _configure(self):
+		if self._configured or self.backend == 'fake':
+			return
+		api_key = getattr(settings, 'GEMINI_API_KEY', None)
+		if not api_key:
+			raise ValueError("GEMINI_API_KEY가 Django settings에 설정되지 않았습니다.")
+		import google.generativeai as genai
+		genai.configure(api_key=api_key)
+		self._configured = True
+
+	def get_model(self, generation_config: Dict[str, Any]):
+		"""
+		generation_config별로 GenerativeModel을 한 번만 생성해 재사용합니다.
+		"""
+		key = json.dumps(generation_config, sort_keys=True)
+		model = self._models.get(key)
+		if model is not None:
+			return model
+
+		with self._lock:
+			model = self._models.get(key)
+			if model is None:
+				self._configure()
+				if self.backend == 'fake':
+					model = FakeGenerativeModel(
+						self.model_name, generation_config,
+						latency=getattr(settings, 'GEMINI_FAKE_LATENCY', 0.0),
+					)
+				else:
+					import google.generativeai as genai
+					model = genai.GenerativeModel(self.model_name, generation_config=generation_config)
+				self._models[key] = model
+		return model
+
+	def generate(self, model, prompt: str, timeout: Optional[float] = None, **kwargs):
+		"""
+		동시 호출 제한/제한 시간/회로 차단기를 적용해 generate_content를 호출합니다.
+		"""
+		self.breaker.before_call()
+		if not self.semaphore.acquire(timeout=self.queue_timeout):
+			self.breaker.cancel_trial()
+			raise RouteGenerationTimeout("Gemini 호출 대기열이 가득 찼습니다.")
+		try:
+			with self._lock:
+				self._in_flight += 1
+				self._calls += 1
+			response = model.generate_content(
+				prompt, request_options={'timeout': timeout or self.request_timeout}, **kwargs
+			)
+		except Exception:
+			with self._lock:
+				self._errors += 1
+			self.breaker.record_failure()
+			raise
+		else:
+			self.breaker.record_success()
+			return response
+		finally:
+			with self._lock:
+				self._in_flight -= 1
+			self.semaphore.release()
+
+	def generate_stream(self, model, prompt: str, timeout: Optional[float] = None, **kwargs) -> Iterator[str]:
+		"""
+		generate_content(stream=True)의 응답 텍스트 조각을 도착하는 대로 반환합니다.
+		동시 호출 슬롯은 스트림을 끝까지 읽거나 닫을 때까지 유지합니다.
+		"""
+		self.breaker.before_call()
+		if not self.semaphore.acquire(timeout=self.queue_timeout):
+			self.breaker.cancel_trial()
+			raise RouteGenerationTimeout("Gemini 호출 대기열이 가득 찼습니다.")
+		completed = False
+		try:
+			with self._lock:
+				self._in_flight += 1
+				self._calls += 1
+			response = model.generate_content(
+				prompt, stream=True, request_options={'timeout': timeout or self.request_timeout}, **kwargs
+			)
+			for chunk in response:
+				text = getattr(chunk, 'text', '')
+				if text:
+					yield text
+			completed = True
+		except Exception:
+			with self._lock:
+				self._errors += 1
+			self.breaker.record_failure()
+			raise
+		finally:
+			if completed:
+				self.breaker.record_success()
+			else:
+				# 소비자가 중간에 스트림을 닫은 경우 시험 호출 상태만 해제
+				self.breaker.cancel_trial()
+			with self._lock:
+				self._in_flight -= 1
+			self.semaphore.release()
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			stats = {
+				'backend': self.backend,
+				'max_concurrency': self.max_concurrency,
+				'in_flight': self._in_flight,
+				'calls': self._calls,
+				'errors': self._errors,
+				'models': len(self._models),
+			}
+		stats['circuit'] = self.breaker.stats()
+		return stats
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_client_manager() -> GeminiClientManager:
+	"""
+	프로세스 단위 GeminiClientManager (처음 호출 시 생성)
+	"""
+	global _manager
+	if _manager is None:
+		with _manager_lock:
+			if _manager is None:
+				_manager = GeminiClientManager()
+	return _manager
+
+def reset_client_manager():
+	"""
+	설정 변경 후(테스트 등) 관리자를 다시 만들도록 합니다.
+	"""
+	global _manager
+	with _manager_lock:
+		_manager = None
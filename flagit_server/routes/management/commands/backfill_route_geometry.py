@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from routes.models import Route, route_path_to_linestring
+
+
+class Command(BaseCommand):
+    help = "path(LineString)가 비어 있는 기존 Route 행을 route_path로 채웁니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help="이미 채워진 행도 다시 계산")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Route.objects.all() if options['all'] else Route.objects.filter(path__isnull=True)
+        queryset = queryset.only('route_id', 'route_path').order_by('route_id')
+
+        batch, updated, skipped = [], 0, 0
+        for route in queryset.iterator(chunk_size=batch_size):
+            route.path = route_path_to_linestring(route.route_path)
+            if route.path is None:
+                skipped += 1
+                continue
+            batch.append(route)
+            if len(batch) >= batch_size:
+                Route.objects.bulk_update(batch, ['path'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            Route.objects.bulk_update(batch, ['path'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{updated}건 갱신, {skipped}건 건너뜀 (지점 2개 미만)"))
@@ -0,0 +1,55 @@
+import statistics
+import time
+
+import google.generativeai as genai
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from routes.llm import FakeGenerativeModel, get_client_manager
+from routes.services import LOCATION_GENERATION_CONFIG, ROUTE_GENERATION_CONFIG, RouteRecommendationService
+
+
+class Command(BaseCommand):
+    help = "요청마다 Gemini 클라이언트를 새로 만드는 방식과 프로세스 단위 GeminiClientManager의 오버헤드를 비교합니다. (네트워크 호출 없음)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+
+    def _measure(self, func, iterations):
+        durations = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - started) * 1_000_000)
+        durations.sort()
+        return statistics.median(durations), durations[max(0, int(len(durations) * 0.95) - 1)]
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-1.5-flash')
+        api_key = getattr(settings, 'GEMINI_API_KEY', None) or 'benchmark-key'
+
+        def legacy_construct():
+            # 기존 RouteRecommendationService.__init__와 동일한 작업
+            genai.configure(api_key=api_key)
+            genai.GenerativeModel(model_name, generation_config=ROUTE_GENERATION_CONFIG)
+            genai.GenerativeModel(model_name, generation_config=LOCATION_GENERATION_CONFIG)
+
+        manager = get_client_manager()
+        RouteRecommendationService()  # 최초 1회 초기화 (워커 시작 시점에 해당)
+
+        fake = FakeGenerativeModel(model_name, LOCATION_GENERATION_CONFIG)
+        prompt = "위치: 서울숲"
+
+        rows = [
+            ('legacy construct', *self._measure(legacy_construct, iterations)),
+            ('pooled construct', *self._measure(RouteRecommendationService, iterations)),
+            ('direct fake call', *self._measure(lambda: fake.generate_content(prompt), iterations)),
+            ('managed fake call', *self._measure(lambda: manager.generate(fake, prompt), iterations)),
+        ]
+
+        self.stdout.write(f"{'case':<20} {'p50 us':>10} {'p95 us':>10}")
+        for name, p50, p95 in rows:
+            self.stdout.write(f"{name:<20} {p50:>10.1f} {p95:>10.1f}")
+        saved = rows[0][1] - rows[1][1]
+        self.stdout.write(self.style.SUCCESS(f"요청당 클라이언트 생성 오버헤드 절감(p50): {saved:.1f} us"))
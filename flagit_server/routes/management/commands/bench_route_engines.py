@@ -0,0 +1,60 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from routes.engines import GeminiRouteEngine, LoopRouteEngine
+from routes.geometry import path_length_km
+
+
+class Command(BaseCommand):
+    help = "경로 생성 엔진(로컬 원형 경로 vs Gemini)의 지연 시간과 목표 거리 오차를 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', default='37.5665,126.9780', help="시작 좌표 'lat,lng' (기본값: 서울시청)")
+        parser.add_argument('--distances', default='3,5,10', help="목표 거리 목록(km), 쉼표 구분")
+        parser.add_argument('--crew-type', default='running', choices=['running', 'hiking', 'riding'])
+        parser.add_argument('--runs', type=int, default=50, help="엔진/거리별 반복 횟수 (Gemini는 --gemini-runs)")
+        parser.add_argument('--waypoints', default='', help="경유지 좌표 'lat,lng;lat,lng' (선택)")
+        parser.add_argument('--gemini', action='store_true', help="Gemini 엔진도 측정 (API 호출 발생)")
+        parser.add_argument('--gemini-runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            start_lat, start_lng = (float(v) for v in options['start'].split(','))
+            distances = [float(v) for v in options['distances'].split(',')]
+            waypoints = []
+            for pair in filter(None, options['waypoints'].split(';')):
+                w_lat, w_lng = (float(v) for v in pair.split(','))
+                waypoints.append({'lat': w_lat, 'lng': w_lng, 'name': '제휴 가게', 'is_partner': True})
+        except ValueError:
+            raise CommandError("좌표/거리 형식이 올바르지 않습니다.")
+
+        engines = [(LoopRouteEngine(), options['runs'])]
+        if options['gemini']:
+            engines.append((GeminiRouteEngine(), options['gemini_runs']))
+
+        self.stdout.write(f"{'engine':<8} {'km':>6} {'runs':>5} {'p50 ms':>10} {'p95 ms':>10} {'mean err %':>11} {'points':>7}")
+        for engine, runs in engines:
+            for distance in distances:
+                durations, errors, points = [], [], 0
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    try:
+                        route_path = engine.generate('벤치마크', start_lat, start_lng, distance,
+                                                     options['crew_type'], waypoints)
+                    except ValueError as e:
+                        self.stderr.write(f"{engine.name} {distance}km 실패: {e}")
+                        continue
+                    durations.append((time.perf_counter() - started) * 1000)
+                    errors.append(abs(path_length_km(route_path) - distance) / distance * 100)
+                    points = len(route_path)
+
+                if not durations:
+                    continue
+                durations.sort()
+                p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+                self.stdout.write(
+                    f"{engine.name:<8} {distance:>6.1f} {len(durations):>5} {statistics.median(durations):>10.2f} "
+                    f"{p95:>10.2f} {statistics.mean(errors):>11.2f} {points:>7}"
+                )
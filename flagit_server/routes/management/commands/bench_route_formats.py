@@ -0,0 +1,59 @@
+import gzip
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from routes.engines import LoopRouteEngine
+from routes.formats import (
+    PATH_FORMAT_DEFAULT,
+    PATH_FORMAT_GEOJSON,
+    PATH_FORMAT_POLYLINE,
+    decode_polyline,
+    format_route_path,
+)
+
+
+class Command(BaseCommand):
+    help = "route_path 출력 형식(기존 JSON / encoded polyline / GeoJSON)별 응답 크기와 직렬화 시간을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--distances', default='5,20,40', help="목표 거리 목록(km), 쉼표 구분")
+        parser.add_argument('--crew-type', default='hiking', choices=['running', 'hiking', 'riding'])
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        engine = LoopRouteEngine()
+        formats = [PATH_FORMAT_DEFAULT, PATH_FORMAT_POLYLINE, PATH_FORMAT_GEOJSON]
+
+        self.stdout.write(f"{'km':>5} {'points':>7} {'format':<9} {'bytes':>8} {'gzip':>7} {'ratio':>6} {'p50 us':>9}")
+        for distance in (float(v) for v in options['distances'].split(',')):
+            route_path = engine.generate('벤치마크 출발지', 37.5665, 126.9780, distance, options['crew_type'])
+            # 실제 응답처럼 이름이 있는 지점/제휴 가게를 일부 포함
+            route_path[len(route_path) // 2].update(name='제휴 가게', is_partner=True)
+            route_path[len(route_path) // 3]['name'] = '전망대'
+
+            baseline = None
+            for path_format in formats:
+                durations = []
+                for _ in range(options['iterations']):
+                    started = time.perf_counter()
+                    body = renderer.render({'route_id': 1, **format_route_path(route_path, path_format)})
+                    durations.append((time.perf_counter() - started) * 1_000_000)
+
+                size = len(body)
+                baseline = baseline or size
+                self.stdout.write(
+                    f"{distance:>5.1f} {len(route_path):>7} {path_format:<9} {size:>8} {len(gzip.compress(body)):>7} "
+                    f"{size / baseline:>6.2f} {statistics.median(durations):>9.1f}"
+                )
+
+            # polyline은 소수점 5자리(약 1m)까지 보존
+            decoded = decode_polyline(format_route_path(route_path, PATH_FORMAT_POLYLINE)['route_polyline'])
+            error = max(
+                max(abs(lat - point['lat']), abs(lng - point['lng']))
+                for (lat, lng), point in zip(decoded, route_path)
+            )
+            self.stdout.write(f"      polyline 최대 좌표 오차: {error:.6f}도")
@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from routes.hedging import HedgePolicy
+from routes.llm import FakeGenerativeModel
+from routes.metrics import route_metrics
+from routes.services import ROUTE_GENERATION_CONFIG, RouteRecommendationService
+
+
+class Command(BaseCommand):
+    help = "느린 응답/깨진 JSON을 섞는 로컬 fake 모델로 Gemini 꼬리 지연 정책(추가 요청/재요청/전체 제한 시간)을 비교합니다. (네트워크 호출 없음)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.05, help="보통 응답 지연(초)")
+        parser.add_argument('--slow-latency', type=float, default=1.0, help="느린 응답 지연(초)")
+        parser.add_argument('--slow-ratio', type=float, default=0.1)
+        parser.add_argument('--garbage-ratio', type=float, default=0.1)
+        parser.add_argument('--hedge-after', type=float, default=0.1, help="표본이 부족할 때의 추가 요청 기준 시간(초)")
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument('--deadline', type=float, default=2.0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def _run(self, policy, options):
+        service = RouteRecommendationService()
+        model = FakeGenerativeModel(
+            'fake', ROUTE_GENERATION_CONFIG,
+            latency=options['latency'],
+            slow_ratio=options['slow_ratio'],
+            slow_latency=options['slow_latency'],
+            garbage_ratio=options['garbage_ratio'],
+            seed=options['seed'],
+        )
+        service.route_model = model
+        service.hedge_policy = policy
+
+        durations = []
+        failures = 0
+        for i in range(options['requests']):
+            started = time.perf_counter()
+            try:
+                # singleflight를 거치지 않도록 내부 생성 함수를 직접 호출
+                service._request_route('벤치마크', 37.5665, 126.9780, 3 + i % 5, 'running', None)
+            except ValueError:
+                failures += 1
+            durations.append((time.perf_counter() - started) * 1000)
+
+        durations.sort()
+        pct = lambda p: durations[max(0, int(len(durations) * p) - 1)]
+        return {
+            'p50': statistics.median(durations),
+            'p95': pct(0.95),
+            'p99': pct(0.99),
+            'max': durations[-1],
+            'failures': failures,
+            'calls': model.calls / len(durations),
+        }
+
+    def handle(self, *args, **options):
+        deadline = options['deadline']
+        policies = [
+            ('single call', HedgePolicy(hedge_after=None, max_attempts=1, deadline=deadline)),
+            ('retry only', HedgePolicy(hedge_after=None, max_attempts=options['max_attempts'], deadline=deadline)),
+            ('hedge + retry', HedgePolicy(
+                hedge_after=options['hedge_after'], max_attempts=options['max_attempts'], deadline=deadline,
+            )),
+        ]
+
+        self.stdout.write(
+            f"{'policy':<15} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'fail %':>7} {'calls/req':>10}"
+        )
+        results = {}
+        for name, policy in policies:
+            # 정책마다 추가 요청 기준 지연 표본을 새로 쌓음
+            route_metrics.reset()
+            row = results[name] = self._run(policy, options)
+            self.stdout.write(
+                f"{name:<15} {row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f} {row['max']:>9.1f} "
+                f"{row['failures'] / options['requests'] * 100:>7.1f} {row['calls']:>10.2f}"
+            )
+
+        baseline, hedged = results['single call'], results['hedge + retry']
+        self.stdout.write(self.style.SUCCESS(
+            f"p99 {baseline['p99']:.1f}ms -> {hedged['p99']:.1f}ms, "
+            f"실패 {baseline['failures']} -> {hedged['failures']}"
+        ))
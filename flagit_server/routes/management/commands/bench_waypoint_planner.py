@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+
+import numpy as np
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from routes.engines import LoopRouteEngine
+from routes.geometry import LocalProjection, cheapest_insertion
+from routes.waypoints import WaypointPlanner
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "기존 경유지 선택(반경 내 .first())과 WaypointPlanner(KNN + 우회 거리)의 지연 시간/우회 거리를 비교합니다. (가상 가게는 트랜잭션 롤백으로 삭제)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=30000, help="임시로 만들 가상 가게 수 (0이면 기존 데이터만 사용)")
+        parser.add_argument('--spread-km', type=float, default=15.0, help="가상 가게를 흩뿌릴 범위(중심에서 km)")
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--distance', type=float, default=5.0)
+        parser.add_argument('--stops', type=int, default=3)
+        parser.add_argument('--runs', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        center_lat, center_lng = (float(v) for v in options['center'].split(','))
+        with transaction.atomic():
+            if options['stores']:
+                self._seed(center_lat, center_lng, options)
+            # bulk_create한 가상 가게는 프로세스 내 가게 인덱스에 없으므로 PostGIS로 비교
+            with override_settings(STORE_INDEX_ENABLED=False):
+                self._bench(center_lat, center_lng, options)
+            transaction.set_rollback(True)
+
+    def _seed(self, center_lat, center_lng, options):
+        rng = random.Random(options['seed'])
+        projection = LocalProjection(center_lat, center_lng)
+        spread = options['spread_km'] * 1000
+        stores = []
+        for i in range(options['stores']):
+            lat, lng = projection.to_latlng(rng.uniform(-spread, spread), rng.uniform(-spread, spread))
+            stores.append(Store(name=f'bench-{i}', lat=lat, lng=lng, location=Point(lng, lat, srid=4326)))
+        Store.objects.bulk_create(stores, batch_size=2000)
+        self.stdout.write(f"가상 가게 {len(stores)}곳 생성 (롤백 예정)")
+
+    def _bench(self, center_lat, center_lng, options):
+        rng = random.Random(options['seed'] + 1)
+        planner = WaypointPlanner(max_stops=options['stops'])
+        distance = options['distance']
+        legacy_ms, planner_ms, legacy_detour, planner_detour = [], [], [], []
+        legacy_stops, planner_stops = [], []
+
+        for _ in range(options['runs']):
+            projection = LocalProjection(center_lat, center_lng)
+            lat, lng = projection.to_latlng(rng.uniform(-5000, 5000), rng.uniform(-5000, 5000))
+
+            started = time.perf_counter()
+            legacy = Store.objects.filter(location__distance_lte=(Point(lng, lat, srid=4326), D(km=distance))).first()
+            legacy_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            stops = planner.plan(lat, lng, distance)
+            planner_ms.append((time.perf_counter() - started) * 1000)
+
+            legacy_stops.append(1 if legacy else 0)
+            planner_stops.append(len(stops))
+            planner_detour.extend(stop['detour_m'] for stop in stops)
+            if legacy:
+                legacy_detour.append(self._detour(lat, lng, distance, legacy))
+
+        def row(name, durations, detours, stops):
+            durations.sort()
+            p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+            detour = statistics.mean(detours) if detours else float('nan')
+            self.stdout.write(
+                f"{name:<10} {statistics.median(durations):>9.2f} {p95:>9.2f} {detour:>16.1f} {statistics.mean(stops):>7.2f}"
+            )
+
+        self.stdout.write(f"{'selector':<10} {'p50 ms':>9} {'p95 ms':>9} {'detour m/stop':>16} {'stops':>7}")
+        row('legacy', legacy_ms, legacy_detour, legacy_stops)
+        row('planner', planner_ms, planner_detour, planner_stops)
+
+    @staticmethod
+    def _detour(lat, lng, distance, store):
+        # 기존 방식으로 고른 가게를 같은 기준 경로에 끼워 넣을 때의 우회 거리
+        projection = LocalProjection(lat, lng)
+        loop = LoopRouteEngine().generate('', lat, lng, distance)
+        loop_xy = np.array([projection.to_xy(point['lat'], point['lng']) for point in loop])
+        _, chosen = cheapest_insertion(loop_xy, np.array([projection.to_xy(store.lat, store.lng)]))
+        return chosen[0][1]
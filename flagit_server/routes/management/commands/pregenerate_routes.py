@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from crew.models import Crew
+from location.geocoding import normalize_location
+from location.models import Location
+from member.models import ActivityLocation
+from routes.llm import get_client_manager
+from routes.pipeline import recommend_and_save_route
+from routes.route_cache import get_cache_policy
+from routes.services import RouteRecommendationService
+
+
+def parse_hours(value):
+    """
+    '2-6' -> (2, 6), 자정을 넘는 '23-5'도 허용
+    """
+    try:
+        start, end = (int(v) for v in value.split('-'))
+    except ValueError:
+        raise CommandError(f"시간 범위 형식이 올바르지 않습니다: {value} (예: 2-6)")
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise CommandError(f"시간 범위 형식이 올바르지 않습니다: {value} (예: 2-6)")
+    return start, end
+
+
+def in_hours(hour, hours):
+    start, end = hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class Command(BaseCommand):
+    help = (
+        "자주 요청되는 시작 위치/거리를 Location, ActivityLocation에서 찾아 크루 타입별 경로를 미리 생성합니다. "
+        "(경로 재사용 캐시 워밍, 한가한 시간대에 cron 등으로 실행)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=getattr(settings, 'ROUTE_PREGENERATE_TOP', 20),
+                            help="미리 생성할 (시작 위치, 거리) 조합 수")
+        parser.add_argument('--since-days', type=int, default=30, help="ActivityLocation 집계 기간(일)")
+        parser.add_argument('--crew-types', default=','.join(code for code, _ in Crew.CREW_TYPES))
+        parser.add_argument('--engine', choices=['gemini', 'loop'], default=None, help="미지정 시 ROUTE_ENGINE_DEFAULT")
+        parser.add_argument('--llm-budget', type=int, default=getattr(settings, 'ROUTE_PREGENERATE_LLM_BUDGET', 100),
+                            help="이번 실행에서 사용할 수 있는 최대 Gemini 호출 수 (위치 변환 포함)")
+        parser.add_argument('--max-routes', type=int, default=0, help="새로 생성할 최대 경로 수 (0이면 제한 없음)")
+        parser.add_argument('--off-peak-hours', default=getattr(settings, 'ROUTE_PREGENERATE_OFF_PEAK_HOURS', '2-6'),
+                            help="실행을 허용하는 시간대 (현지 시각, 예: 2-6)")
+        parser.add_argument('--force', action='store_true', help="허용 시간대가 아니어도 실행")
+        parser.add_argument('--dry-run', action='store_true', help="생성 대상만 출력")
+
+    def handle(self, *args, **options):
+        hours = parse_hours(options['off_peak_hours'])
+        now = timezone.localtime()
+        if not options['force'] and not in_hours(now.hour, hours):
+            self.stdout.write(f"허용 시간대({options['off_peak_hours']}시)가 아니므로 건너뜁니다. (--force로 실행 가능)")
+            return
+
+        enabled, _ = get_cache_policy()
+        if not enabled:
+            self.stdout.write(self.style.WARNING("경로 재사용 캐시가 꺼져 있어 미리 생성한 경로가 사용되지 않습니다."))
+            return
+
+        crew_types = [v.strip() for v in options['crew_types'].split(',') if v.strip()]
+        valid_types = {code for code, _ in Crew.CREW_TYPES}
+        if not crew_types or set(crew_types) - valid_types:
+            raise CommandError(f"crew type은 {', '.join(sorted(valid_types))} 중에서 선택하세요.")
+
+        popular = self.mine_popular_starts(now - timedelta(days=options['since_days']), options['top'])
+        if not popular:
+            self.stdout.write("집계된 시작 위치가 없습니다.")
+            return
+
+        self.stdout.write(f"{'count':>6} {'km':>6}  start_location")
+        for name, distance, count in popular:
+            self.stdout.write(f"{count:>6} {distance:>6.1f}  {name}")
+        if options['dry_run']:
+            return
+
+        self.pregenerate(popular, crew_types, options)
+
+    def mine_popular_starts(self, since, top):
+        """
+        (정규화한 위치 이름, 캐시 거리 구간)별 요청 수 상위 top개 -> [(대표 위치 이름, 거리 km, 횟수)]
+        """
+        step = getattr(settings, 'ROUTE_CACHE_DISTANCE_STEP_KM', 0.5)
+        counts = Counter()
+        names = defaultdict(Counter)
+
+        rows = [
+            Location.objects.filter(location_distance__gt=0)
+            .values_list('name', 'location_distance').annotate(n=Count('id')),
+            ActivityLocation.objects.filter(visited_at__gte=since, location_distance__gt=0)
+            .values_list('location_name', 'location_distance').annotate(n=Count('id')),
+        ]
+        for queryset in rows:
+            for name, distance, n in queryset:
+                key = normalize_location(name)
+                if not key:
+                    continue
+                # route_cache.build_cache_key와 같은 거리 구간으로 묶음
+                bucket = int(round(distance / step))
+                if bucket <= 0:
+                    continue
+                counts[(key, bucket)] += n
+                names[key][name.strip()] += n
+
+        return [
+            (names[key].most_common(1)[0][0], round(bucket * step, 3), count)
+            for (key, bucket), count in counts.most_common(top)
+        ]
+
+    def pregenerate(self, popular, crew_types, options):
+        manager = get_client_manager()
+        service = RouteRecommendationService()
+        budget = options['llm_budget']
+        # 항목 하나가 쓸 수 있는 최대 호출 수: 위치 변환 1 + 경로 생성(추가 요청/재요청 포함)
+        worst_case = 1 + max(1, getattr(settings, 'ROUTE_LLM_MAX_ATTEMPTS', 3))
+        calls_before = manager.stats()['calls']
+        generated = cached = failed = 0
+
+        for name, distance, _ in popular:
+            for crew_type in crew_types:
+                used = manager.stats()['calls'] - calls_before
+                if used + worst_case > budget:
+                    self.stdout.write(self.style.WARNING(f"Gemini 호출 예산({budget}회) 소진으로 중단합니다."))
+                    return self.summary(generated, cached, failed, used)
+                if options['max_routes'] and generated >= options['max_routes']:
+                    self.stdout.write(f"최대 생성 수({options['max_routes']})에 도달했습니다.")
+                    return self.summary(generated, cached, failed, used)
+
+                try:
+                    result = recommend_and_save_route(
+                        crew_member=None,
+                        crew_type=crew_type,
+                        start_location=name,
+                        target_distance=distance,
+                        service=service,
+                        engine=options['engine'],
+                    )
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"실패: {name} {distance}km {crew_type}: {e}")
+                    continue
+
+                if result.cached:
+                    cached += 1
+                    status = '이미 캐시됨'
+                else:
+                    generated += 1
+                    status = f"생성 ({result.route.engine})"
+                self.stdout.write(f"{status}: {name} {distance}km {crew_type} -> route {result.route.route_id}")
+
+        self.summary(generated, cached, failed, manager.stats()['calls'] - calls_before)
+
+    def summary(self, generated, cached, failed, calls):
+        self.stdout.write(self.style.SUCCESS(
+            f"생성 {generated}건, 이미 캐시됨 {cached}건, 실패 {failed}건, Gemini 호출 {calls}회"
+        ))
@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+class LatencyRecorder:
+	"""
+	단계별 지연 시간을 프로세스 단위로 모아 p50/p95를 계산합니다.
+	최근 max_samples개만 유지합니다.
+	"""
+
+	def __init__(self, max_samples: int = 1000):
+		self.max_samples = max_samples
+		self._samples: Dict[str, deque] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, stage: str, seconds: float):
+		with self._lock:
+			samples = self._samples.get(stage)
+			if samples is None:
+				samples = self._samples[stage] = deque(maxlen=self.max_samples)
+			samples.append(seconds)
+
+	def reset(self):
+		with self._lock:
+			self._samples.clear()
+
+	@staticmethod
+	def _percentile(ordered, pct: float) -> float:
+		# nearest-rank 방식
+		index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+		return ordered[index]
+
+	def percentile(self, stage: str, pct: float, min_samples: int = 1) -> Optional[float]:
+		"""
+		단계의 pct 백분위 지연 시간(초), 표본이 min_samples개 미만이면 None
+		"""
+		with self._lock:
+			samples = self._samples.get(stage)
+			ordered = sorted(samples) if samples else []
+		if len(ordered) < max(1, min_samples):
+			return None
+		return self._percentile(ordered, pct)
+
+	def summary(self) -> Dict[str, Dict[str, float]]:
+		"""
+		단계별 {count, p50_ms, p95_ms, max_ms}
+		"""
+		with self._lock:
+			snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+
+		result = {}
+		for stage, ordered in snapshot.items():
+			if not ordered:
+				continue
+			result[stage] = {
+				'count': len(ordered),
+				'p50_ms': round(self._percentile(ordered, 50) * 1000, 2),
+				'p95_ms': round(self._percentile(ordered, 95) * 1000, 2),
+				'max_ms': round(ordered[-1] * 1000, 2),
+			}
+		return result
+
+
+# 경로 추천 파이프라인 단계별 지연 시간 (프로세스 단위)
+route_metrics = LatencyRecorder()
+
+class StageTimer:
+	"""
+	요청 하나의 단계별 소요 시간을 기록합니다.
+	기록된 값은 route_metrics에도 함께 쌓입니다.
+	"""
+
+	def __init__(self, recorder: Optional[LatencyRecorder] = None):
+		self.recorder = recorder or route_metrics
+		self.timings: Dict[str, float] = {}
+		self._started = time.perf_counter()
+
+	@contextmanager
+	def stage(self, name: str):
+		started = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - started
+			self.timings[name] = self.timings.get(name, 0.0) + elapsed
+			self.recorder.observe(name, elapsed)
+
+	def mark(self, name: str) -> float:
+		"""
+		요청 시작부터 지금까지의 시간을 name으로 기록합니다. (스트리밍 첫 지점까지의 시간 등)
+		"""
+		elapsed = time.perf_counter() - self._started
+		self.timings[name] = elapsed
+		self.recorder.observe(name, elapsed)
+		return elapsed
+
+	def finish(self, name: str = 'total') -> float:
+		return self.mark(name)
+
+	def as_ms(self) -> Dict[str, float]:
+		return {name: round(seconds * 1000, 2) for name, seconds in self.timings.items()}
+
+	def server_timing_header(self) -> str:
+		"""
+		Server-Timing 응답 헤더 값 (브라우저/클라이언트에서 단계별 시간 확인용)
+		"""
+		return ', '.join(f"{name};dur={ms}" for name, ms in self.as_ms().items())
+
+class CounterSet:
+	"""
+	프로세스 단위 이벤트 카운터 (캐시 적중/미스 등)
+	"""
+
+	def __init__(self):
+		self._counts: Dict[str, int] = {}
+		self._lock = threading.Lock()
+
+	def incr(self, name: str, amount: int = 1):
+		with self._lock:
+			self._counts[name] = self._counts.get(name, 0) + amount
+
+	def get(self, name: str) -> int:
+		with self._lock:
+			return self._counts.get(name, 0)
+
+	def reset(self):
+		with self._lock:
+			self._counts.clear()
+
+	def snapshot(self) -> Dict[str, int]:
+		with self._lock:
+			return dict(self._counts)
+
+	def ratio(self, hit: str, miss: str) -> float:
+		with self._lock:
+			hits = self._counts.get(hit, 0)
+			total = hits + self._counts.get(miss, 0)
+		return round(hits / total, 4) if total else 0.0
+
+
+# 경로 추천 관련 이벤트 카운터 (프로세스 단위)
+route_counters = CounterSet()
@@ -1,11 +1,103 @@
+import uuid
 from django.db import models
+from django.contrib.gis.db.models import LineStringField
+from django.contrib.gis.geos import LineString, Point, Polygon
+from django.contrib.gis.measure import D
 from crew.models import CrewMember, Crew
+from .geometry import bbox_around
+
+
+def route_path_to_linestring(route_path):
+    """
+    route_path([{lat, lng, ...}, ...]) -> LineString (지점이 2개 미만이면 None)
+    """
+    coords = []
+    for point in route_path or []:
+        try:
+            coords.append((float(point['lng']), float(point['lat'])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if len(coords) < 2:
+        return None
+    return LineString(coords, srid=4326)
+
+
+class RouteQuerySet(models.QuerySet):
+    def near(self, lat, lng, meters):
+        """
+        지정한 지점에서 meters 이내를 지나는 경로
+        (GiST 인덱스를 타는 bbox 겹침(&&)으로 먼저 거른 뒤 정확한 거리로 확인)
+        """
+        point = Point(lng, lat, srid=4326)
+        envelope = Polygon.from_bbox(bbox_around(lat, lng, meters))
+        envelope.srid = 4326
+        return self.filter(path__bboverlaps=envelope, path__distance_lte=(point, D(m=meters)))
+
+    def within_bbox(self, min_lng, min_lat, max_lng, max_lat):
+        """
+        지정한 영역(bbox)을 지나는 경로
+        """
+        envelope = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+        envelope.srid = 4326
+        return self.filter(path__bboverlaps=envelope, path__intersects=envelope)
+
 
 # Create your models here.
 class Route(models.Model):
     route_id = models.AutoField(primary_key=True)
-    crew_member = models.ForeignKey(CrewMember, on_delete=models.CASCADE)
+    crew_member = models.ForeignKey(CrewMember, on_delete=models.CASCADE, null=True, blank=True)  # 미리 생성한 경로(pregenerate_routes)는 비어 있음
     crew_type = models.CharField(max_length=10, choices=Crew.CREW_TYPES)
     start_location = models.CharField(max_length=255) # 출발 경도, 위도 형식에서 -> 출발 위치로 변경
     target_distance = models.FloatField()
-    route_path = models.JSONField(default=list)  # 경로상의 모든 위치를 저장
\ No newline at end of file
+    route_path = models.JSONField(default=list)  # 경로상의 모든 위치를 저장
+    engine = models.CharField(max_length=20, default='gemini')  # 경로를 생성한 엔진 (gemini, loop)
+    actual_distance = models.FloatField(null=True, blank=True)  # route_path의 실제 길이(km)
+    path = LineStringField(srid=4326, null=True, blank=True)  # route_path와 동기화되는 공간 컬럼 (GiST 인덱스)
+    cache_key = models.CharField(max_length=128, null=True, blank=True, db_index=True)  # 재사용 가능한 추천 결과의 키 (routes.route_cache)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+
+    objects = RouteQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        # route_path로 LineString 생성
+        self.path = route_path_to_linestring(self.route_path)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'route_path' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'path'}
+        super().save(*args, **kwargs)
+
+
+class RouteCacheSetting(models.Model):
+    """
+    경로 재사용 캐시 정책 (관리자 페이지에서 수정, 행이 없으면 settings 기본값 사용)
+    """
+    enabled = models.BooleanField(default=True)
+    ttl_seconds = models.PositiveIntegerField(default=60 * 60 * 24 * 7)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"경로 캐시 ({'사용' if self.enabled else '중지'}, TTL {self.ttl_seconds}초)"
+
+
+class RouteJob(models.Model):
+    """
+    비동기 경로 추천 작업 (POST /routes/ 에서 mode=async로 요청한 경우)
+    """
+    STATUS_CHOICES = [
+        ('pending', '대기중'),
+        ('running', '진행중'),
+        ('succeeded', '완료'),
+        ('failed', '실패'),
+    ]
+
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    crew_member = models.ForeignKey(CrewMember, on_delete=models.CASCADE)
+    start_location = models.CharField(max_length=255)
+    target_distance = models.FloatField()
+    engine = models.CharField(max_length=20, blank=True, default='')  # 비어 있으면 ROUTE_ENGINE_DEFAULT
+    max_stops = models.PositiveSmallIntegerField(null=True, blank=True)  # 비어 있으면 ROUTE_WAYPOINT_STOPS
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    route = models.ForeignKey(Route, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
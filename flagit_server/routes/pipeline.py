@@ -0,0 +1,223 @@
+import logging
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from crew.models import CrewMember
+from .engines import FALLBACK_ERRORS, GeminiRouteEngine, fit_generated_route, generate_route
+from .metrics import StageTimer, route_counters
+from .models import Route
+from .route_cache import build_cache_key, lookup_cached_route
+from .services import RouteRecommendationService
+from .waypoints import plan_waypoints
+
+logger = logging.getLogger(__name__)
+
+class RouteRecommendation(NamedTuple):
+	route: Route
+	route_path: List[Dict[str, Any]]
+	cached: bool = False  # 기존에 생성된 경로를 재사용한 경우 True
+
+def _reuse_cached_route(
+	cached_route: Route,
+	crew_member: Optional[CrewMember],
+	start_location: str,
+	target_distance: float,
+) -> Route:
+	"""
+	캐시된 경로를 요청한 크루원의 새 경로로 복사합니다. (기록 등 이후 요청이 다른 사람의 경로를 바꾸지 않도록)
+	미리 생성(crew_member 없음)에서는 복사하지 않고 캐시된 경로를 그대로 반환합니다.
+	복사본은 cache_key를 두지 않아, 캐시 원본의 생성 시각(TTL)이 복사로 늘어나지 않습니다.
+	"""
+	if crew_member is None:
+		return cached_route
+	return Route.objects.create(
+		crew_member=crew_member,
+		crew_type=cached_route.crew_type,
+		start_location=start_location,
+		target_distance=target_distance,
+		route_path=cached_route.route_path,
+		engine=cached_route.engine,
+		actual_distance=cached_route.actual_distance,
+	)
+
+def recommend_and_save_route(
+	crew_member: Optional[CrewMember],
+	start_location: str,
+	target_distance: float,
+	service: Optional[RouteRecommendationService] = None,
+	timer: Optional[StageTimer] = None,
+	start_coords: Optional[Tuple[float, float]] = None,
+	engine: Optional[str] = None,
+	force_refresh: bool = False,
+	max_stops: Optional[int] = None,
+	crew_type: Optional[str] = None,
+) -> RouteRecommendation:
+	"""
+	경로 추천 파이프라인: 위치 변환(최대 1회) -> 제휴 가게 경유지 선택(최대 max_stops곳) -> 캐시 조회 -> 경로 생성(1회) 및 거리 보정 -> 저장
+	같은 격자 셀/거리 구간/크루 타입/경유 가게로 최근 생성된 경로가 있으면 생성 없이 요청자의 경로로 복사합니다. (force_refresh면 무시)
+	경로 생성 엔진은 engine(기본값: ROUTE_ENGINE_DEFAULT)으로 선택합니다.
+	각 단계 소요 시간은 timer에 기록됩니다.
+	crew_member 없이(미리 생성) 호출하면 crew_type을 직접 지정해야 합니다.
+	"""
+	service = service or RouteRecommendationService()
+	timer = timer or StageTimer()
+	crew_type = crew_type or crew_member.crew.crew_type
+	engine = engine or getattr(settings, 'ROUTE_ENGINE_DEFAULT', 'gemini')
+
+	if start_coords is None:
+		with timer.stage('geocode'):
+			start_coords = service.convert_location_to_coordinates(start_location)
+	start_lat, start_lng = start_coords
+
+	with timer.stage('waypoint'):
+		waypoints = plan_waypoints(start_lat, start_lng, target_distance, crew_type, max_stops)
+
+	cache_key = build_cache_key(start_lat, start_lng, target_distance, crew_type, waypoints, engine)
+	if force_refresh:
+		route_counters.incr('route_cache_forced_refreshes')
+	else:
+		with timer.stage('cache'):
+			cached_route = lookup_cached_route(cache_key)
+		if cached_route:
+			with timer.stage('save'):
+				route = _reuse_cached_route(cached_route, crew_member, start_location, target_distance)
+			return RouteRecommendation(route, route.route_path, cached=True)
+
+	with timer.stage('generate'):
+		route_path, engine_used, actual_distance = generate_route(
+			start_location=start_location,
+			start_coords=start_coords,
+			target_distance=target_distance,
+			crew_type=crew_type,
+			waypoints=waypoints,
+			engine=engine,
+			service=service,
+		)
+
+	with timer.stage('save'):
+		created_route = Route.objects.create(
+			crew_member=crew_member,
+			crew_type=crew_type,
+			start_location=start_location,
+			target_distance=target_distance,
+			route_path=route_path,
+			engine=engine_used,
+			actual_distance=actual_distance,
+			# 대체 엔진으로 만든 경로는 요청한 엔진의 캐시 키로 저장하지 않음
+			cache_key=cache_key if engine_used == engine else None,
+		)
+
+	return RouteRecommendation(created_route, route_path)
+
+def _route_payload(route: Route, route_path: List[Dict[str, Any]], cached: bool) -> Dict[str, Any]:
+	return {
+		'route_id': route.route_id,
+		'engine': route.engine,
+		'actual_distance': route.actual_distance,
+		'cached': cached,
+		'route_path': route_path,
+	}
+
+def stream_and_save_route(
+	crew_member: CrewMember,
+	start_location: str,
+	target_distance: float,
+	service: Optional[RouteRecommendationService] = None,
+	timer: Optional[StageTimer] = None,
+	engine: Optional[str] = None,
+	force_refresh: bool = False,
+	max_stops: Optional[int] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+	"""
+	recommend_and_save_route의 스트리밍 버전: (이벤트 이름, 데이터)를 순서대로 반환합니다.
+	- start: 변환된 시작 좌표 (가장 먼저)
+	- point: 경로 지점 (Gemini 스트리밍 응답에서 파싱되는 즉시)
+	- reset: 스트리밍 도중 실패해 대체 엔진으로 다시 생성하는 경우, 이전에 보낸 지점은 버림
+	- done: 저장된 경로 (거리 보정 후의 최종 route_path 포함)
+	첫 지점까지의 시간은 timer의 first_point로 기록됩니다.
+	(스트리밍은 응답을 공유할 수 없으므로 동일 요청 합치기/추가 요청은 적용하지 않음)
+	"""
+	service = service or RouteRecommendationService()
+	timer = timer or StageTimer()
+	crew_type = crew_member.crew.crew_type
+	engine = engine or getattr(settings, 'ROUTE_ENGINE_DEFAULT', 'gemini')
+
+	with timer.stage('geocode'):
+		start_coords = service.convert_location_to_coordinates(start_location)
+	start_lat, start_lng = start_coords
+	yield 'start', {'lat': start_lat, 'lng': start_lng, 'name': start_location}
+
+	with timer.stage('waypoint'):
+		waypoints = plan_waypoints(start_lat, start_lng, target_distance, crew_type, max_stops)
+
+	emitted = 0
+
+	def point_event(point: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+		nonlocal emitted
+		if 'first_point' not in timer.timings:
+			timer.mark('first_point')
+		emitted += 1
+		return 'point', {'index': emitted - 1, **point}
+
+	cache_key = build_cache_key(start_lat, start_lng, target_distance, crew_type, waypoints, engine)
+	if force_refresh:
+		route_counters.incr('route_cache_forced_refreshes')
+	else:
+		with timer.stage('cache'):
+			cached_route = lookup_cached_route(cache_key)
+		if cached_route:
+			for point in cached_route.route_path:
+				yield point_event(point)
+			with timer.stage('save'):
+				route = _reuse_cached_route(cached_route, crew_member, start_location, target_distance)
+			yield 'done', _route_payload(route, route.route_path, cached=True)
+			return
+
+	generate_args = dict(
+		start_location=start_location,
+		start_coords=start_coords,
+		target_distance=target_distance,
+		crew_type=crew_type,
+		waypoints=waypoints,
+		service=service,
+	)
+	if engine == GeminiRouteEngine.name:
+		try:
+			collected = []
+			for point in service.stream_route(start_location, start_lat, start_lng, target_distance, crew_type, waypoints):
+				collected.append(point)
+				yield point_event(point)
+			with timer.stage('fit'):
+				route_path, actual_distance = fit_generated_route(collected, start_coords, target_distance)
+			engine_used = engine
+		except FALLBACK_ERRORS as e:
+			fallback = getattr(settings, 'ROUTE_ENGINE_FALLBACK', 'loop')
+			if not fallback or fallback == engine:
+				raise
+			logger.warning("%s 엔진 스트리밍 실패(%s), %s 엔진으로 대체합니다.", engine, e, fallback)
+			if emitted:
+				emitted = 0
+				yield 'reset', {'engine': fallback, 'reason': str(e)}
+			with timer.stage('generate'):
+				route_path, engine_used, actual_distance = generate_route(engine=fallback, **generate_args)
+			for point in route_path:
+				yield point_event(point)
+	else:
+		with timer.stage('generate'):
+			route_path, engine_used, actual_distance = generate_route(engine=engine, **generate_args)
+		for point in route_path:
+			yield point_event(point)
+
+	with timer.stage('save'):
+		created_route = Route.objects.create(
+			crew_member=crew_member,
+			crew_type=crew_type,
+			start_location=start_location,
+			target_distance=target_distance,
+			route_path=route_path,
+			engine=engine_used,
+			actual_distance=actual_distance,
+			cache_key=cache_key if engine_used == engine else None,
+		)
+
+	yield 'done', _route_payload(created_route, route_path, cached=False)
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .geometry import EARTH_RADIUS_M
+from .metrics import route_counters
+from .models import Route, RouteCacheSetting
+
+# 관리자 정책(RouteCacheSetting)을 다시 읽는 주기 (초)
+POLICY_REFRESH_SECONDS = 30
+
+_policy = None
+_policy_loaded_at = 0.0
+_policy_lock = threading.Lock()
+
+def get_cache_policy() -> Tuple[bool, int]:
+	"""
+	(사용 여부, TTL 초) - 관리자 페이지의 RouteCacheSetting 우선, 없으면 settings 기본값
+	"""
+	global _policy, _policy_loaded_at
+	with _policy_lock:
+		if _policy is not None and time.monotonic() - _policy_loaded_at < POLICY_REFRESH_SECONDS:
+			return _policy
+
+	setting = RouteCacheSetting.objects.order_by('-updated_at').first()
+	if setting:
+		policy = (setting.enabled, setting.ttl_seconds)
+	else:
+		policy = (
+			getattr(settings, 'ROUTE_CACHE_ENABLED', True),
+			getattr(settings, 'ROUTE_CACHE_TTL_SECONDS', 60 * 60 * 24 * 7),
+		)
+
+	with _policy_lock:
+		_policy, _policy_loaded_at = policy, time.monotonic()
+	return policy
+
+def reset_cache_policy():
+	"""
+	관리자가 정책을 바꾼 경우 현재 프로세스에서 바로 다시 읽도록 합니다.
+	"""
+	global _policy
+	with _policy_lock:
+		_policy = None
+
+def snap_to_grid(lat: float, lng: float, cell_meters: float) -> Tuple[int, int]:
+	"""
+	좌표를 약 cell_meters 크기의 격자 셀 번호로 변환합니다.
+	"""
+	lat_step = math.degrees(cell_meters / EARTH_RADIUS_M)
+	cell_lat = math.floor(lat / lat_step)
+	# 경도 간격은 셀 중심 위도 기준
+	center_lat = (cell_lat + 0.5) * lat_step
+	lng_step = lat_step / max(math.cos(math.radians(center_lat)), 1e-6)
+	return cell_lat, math.floor(lng / lng_step)
+
+def build_cache_key(
+	start_lat: float,
+	start_lng: float,
+	target_distance: float,
+	crew_type: str,
+	waypoints: Optional[List[Dict[str, Any]]],
+	engine: str,
+) -> str:
+	"""
+	시작 격자 셀 + 거리 구간 + 크루 타입 + 경유 가게(순서대로) + 엔진으로 구성된 캐시 키
+	"""
+	cell_meters = getattr(settings, 'ROUTE_CACHE_GRID_METERS', 200)
+	distance_step = getattr(settings, 'ROUTE_CACHE_DISTANCE_STEP_KM', 0.5)
+	cell_lat, cell_lng = snap_to_grid(start_lat, start_lng, cell_meters)
+	bucket = int(round(target_distance / distance_step))
+	store_ids = '+'.join(str(waypoint.get('store_id')) for waypoint in waypoints or []) or '-'
+	return f"{cell_lat}:{cell_lng}:{bucket}:{crew_type}:{store_ids}:{engine}"
+
+def lookup_cached_route(cache_key: str) -> Optional[Route]:
+	"""
+	TTL 안에 생성된 같은 키의 경로가 있으면 반환합니다.
+	"""
+	enabled, ttl_seconds = get_cache_policy()
+	if not enabled:
+		return None
+
+	route = (
+		Route.objects.filter(cache_key=cache_key, created_at__gte=timezone.now() - timedelta(seconds=ttl_seconds))
+		.order_by('-created_at')
+		.first()
+	)
+	route_counters.incr('route_cache_hits' if route else 'route_cache_misses')
+	return route
+
+def invalidate_cached_routes(queryset) -> int:
+	"""
+	경로들을 캐시 대상에서 제외합니다. (다음 요청에서 새로 생성)
+	"""
+	return queryset.exclude(cache_key__isnull=True).update(cache_key=None)
+
+def cache_stats() -> Dict[str, Any]:
+	enabled, ttl_seconds = get_cache_policy()
+	return {
+		'enabled': enabled,
+		'ttl_seconds': ttl_seconds,
+		'hits': route_counters.get('route_cache_hits'),
+		'misses': route_counters.get('route_cache_misses'),
+		'forced_refreshes': route_counters.get('route_cache_forced_refreshes'),
+		'hit_ratio': route_counters.ratio('route_cache_hits', 'route_cache_misses'),
+	}
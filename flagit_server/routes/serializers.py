@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Route
+from .models import Route, RouteJob
 
 class RouteSerializer(serializers.ModelSerializer):
     
@@ -14,16 +15,82 @@ class RouteSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['route_id']
 
+class RouteSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Route
+        fields = [
+            'route_id',
+            'crew_type',
+            'start_location',
+            'target_distance',
+            'actual_distance',
+            'engine',
+        ]
+
 class RouteRecommendationRequestSerializer(serializers.Serializer):
+    MODE_CHOICES = [('sync', '동기'), ('async', '비동기')]
+    ENGINE_CHOICES = [('gemini', 'Gemini'), ('loop', '로컬 원형 경로')]
+
+    start_location = serializers.CharField()
+    target_distance = serializers.FloatField(min_value=0.1)
+    mode = serializers.ChoiceField(choices=MODE_CHOICES, default='sync', required=False)
+    engine = serializers.ChoiceField(choices=ENGINE_CHOICES, required=False)  # 미지정 시 ROUTE_ENGINE_DEFAULT
+    force_refresh = serializers.BooleanField(default=False, required=False)  # 캐시 무시하고 새로 생성 (관리자 전용)
+    max_stops = serializers.IntegerField(min_value=0, required=False)  # 경유할 제휴 가게 수 (미지정 시 ROUTE_WAYPOINT_STOPS, 최대 ROUTE_WAYPOINT_MAX_STOPS)
+
+class RouteBatchItemSerializer(serializers.Serializer):
     start_location = serializers.CharField()
-    target_distance = serializers.FloatField()
+    target_distance = serializers.FloatField(min_value=0.1)
+
+class RouteBatchRequestSerializer(serializers.Serializer):
+    items = RouteBatchItemSerializer(many=True)
+    engine = serializers.ChoiceField(choices=RouteRecommendationRequestSerializer.ENGINE_CHOICES, required=False)
+    max_stops = serializers.IntegerField(min_value=0, required=False)
+
+    def validate_items(self, value):
+        max_items = getattr(settings, 'ROUTE_BATCH_MAX_ITEMS', 10)
+        if not value:
+            raise serializers.ValidationError("항목이 비어 있습니다.")
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"한 번에 최대 {max_items}개까지 요청할 수 있습니다.")
+        return value
 
 class RouteRecommendationResponseSerializer(serializers.Serializer):
     route_id = serializers.IntegerField(required=False, allow_null=True)
+    engine = serializers.CharField(required=False)
+    actual_distance = serializers.FloatField(required=False, allow_null=True)
+    cached = serializers.BooleanField(required=False)
     route_path = serializers.ListField(
         child=serializers.DictField(),
     )
 
+class RouteJobSerializer(serializers.ModelSerializer):
+    route_id = serializers.IntegerField(source='route.route_id', read_only=True, allow_null=True)
+    actual_distance = serializers.FloatField(source='route.actual_distance', read_only=True, allow_null=True)
+    route_path = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RouteJob
+        fields = [
+            'job_id',
+            'status',
+            'start_location',
+            'target_distance',
+            'engine',
+            'route_id',
+            'actual_distance',
+            'route_path',
+            'error',
+            'created_at',
+            'updated_at',
+        ]
+
+    def get_route_path(self, obj):
+        # Route 행이 저장된 뒤에만 경로 반환
+        if obj.status == 'succeeded' and obj.route is not None:
+            return obj.route.route_path
+        return None
+
 class RouteCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
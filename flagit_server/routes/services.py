@@ -1,56 +1,84 @@
-import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from django.conf import settings
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from location.geocoding import geocode_cache, normalize_location
+from .hedging import HedgePolicy, call_with_hedging
+from .llm import CircuitOpenError, InvalidModelOutput, RouteGenerationTimeout, get_client_manager
+from .singleflight import geocode_flight, route_flight
+from .streaming import iter_json_array_items
+
+# 경로 추천용 설정
+ROUTE_GENERATION_CONFIG = {
+	"response_mime_type" : "application/json",
+	"response_schema" : {
+		"type" : "array",
+		"items" : {
+			"type" : "object",
+			"properties" : {
+				"lat" : {"type" : "number"},
+				"lng" : {"type" : "number"},
+				"name" : {"type" : "string"},
+				"is_partner" : {"type" : "boolean"},
+			},
+			"required" : ["lat", "lng", "is_partner"],
+		},
+	},
+}
+
+# 위치 변환용 설정
+LOCATION_GENERATION_CONFIG = {
+	"response_mime_type" : "application/json",
+	"response_schema" : {
+		"type" : "object",
+		"properties" : {
+			"lat" : {"type" : "number"},
+			"lng" : {"type" : "number"},
+		},
+		"required" : ["lat", "lng"],
+	},
+}
+
+def _with_legacy_waypoint(
+	waypoints: Optional[List[Dict[str, Any]]],
+	waypoint: Optional[Dict[str, Any]],
+) -> Optional[List[Dict[str, Any]]]:
+	"""
+	이전 인자 waypoint(가게 1곳)를 waypoints 목록으로 바꿉니다. (waypoints 자리에 가게 dict 하나를 넘긴 기존 호출도 허용)
+	"""
+	if isinstance(waypoints, dict):
+		waypoints = [waypoints]
+	if waypoint is None:
+		return waypoints
+	if waypoints:
+		raise TypeError("waypoint와 waypoints는 함께 지정할 수 없습니다.")
+	return [waypoint]
 
 class RouteRecommendationService:
 	def __init__(self):
-		# Django settings에서 Gemini API 키와 모델명 가져오기
-		api_key = getattr(settings, 'GEMINI_API_KEY', None)
-		model_name = getattr(settings, 'GEMINI_MODEL_NAME', 'gemini-1.5-flash')
-		
-		if not api_key:
-			raise ValueError("GEMINI_API_KEY가 Django settings에 설정되지 않았습니다.")
-		
-		genai.configure(api_key=api_key)
-		
-		# 경로 추천용 설정
-		route_generation_config = {
-			"response_mime_type" : "application/json",
-			"response_schema" : {
-				"type" : "array",
-				"items" : {
-					"type" : "object",
-					"properties" : {
-						"lat" : {"type" : "number"},
-						"lng" : {"type" : "number"},
-						"name" : {"type" : "string"},
-						"is_partner" : {"type" : "boolean"},
-					},
-					"required" : ["lat", "lng", "is_partner"],
-				},
-			},
-		}
-		
-		# 위치 변환용 설정
-		location_generation_config = {
-			"response_mime_type" : "application/json",
-			"response_schema" : {
-				"type" : "object",
-				"properties" : {
-					"lat" : {"type" : "number"},
-					"lng" : {"type" : "number"},
-				},
-				"required" : ["lat", "lng"],
-			},
-		}
-		
-		self.route_model = genai.GenerativeModel(model_name, generation_config=route_generation_config)
-		self.location_model = genai.GenerativeModel(model_name, generation_config=location_generation_config)
+		# genai.configure와 모델 생성은 프로세스당 한 번만 (GeminiClientManager에서 재사용)
+		self.client = get_client_manager()
+		self.request_timeout = getattr(settings, 'GEMINI_REQUEST_TIMEOUT', 15)
+		self.route_model = self.client.get_model(ROUTE_GENERATION_CONFIG)
+		self.location_model = self.client.get_model(LOCATION_GENERATION_CONFIG)
+		self.hedge_policy = HedgePolicy.from_settings()
 	
 	def convert_location_to_coordinates(self, location_name: str) -> Tuple[float, float]:
 		"""
 		위치 이름을 위도/경도로 변환합니다.
+		자주 요청되는 위치는 지오코딩 캐시(메모리 LRU -> DB)에서 바로 반환하고, 없을 때만 Gemini를 호출합니다.
+		같은 위치에 대한 동시 캐시 미스는 Gemini 호출 1회로 합칩니다.
+		"""
+		return geocode_cache.get_or_resolve(
+			location_name,
+			lambda name: geocode_flight.do(normalize_location(name), lambda: self._request_coordinates(name)),
+		)
+
+	def _request_coordinates(self, location_name: str) -> Tuple[float, float]:
+		"""
+		Gemini로 위치 이름을 위도/경도로 변환합니다. (캐시 미스 시 호출)
 		"""
 		prompt = f"""
 당신은 위치 정보를 위도와 경도로 변환하는 전문가입니다.
@@ -69,7 +97,7 @@ class RouteRecommendationService:
 """
 
 		try:
-			response = self.location_model.generate_content(prompt)
+			response = self.client.generate(self.location_model, prompt, timeout=self.request_timeout)
 			content = response.text.strip()
 			location_data = json.loads(content)
 
@@ -87,6 +115,10 @@ class RouteRecommendationService:
 
 			return lat, lng
 
+		except (RouteGenerationTimeout, CircuitOpenError):
+			raise
+		except (google_exceptions.DeadlineExceeded, TimeoutError) as e:
+			raise RouteGenerationTimeout(f"위치 변환 시간 초과: {e}")
 		except json.JSONDecodeError as e:
 			raise ValueError(f"JSON 파싱 오류: {e}")
 		except Exception as e:
@@ -97,14 +129,114 @@ class RouteRecommendationService:
 		start_location: str,
 		target_distance: float,
 		crew_type: str = 'running',
+		waypoints: Optional[List[Dict[str, Any]]] = None,
+		start_coords: Optional[Tuple[float, float]] = None,
 		waypoint: Optional[Dict[str, Any]] = None,
 	) -> List[Dict[str, Any]]:
 		"""
 		시작 위치 문자열과 목표 거리를 기반으로 경로를 추천합니다.
+		이미 변환된 좌표(start_coords)가 있으면 위치 변환을 다시 하지 않습니다.
+		같은 조건으로 동시에 들어온 요청은 Gemini 호출 1회로 합칩니다.
+		waypoint는 이전 버전과의 호환용 (가게 1곳, waypoints=[waypoint]와 같음)
 		"""
+		waypoints = _with_legacy_waypoint(waypoints, waypoint)
 		# 시작 위치를 위도/경도로 변환
-		start_lat, start_lng = self.convert_location_to_coordinates(start_location)
-		
+		if start_coords is not None:
+			start_lat, start_lng = start_coords
+		else:
+			start_lat, start_lng = self.convert_location_to_coordinates(start_location)
+
+		flight_key = json.dumps([
+			normalize_location(start_location),
+			round(start_lat, 6),
+			round(start_lng, 6),
+			target_distance,
+			crew_type,
+			waypoints or [],
+		], sort_keys=True, ensure_ascii=False, default=str)
+		return route_flight.do(
+			flight_key,
+			lambda: self._request_route(start_location, start_lat, start_lng, target_distance, crew_type, waypoints),
+		)
+
+	def _request_route(
+		self,
+		start_location: str,
+		start_lat: float,
+		start_lng: float,
+		target_distance: float,
+		crew_type: str,
+		waypoints: Optional[List[Dict[str, Any]]],
+	) -> List[Dict[str, Any]]:
+		"""
+		Gemini로 경로를 생성합니다.
+		느린 응답에는 추가 요청을, 형식이 잘못된 응답에는 재요청을 보내고 전체 제한 시간을 지킵니다. (HedgePolicy)
+		"""
+		prompt = self._build_route_prompt(start_location, start_lat, start_lng, target_distance, crew_type, waypoints)
+
+		def attempt(remaining: float) -> List[Dict[str, Any]]:
+			try:
+				response = self.client.generate(self.route_model, prompt, timeout=min(self.request_timeout, remaining))
+			except (google_exceptions.DeadlineExceeded, TimeoutError) as e:
+				raise RouteGenerationTimeout(f"경로 추천 시간 초과: {e}")
+			return self._parse_route(response.text)
+
+		try:
+			return call_with_hedging(attempt, self.hedge_policy, stage='gemini_route')
+		except (RouteGenerationTimeout, CircuitOpenError, InvalidModelOutput):
+			raise
+		except Exception as e:
+			raise ValueError(f"경로 추천 중 오류 발생: {e}")
+
+	def stream_route(
+		self,
+		start_location: str,
+		start_lat: float,
+		start_lng: float,
+		target_distance: float,
+		crew_type: str = 'running',
+		waypoints: Optional[List[Dict[str, Any]]] = None,
+		waypoint: Optional[Dict[str, Any]] = None,
+	) -> Iterator[Dict[str, Any]]:
+		"""
+		Gemini 스트리밍 응답에서 경로 지점을 파싱되는 즉시 하나씩 반환합니다. (형식이 올바른 지점만)
+		스트림은 한 번만 요청하며 전체 제한 시간(hedge_policy.deadline)을 넘기면 RouteGenerationTimeout
+		waypoint는 이전 버전과의 호환용 (가게 1곳, waypoints=[waypoint]와 같음)
+		"""
+		waypoints = _with_legacy_waypoint(waypoints, waypoint)
+		prompt = self._build_route_prompt(start_location, start_lat, start_lng, target_distance, crew_type, waypoints)
+		deadline = time.monotonic() + self.hedge_policy.deadline
+		count = 0
+		try:
+			chunks = self.client.generate_stream(
+				self.route_model, prompt, timeout=min(self.request_timeout, self.hedge_policy.deadline),
+			)
+			for item in iter_json_array_items(chunks):
+				if time.monotonic() > deadline:
+					raise RouteGenerationTimeout(f"경로 추천 제한 시간({self.hedge_policy.deadline}초)을 초과했습니다.")
+				point = self._validate_point(item)
+				if point is not None:
+					count += 1
+					yield point
+		except (RouteGenerationTimeout, CircuitOpenError):
+			raise
+		except (google_exceptions.DeadlineExceeded, TimeoutError) as e:
+			raise RouteGenerationTimeout(f"경로 추천 시간 초과: {e}")
+		except json.JSONDecodeError as e:
+			raise InvalidModelOutput(f"JSON 파싱 오류: {e}")
+
+		if count < 2:
+			raise InvalidModelOutput("경로 지점이 부족합니다.")
+
+	@staticmethod
+	def _build_route_prompt(
+		start_location: str,
+		start_lat: float,
+		start_lng: float,
+		target_distance: float,
+		crew_type: str,
+		waypoints: Optional[List[Dict[str, Any]]],
+	) -> str:
 		# 크루 타입에 따른 프롬프트 조정
 		activity_map = {
 			'running': '러닝',
@@ -114,16 +246,15 @@ class RouteRecommendationService:
 		activity = activity_map.get(crew_type, '러닝')
 
 		waypoint_block = ""
-		if waypoint:
-			w_name = waypoint.get('name', '제휴 가게')
-			w_lat = waypoint.get('lat')
-			w_lng = waypoint.get('lng')
+		if waypoints:
+			stops = "\n".join(
+				f"{i}. name: {w.get('name', '제휴 가게')}, lat: {w.get('lat')}, lng: {w.get('lng')}"
+				for i, w in enumerate(waypoints, start=1)
+			)
 			waypoint_block = f"""
-반드시 아래 제휴 가게를 경유하세요 (정확히 이 좌표를 포함):
-- name: {w_name}
-- lat: {w_lat}
-- lng: {w_lng}
-이 지점은 JSON에 is_partner: true로 표기하세요. 그 외 지점은 is_partner: false로 표기하세요.
+반드시 아래 제휴 가게를 순서대로 경유하세요 (정확히 이 좌표를 포함):
+{stops}
+이 지점들은 JSON에 is_partner: true로 표기하세요. 그 외 지점은 is_partner: false로 표기하세요.
 """
 
 		prompt = f"""
@@ -148,37 +279,47 @@ class RouteRecommendationService:
 4. {activity}에 적합한 실제 장소를 포함하세요
 5. 무조건 주어진 JSON 형식만 반환하세요
 """
+		return prompt
 
+	@staticmethod
+	def _parse_route(text: str) -> List[Dict[str, Any]]:
+		"""
+		Gemini 응답 텍스트를 route_path로 변환합니다. 형식이 잘못되면 InvalidModelOutput
+		"""
 		try:
-			response = self.route_model.generate_content(prompt)
-			content = response.text.strip()
-			route_data = json.loads(content)
-
-			if not isinstance(route_data, list):
-				raise ValueError("응답이 리스트 형태가 아닙니다.")
-
-			validated_route: List[Dict[str, Any]] = []
-			for point in route_data:
-				if isinstance(point, dict) and 'lat' in point and 'lng' in point:
-					validated_point = {
-						'lat': float(point['lat']),
-						'lng': float(point['lng']),
-						'name': point.get('name', ''),
-						'is_partner': bool(point.get('is_partner', False)),
-					}
-					validated_route.append(validated_point)
+			route_data = json.loads(text.strip())
+		except json.JSONDecodeError as e:
+			raise InvalidModelOutput(f"JSON 파싱 오류: {e}")
 
-			# 나머지 포인트에 is_partner 키가 없으면 False로 표준화
-			for p in validated_route:
-				if 'is_partner' not in p:
-					p['is_partner'] = False
+		if not isinstance(route_data, list):
+			raise InvalidModelOutput("응답이 리스트 형태가 아닙니다.")
 
-			return validated_route
+		validated_route = [
+			point for point in map(RouteRecommendationService._validate_point, route_data) if point is not None
+		]
+		if len(validated_route) < 2:
+			raise InvalidModelOutput("경로 지점이 부족합니다.")
+		return validated_route
 
-		except json.JSONDecodeError as e:
-			raise ValueError(f"JSON 파싱 오류: {e}")
-		except Exception as e:
-			raise ValueError(f"경로 추천 중 오류 발생: {e}")
+	@staticmethod
+	def _validate_point(point: Any) -> Optional[Dict[str, Any]]:
+		"""
+		응답의 지점 하나를 {lat, lng, name, is_partner}로 표준화합니다. 올바르지 않으면 None
+		"""
+		if not isinstance(point, dict) or 'lat' not in point or 'lng' not in point:
+			return None
+		try:
+			lat, lng = float(point['lat']), float(point['lng'])
+		except (TypeError, ValueError):
+			return None
+		if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+			return None
+		return {
+			'lat': lat,
+			'lng': lng,
+			'name': point.get('name', ''),
+			'is_partner': bool(point.get('is_partner', False)),
+		}
 
 # 기존 함수는 호환성을 위해 유지
 def get_start_location(start_location: str) -> Tuple[float, float]:
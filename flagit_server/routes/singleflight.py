@@ -0,0 +1,170 @@
+import copy
+import hashlib
+import importlib
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import route_counters
+
+class _Call:
+	def __init__(self):
+		self.event = threading.Event()
+		self.result = None
+		self.error: Optional[BaseException] = None
+
+def _error_outcome(error: Exception):
+	# 다른 프로세스에서 같은 예외 타입으로 다시 만들 수 있도록 (클래스 경로, 메시지)로 저장
+	cls = type(error)
+	return 'error', (f'{cls.__module__}:{cls.__qualname__}', str(error))
+
+def _restore_error(value) -> Exception:
+	"""
+	_error_outcome으로 저장한 예외를 원래 타입으로 되살립니다. (되살릴 수 없으면 ValueError)
+	"""
+	if not isinstance(value, (tuple, list)) or len(value) != 2:
+		return ValueError(str(value))
+	path, message = value
+	try:
+		module_name, qualname = path.split(':', 1)
+		cls: Any = importlib.import_module(module_name)
+		for attr in qualname.split('.'):
+			cls = getattr(cls, attr)
+		if isinstance(cls, type) and issubclass(cls, Exception):
+			return cls(message)
+	except Exception:
+		pass
+	return ValueError(message)
+
+class SingleFlight:
+	"""
+	같은 키로 동시에 들어온 호출을 하나의 실제 호출로 합칩니다. (프로세스 내)
+	먼저 들어온 호출(leader)만 fn을 실행하고, 나머지는 그 결과(또는 예외)를 함께 받습니다.
+	"""
+
+	def __init__(self, name: str):
+		self.name = name
+		self._calls: Dict[str, _Call] = {}
+		self._lock = threading.Lock()
+
+	def do(self, key: str, fn: Callable[[], Any]) -> Any:
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+
+		if not leader:
+			route_counters.incr(f'{self.name}_coalesced')
+			call.event.wait()
+			if call.error is not None:
+				raise call.error
+			return copy.deepcopy(call.result)
+
+		route_counters.incr(f'{self.name}_calls')
+		try:
+			call.result = fn()
+			# leader도 복사본을 받아, 결과를 고쳐도 다른 호출자의 결과가 바뀌지 않게 함
+			return copy.deepcopy(call.result)
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.event.set()
+
+class CacheSingleFlight:
+	"""
+	Django 캐시를 통해 여러 프로세스 사이에서 같은 키의 호출을 합칩니다.
+	cache.add로 잠금을 잡은 프로세스만 실행하고, 나머지는 결과가 캐시에 올라올 때까지 기다립니다.
+	잠금 값은 실행마다 새로 만든 토큰이고 결과도 토큰별 키에 저장하므로, 기다리는 쪽은 이전 실행의 결과를 읽지 않습니다.
+	(프로세스 간 공유되는 캐시 백엔드(Redis, DB 캐시 등)에서만 의미가 있습니다)
+	"""
+
+	def __init__(self, name: str, cache_alias: str, lock_timeout: float = 30.0,
+				 result_ttl: float = 10.0, poll_interval: float = 0.05):
+		self.name = name
+		self.cache_alias = cache_alias
+		self.lock_timeout = lock_timeout
+		self.result_ttl = result_ttl
+		self.poll_interval = poll_interval
+
+	def _base(self, key: str) -> str:
+		digest = hashlib.sha1(key.encode()).hexdigest()
+		return f"singleflight:{self.name}:{digest}"
+
+	def do(self, key: str, fn: Callable[[], Any]) -> Any:
+		cache = caches[self.cache_alias]
+		base = self._base(key)
+		lock_key = f"{base}:lock"
+		token = uuid.uuid4().hex
+
+		deadline = time.monotonic() + self.lock_timeout
+		while not cache.add(lock_key, token, timeout=self.lock_timeout):
+			# 다른 프로세스가 실행 중 -> 그 실행(토큰)의 결과 대기
+			flight = cache.get(lock_key)
+			outcome = self._wait(cache, base, flight, deadline) if flight is not None else None
+			if outcome is not None:
+				route_counters.incr(f'{self.name}_coalesced_remote')
+				kind, value = outcome
+				if kind == 'error':
+					raise _restore_error(value)
+				return value
+			if time.monotonic() >= deadline:
+				# 잠금을 잡은 프로세스가 응답이 없으면 직접 실행
+				return fn()
+			# 앞선 실행이 결과를 남기지 못하고 끝남 -> 다시 잠금 시도
+
+		result_key = f"{base}:result:{token}"
+		try:
+			result = fn()
+		except Exception as e:
+			cache.set(result_key, _error_outcome(e), timeout=self.result_ttl)
+			raise
+		else:
+			cache.set(result_key, ('ok', result), timeout=self.result_ttl)
+			return result
+		finally:
+			# 잠금이 만료되어 다른 실행이 잡았으면 그 잠금은 지우지 않음
+			if cache.get(lock_key) == token:
+				cache.delete(lock_key)
+
+	def _wait(self, cache, base: str, flight: str, deadline: float):
+		"""
+		flight 토큰 실행의 결과 -> ('ok' | 'error', 값), 결과 없이 끝났거나 deadline이 지나면 None
+		"""
+		lock_key, result_key = f"{base}:lock", f"{base}:result:{flight}"
+		while True:
+			outcome = cache.get(result_key)
+			if outcome is not None:
+				return outcome
+			if cache.get(lock_key) != flight:
+				# 결과는 잠금을 풀기 전에 저장되므로 한 번 더 확인
+				return cache.get(result_key)
+			if time.monotonic() >= deadline:
+				return None
+			time.sleep(self.poll_interval)
+
+class LayeredSingleFlight:
+	"""
+	프로세스 내 합치기 뒤에 (설정된 경우) 프로세스 간 합치기를 적용합니다.
+	"""
+
+	def __init__(self, name: str):
+		self.local = SingleFlight(name)
+		cache_alias = getattr(settings, 'ROUTE_SINGLEFLIGHT_CACHE', '')
+		self.remote = CacheSingleFlight(name, cache_alias) if cache_alias else None
+
+	def do(self, key: str, fn: Callable[[], Any]) -> Any:
+		if self.remote is None:
+			return self.local.do(key, fn)
+		return self.local.do(key, lambda: self.remote.do(key, fn))
+
+# 위치 변환 / 경로 추천 호출 합치기 (프로세스 단위)
+geocode_flight = LayeredSingleFlight('geocode')
+route_flight = LayeredSingleFlight('route')
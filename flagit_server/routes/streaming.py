@@ -0,0 +1,82 @@
+import json
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+def iter_json_array_items(chunks: Iterable[str]) -> Iterator[Any]:
+	"""
+	조각(chunk)으로 나뉘어 도착하는 JSON 배열 텍스트에서 원소를 완성되는 즉시 하나씩 반환합니다.
+	- 배열 앞뒤의 공백/코드 블록 표시(```json)는 무시
+	- 배열이 아니거나 문법이 잘못된 경우 json.JSONDecodeError
+	"""
+	buffer = ''
+	pos = 0
+	started = False
+	finished = False
+
+	for chunk in chunks:
+		if finished:
+			continue
+		buffer += chunk
+
+		if not started:
+			index = buffer.find('[')
+			if index < 0:
+				continue
+			if buffer[:index].strip(_WHITESPACE + '`json'):
+				raise json.JSONDecodeError("JSON 배열이 아닙니다.", buffer, 0)
+			pos = index + 1
+			started = True
+
+		while True:
+			while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ','):
+				pos += 1
+			if pos >= len(buffer):
+				break
+			if buffer[pos] == ']':
+				finished = True
+				break
+			try:
+				item, end = _decoder.raw_decode(buffer, pos)
+			except json.JSONDecodeError:
+				# 원소가 아직 다 도착하지 않음
+				break
+			if not isinstance(item, (dict, list)) and (end == len(buffer) or buffer[end] not in _WHITESPACE + ',]'):
+				# 숫자 등은 구분자가 올 때까지 뒤에 이어지는 조각이 있을 수 있음
+				break
+			yield item
+			pos = end
+
+		# 이미 처리한 앞부분은 버림
+		if pos > 4096:
+			buffer = buffer[pos:]
+			pos = 0
+
+	if not started:
+		raise json.JSONDecodeError("JSON 배열이 아닙니다.", buffer, 0)
+	if not finished:
+		raise json.JSONDecodeError("JSON 배열이 끝나지 않았습니다.", buffer, pos)
+
+def sse_event(event: str, data: Any) -> str:
+	"""
+	server-sent events 형식의 이벤트 하나
+	"""
+	return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+async def aiter_sync(iterator: Iterable[Any]) -> AsyncIterator[Any]:
+	"""
+	동기 제너레이터를 ASGI 응답용 비동기 이터레이터로 감쌉니다.
+	(StreamingHttpResponse는 ASGI에서 동기 이터레이터를 끝까지 모은 뒤 보내므로 조각 단위로 넘김)
+	DB 접근이 있으므로 요청 단위의 같은 동기 스레드에서 실행합니다.
+	"""
+	iterator = iter(iterator)
+	sentinel = object()
+	step = sync_to_async(next, thread_sensitive=True)
+	while True:
+		item = await step(iterator, sentinel)
+		if item is sentinel:
+			break
+		yield item
@@ -1,3 +1,954 @@
-from django.test import TestCase
+import json
+import math
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from crew.models import Crew, CrewMember
+from stores.index import StoreIndex
+from stores.models import Store
+from .batch import recommend_routes_batch
+from .engines import FALLBACK_ERRORS, LoopRouteEngine, generate_route
+from .formats import (
+	PATH_FORMAT_GEOJSON,
+	PATH_FORMAT_POLYLINE,
+	decode_polyline,
+	encode_polyline,
+	format_route_path,
+)
+from .geometry import RouteValidationError, cheapest_insertion, fit_route_to_distance, path_length_km
+from .jobs import ImmediateJobBackend, enqueue_route_job, run_route_job
+from .hedging import HedgePolicy, call_with_hedging
+from .llm import CircuitBreaker, CircuitOpenError, InvalidModelOutput, RouteGenerationTimeout
+from .metrics import LatencyRecorder
+from .models import Route, RouteJob
+from .pipeline import RouteRecommendation, recommend_and_save_route
+from .services import RouteRecommendationService
+from .waypoints import WaypointPlanner
+from .route_cache import build_cache_key, lookup_cached_route, reset_cache_policy, snap_to_grid
+from .singleflight import CacheSingleFlight, SingleFlight, _error_outcome, _restore_error
+from .streaming import iter_json_array_items
+
+START = (37.5665, 126.9780)
+
+
+def square_route(side_m, partner=False):
+	# 시작점에서 출발해 시작점으로 돌아오는 정사각형 경로 (한 변 side_m)
+	lat, lng = START
+	dlat = side_m / 111195.0
+	dlng = side_m / (111195.0 * math.cos(math.radians(lat)))
+	corners = [(lat, lng), (lat + dlat, lng), (lat + dlat, lng + dlng), (lat, lng + dlng), (lat, lng)]
+	route = [{'lat': a, 'lng': b, 'name': '', 'is_partner': False} for a, b in corners]
+	if partner:
+		route[2].update(name='제휴 가게', is_partner=True)
+	return route
+
+class FitRouteToDistanceTests(SimpleTestCase):
+	def test_keeps_route_within_tolerance(self):
+		route = square_route(1000)
+		fitted, length = fit_route_to_distance(route, *START, target_km=4.1, tolerance=0.1)
+
+		self.assertEqual(fitted, route)
+		self.assertAlmostEqual(length, path_length_km(route), places=3)
+
+	def test_rescales_to_target_distance(self):
+		fitted, length = fit_route_to_distance(square_route(1000), *START, target_km=6.0, tolerance=0.05)
+
+		self.assertLessEqual(abs(length - 6.0), 6.0 * 0.05)
+		self.assertAlmostEqual(path_length_km(fitted), length, places=2)
+		self.assertEqual((fitted[0]['lat'], fitted[0]['lng']), START)
+		self.assertEqual((fitted[-1]['lat'], fitted[-1]['lng']), START)
+
+	def test_partner_points_stay_in_place(self):
+		route = square_route(1000, partner=True)
+		fitted, _ = fit_route_to_distance(route, *START, target_km=5.0, tolerance=0.05)
+
+		partner = [point for point in fitted if point['is_partner']]
+		self.assertEqual(len(partner), 1)
+		self.assertEqual((partner[0]['lat'], partner[0]['lng']), (route[2]['lat'], route[2]['lng']))
+
+	def test_closes_open_route(self):
+		route = square_route(1000)[1:-1]
+		fitted, _ = fit_route_to_distance(route, *START, target_km=4.0, tolerance=0.1)
+
+		self.assertEqual(len(fitted), len(route) + 2)
+		self.assertEqual((fitted[0]['lat'], fitted[0]['lng']), START)
+		self.assertEqual((fitted[-1]['lat'], fitted[-1]['lng']), START)
+
+	def test_rejects_invalid_routes(self):
+		with self.assertRaises(RouteValidationError):
+			fit_route_to_distance(square_route(100), *START, target_km=20.0)
+		with self.assertRaises(RouteValidationError):
+			fit_route_to_distance([{'lat': 95.0, 'lng': 0.0}, {'lat': 0.0, 'lng': 0.0}], *START, target_km=1.0)
+		with self.assertRaises(RouteValidationError):
+			fit_route_to_distance([{'lat': START[0], 'lng': START[1]}], *START, target_km=1.0)
+
+class CheapestInsertionTests(SimpleTestCase):
+	def setUp(self):
+		self.loop = np.array([[0, 0], [100, 0], [100, 100], [0, 100], [0, 0]], dtype=float)
+
+	def test_inserts_stop_on_cheapest_segment(self):
+		loop, inserted = cheapest_insertion(self.loop, np.array([[50, -10]]))
+
+		self.assertEqual(loop.tolist()[:3], [[0, 0], [50, -10], [100, 0]])
+		self.assertEqual(len(loop), 6)
+		(stop, detour), = inserted
+		self.assertEqual(stop, 0)
+		self.assertAlmostEqual(detour, 2 * math.hypot(50, 10) - 100)
+
+	def test_returns_stops_in_route_order(self):
+		stops = np.array([[50, 110], [50, -5], [110, 50]])
+		loop, inserted = cheapest_insertion(self.loop, stops)
+
+		self.assertEqual([stop for stop, _ in inserted], [1, 2, 0])
+		self.assertEqual(len(loop), len(self.loop) + 3)
+
+	def test_respects_max_stops_and_max_detour(self):
+		stops = np.array([[50, -1], [50, -500]])
+
+		_, inserted = cheapest_insertion(self.loop, stops, max_stops=1)
+		self.assertEqual([stop for stop, _ in inserted], [0])
+
+		loop, inserted = cheapest_insertion(self.loop, stops, max_detour=100)
+		self.assertEqual([stop for stop, _ in inserted], [0])
+		self.assertEqual(len(loop), len(self.loop) + 1)
+
+class CircuitBreakerTests(SimpleTestCase):
+	def setUp(self):
+		self.now = 1000.0
+		patcher = mock.patch('routes.llm.time.monotonic', side_effect=lambda: self.now)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+
+	def fail(self, times):
+		for _ in range(times):
+			self.breaker.before_call()
+			self.breaker.record_failure()
+
+	def test_opens_after_consecutive_failures(self):
+		self.fail(2)
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+		self.fail(1)
+		self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+		with self.assertRaises(CircuitOpenError):
+			self.breaker.before_call()
+		self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+	def test_success_resets_failure_count(self):
+		self.fail(2)
+		self.breaker.before_call()
+		self.breaker.record_success()
+		self.fail(2)
+
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+		self.assertEqual(self.breaker.failures, 2)
+
+	def test_half_open_allows_one_trial(self):
+		self.fail(3)
+		self.now += 30.0
+
+		self.breaker.before_call()
+		self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+		with self.assertRaises(CircuitOpenError):
+			self.breaker.before_call()
+
+		self.breaker.record_success()
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+		self.breaker.before_call()
+
+	def test_failed_trial_reopens(self):
+		self.fail(3)
+		self.now += 30.0
+		self.breaker.before_call()
+		self.breaker.record_failure()
+
+		self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+		self.now += 29.0
+		with self.assertRaises(CircuitOpenError):
+			self.breaker.before_call()
+
+	def test_cancelled_trial_can_be_retried(self):
+		self.fail(3)
+		self.now += 30.0
+		self.breaker.before_call()
+		self.breaker.cancel_trial()
+
+		self.breaker.before_call()
+		self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+class IterJsonArrayItemsTests(SimpleTestCase):
+	TEXT = '```json\n[{"lat": 37.5, "lng": 127.0, "name": "가게, [1]"}, [1, 2], 12.5, "끝"]\n```'
+	EXPECTED = [{'lat': 37.5, 'lng': 127.0, 'name': '가게, [1]'}, [1, 2], 12.5, '끝']
+
+	def test_every_chunk_split_yields_same_items(self):
+		for size in range(1, len(self.TEXT) + 1):
+			chunks = [self.TEXT[i:i + size] for i in range(0, len(self.TEXT), size)]
+			self.assertEqual(list(iter_json_array_items(chunks)), self.EXPECTED, size)
+
+	def test_yields_items_before_array_ends(self):
+		items = iter_json_array_items(iter(['[{"a": 1},', ' {"b"', ': 2}', ']']))
+
+		self.assertEqual(next(items), {'a': 1})
+		self.assertEqual(next(items), {'b': 2})
+		self.assertEqual(list(items), [])
+
+	def test_number_split_across_chunks(self):
+		self.assertEqual(list(iter_json_array_items(['[12', '34, 5', '6]'])), [1234, 56])
+
+	def test_rejects_non_array_and_unfinished_input(self):
+		for chunks in (['{"a": 1}'], ['설명: [1]'], ['[1, 2'], ['[{"a": ', '1}'], []):
+			with self.assertRaises(json.JSONDecodeError, msg=chunks):
+				list(iter_json_array_items(chunks))
+
+class PolylineTests(SimpleTestCase):
+	# Google encoded polyline 문서의 예시
+	REFERENCE_COORDS = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+	REFERENCE = '_p~iF~ps|U_ulLnnqC_mqNvxq`@'
+
+	def test_encodes_reference_vector(self):
+		self.assertEqual(encode_polyline(np.array(self.REFERENCE_COORDS)), self.REFERENCE)
+
+	def test_decodes_reference_vector(self):
+		decoded = decode_polyline(self.REFERENCE)
+
+		self.assertEqual(len(decoded), 3)
+		for (lat, lng), (expected_lat, expected_lng) in zip(decoded, self.REFERENCE_COORDS):
+			self.assertAlmostEqual(lat, expected_lat, places=5)
+			self.assertAlmostEqual(lng, expected_lng, places=5)
+
+	def test_round_trip_keeps_five_decimals(self):
+		route = square_route(1234)
+		coords = [[point['lat'], point['lng']] for point in route]
+		decoded = decode_polyline(encode_polyline(np.array(coords)))
+
+		self.assertEqual(len(decoded), len(coords))
+		for (lat, lng), (expected_lat, expected_lng) in zip(decoded, coords):
+			self.assertLessEqual(abs(lat - expected_lat), 0.5e-5 + 1e-9)
+			self.assertLessEqual(abs(lng - expected_lng), 0.5e-5 + 1e-9)
+
+	def test_empty_path(self):
+		self.assertEqual(encode_polyline(np.empty((0, 2))), '')
+		self.assertEqual(decode_polyline(''), [])
+
+	def test_format_route_path(self):
+		route = square_route(1000, partner=True)
+
+		polyline = format_route_path(route, PATH_FORMAT_POLYLINE)
+		self.assertEqual(len(decode_polyline(polyline['route_polyline'])), len(route))
+		self.assertEqual([point['name'] for point in polyline['route_points']], ['제휴 가게'])
+
+		geojson = format_route_path(route, PATH_FORMAT_GEOJSON)['route_geojson']
+		self.assertEqual(geojson['geometry']['type'], 'LineString')
+		self.assertEqual(geojson['geometry']['coordinates'][0], [route[0]['lng'], route[0]['lat']])
+
+class CallWithHedgingTests(SimpleTestCase):
+	def setUp(self):
+		self.calls = []
+		self.release = threading.Event()
+		# 버려진 느린 호출이 스레드 풀에 남지 않도록
+		self.addCleanup(self.release.set)
+
+	def call(self, behaviours, **policy):
+		# behaviours[i]: i번째 호출이 (기다릴 시간, 결과 또는 예외)
+		def attempt(remaining):
+			index = len(self.calls)
+			self.calls.append(remaining)
+			delay, outcome = behaviours[min(index, len(behaviours) - 1)]
+			self.release.wait(delay)
+			if isinstance(outcome, BaseException):
+				raise outcome
+			return outcome
+
+		policy = HedgePolicy(**{'hedge_after': None, 'max_attempts': 3, 'deadline': 5.0, **policy})
+		return call_with_hedging(attempt, policy, stage='test', recorder=LatencyRecorder())
+
+	def test_slow_attempt_is_hedged(self):
+		started = time.monotonic()
+		result = self.call([(5.0, 'slow'), (0.0, 'fast')], hedge_after=0.1)
+
+		self.assertEqual(result, 'fast')
+		self.assertEqual(len(self.calls), 2)
+		self.assertLess(time.monotonic() - started, 1.0)
+
+	def test_fast_attempt_is_not_hedged(self):
+		self.assertEqual(self.call([(0.0, 'ok')], hedge_after=0.5), 'ok')
+		self.assertEqual(len(self.calls), 1)
+
+	def test_retries_invalid_output_and_timeouts(self):
+		behaviours = [(0.0, InvalidModelOutput('형식 오류')), (0.0, RouteGenerationTimeout('시간 초과')), (0.0, 'ok')]
+
+		self.assertEqual(self.call(behaviours), 'ok')
+		self.assertEqual(len(self.calls), 3)
+
+	def test_stops_after_max_attempts(self):
+		with self.assertRaises(InvalidModelOutput):
+			self.call([(0.0, InvalidModelOutput('형식 오류'))], max_attempts=2)
+		self.assertEqual(len(self.calls), 2)
+
+	def test_other_errors_are_not_retried(self):
+		with self.assertRaises(CircuitOpenError):
+			self.call([(0.0, CircuitOpenError('열림'))])
+		self.assertEqual(len(self.calls), 1)
+
+	def test_deadline_exceeded(self):
+		started = time.monotonic()
+		with self.assertRaises(RouteGenerationTimeout):
+			self.call([(5.0, 'slow')], deadline=0.2)
+
+		self.assertLess(time.monotonic() - started, 1.0)
+		self.assertLessEqual(self.calls[0], 0.2)
+
+	def test_retry_is_hedged_from_its_own_start(self):
+		# 재요청(0.2초에 보냄)은 0.6초에야 hedge 기준을 넘으므로, 0.5초에 끝나면 추가 요청이 없음
+		result = self.call([(0.2, InvalidModelOutput('형식 오류')), (0.3, 'ok'), (0.0, 'hedged')], hedge_after=0.4)
+
+		self.assertEqual(result, 'ok')
+		self.assertEqual(len(self.calls), 2)
+
+def run_threads(count, target):
+	# count개 스레드에서 target()을 실행 -> 결과 또는 예외 목록
+	results = [None] * count
+
+	def run(i):
+		try:
+			results[i] = target()
+		except Exception as e:
+			results[i] = e
+
+	threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(5)
+	return results
+
+class SingleFlightTests(SimpleTestCase):
+	def setUp(self):
+		self.flight = SingleFlight('test')
+		self.calls = 0
+		self.release = threading.Event()
+		self.addCleanup(self.release.set)
+
+	def slow(self, outcome):
+		# 다른 스레드가 모두 들어올 때까지 끝나지 않는 호출
+		def fn():
+			self.calls += 1
+			self.release.wait(5)
+			if isinstance(outcome, BaseException):
+				raise outcome
+			return {'points': [1, 2, 3]}
+		return fn
+
+	def release_later(self):
+		threading.Timer(0.2, self.release.set).start()
+
+	def test_concurrent_callers_share_one_call(self):
+		self.release_later()
+		results = run_threads(8, lambda: self.flight.do('key', self.slow(None)))
+
+		self.assertEqual(self.calls, 1)
+		self.assertEqual(results, [{'points': [1, 2, 3]}] * 8)
+
+	def test_callers_get_isolated_copies(self):
+		self.release_later()
+		results = run_threads(4, lambda: self.flight.do('key', self.slow(None)))
+		results[0]['points'].append(4)
+
+		self.assertEqual([result['points'] for result in results[1:]], [[1, 2, 3]] * 3)
+
+	def test_error_reaches_every_caller(self):
+		self.release_later()
+		results = run_threads(4, lambda: self.flight.do('key', self.slow(InvalidModelOutput('형식 오류'))))
+
+		self.assertEqual(self.calls, 1)
+		self.assertTrue(all(isinstance(result, InvalidModelOutput) for result in results))
+
+	def test_later_call_runs_again(self):
+		self.release.set()
+		self.flight.do('key', self.slow(None))
+		self.flight.do('key', self.slow(None))
+
+		self.assertEqual(self.calls, 2)
+
+class RestoreErrorTests(SimpleTestCase):
+	def test_restores_original_type(self):
+		kind, value = _error_outcome(RouteGenerationTimeout('시간 초과'))
+		error = _restore_error(value)
+
+		self.assertEqual(kind, 'error')
+		self.assertIsInstance(error, RouteGenerationTimeout)
+		self.assertEqual(str(error), '시간 초과')
+
+	def test_unknown_type_falls_back_to_value_error(self):
+		for value in (('routes.missing:Error', '메시지'), ('builtins:len', '메시지'), '메시지'):
+			error = _restore_error(value)
+			self.assertIs(type(error), ValueError)
+			self.assertEqual(str(error), '메시지')
+
+@override_settings(CACHES={'flight': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'flight'}})
+class CacheSingleFlightTests(SimpleTestCase):
+	def setUp(self):
+		self.flight = CacheSingleFlight('test', 'flight', lock_timeout=5.0, poll_interval=0.01)
+		caches['flight'].clear()
+		self.calls = []
+		self.release = threading.Event()
+		self.addCleanup(self.release.set)
+
+	def fn(self, value):
+		def run():
+			self.calls.append(value)
+			self.release.wait(5)
+			if isinstance(value, BaseException):
+				raise value
+			return value
+		return run
+
+	def test_concurrent_callers_share_one_call(self):
+		threading.Timer(0.2, self.release.set).start()
+		results = run_threads(6, lambda: self.flight.do('key', self.fn('route')))
+
+		self.assertEqual(len(self.calls), 1)
+		self.assertEqual(results, ['route'] * 6)
+
+	def test_error_keeps_type_across_callers(self):
+		threading.Timer(0.2, self.release.set).start()
+		results = run_threads(4, lambda: self.flight.do('key', self.fn(InvalidModelOutput('형식 오류'))))
+
+		self.assertEqual(len(self.calls), 1)
+		self.assertTrue(all(isinstance(result, InvalidModelOutput) for result in results))
+
+	def test_waiter_does_not_read_previous_result(self):
+		# 이전 실행의 결과가 result_ttl 동안 남아 있어도, 진행 중인 다른 실행의 결과만 기다림
+		self.release.set()
+		self.assertEqual(self.flight.do('key', self.fn('first')), 'first')
+
+		# 다른 프로세스가 잠금을 잡고 아직 결과를 남기지 않은 상태
+		caches['flight'].add(f"{self.flight._base('key')}:lock", 'other-flight')
+		self.flight.lock_timeout = 0.2
+		self.assertEqual(self.flight.do('key', self.fn('second')), 'second')
+		self.assertEqual(self.calls, ['first', 'second'])
+
+	def test_waiter_reads_result_of_running_flight(self):
+		self.release.set()
+		self.flight.do('key', self.fn('first'))
+
+		self.release.clear()
+		leader = threading.Thread(target=self.flight.do, args=('key', self.fn('second')))
+		leader.start()
+		while len(self.calls) < 2:
+			time.sleep(0.01)
+		threading.Timer(0.1, self.release.set).start()
+		waited = self.flight.do('key', self.fn('third'))
+		leader.join(5)
+
+		self.assertEqual(waited, 'second')
+		self.assertEqual(self.calls, ['first', 'second'])
+
+class LoopRouteEngineTests(SimpleTestCase):
+	TOLERANCE = 0.02
+
+	def setUp(self):
+		self.engine = LoopRouteEngine(tolerance=self.TOLERANCE)
+
+	def waypoint(self, north_m, east_m, name):
+		lat, lng = START
+		return {
+			'lat': lat + north_m / 111195.0,
+			'lng': lng + east_m / (111195.0 * math.cos(math.radians(lat))),
+			'name': name,
+		}
+
+	def assert_loop(self, route, target_km):
+		self.assertLessEqual(abs(path_length_km(route) - target_km), target_km * self.TOLERANCE)
+		self.assertEqual((route[0]['lat'], route[0]['lng']), START)
+		self.assertEqual((route[-1]['lat'], route[-1]['lng']), START)
+
+	def test_loop_matches_target_distance(self):
+		for crew_type in ('running', 'hiking', 'riding'):
+			for target_km in (1.0, 5.0, 21.1):
+				route = self.engine.generate('시청', *START, target_km, crew_type)
+				self.assert_loop(route, target_km)
+				self.assertFalse(any(point['is_partner'] for point in route))
+
+	def test_same_input_gives_same_route(self):
+		self.assertEqual(self.engine.generate('시청', *START, 5.0), self.engine.generate('시청', *START, 5.0))
+
+	def test_single_waypoint_is_kept(self):
+		waypoint = self.waypoint(800, 300, '제휴 가게')
+		route = self.engine.generate('시청', *START, 5.0, waypoints=[waypoint])
+
+		self.assert_loop(route, 5.0)
+		partners = [point for point in route if point['is_partner']]
+		self.assertEqual(partners, [{'lat': waypoint['lat'], 'lng': waypoint['lng'], 'name': '제휴 가게', 'is_partner': True}])
+
+	def test_multiple_waypoints_are_kept(self):
+		waypoints = [self.waypoint(600, 0, '가게 1'), self.waypoint(0, 700, '가게 2'), self.waypoint(-500, -400, '가게 3')]
+		route = self.engine.generate('시청', *START, 8.0, waypoints=waypoints)
+
+		self.assert_loop(route, 8.0)
+		partners = {(point['lat'], point['lng']): point['name'] for point in route if point['is_partner']}
+		self.assertEqual(partners, {(w['lat'], w['lng']): w['name'] for w in waypoints})
+
+	def test_far_waypoint_uses_shortest_loop(self):
+		# 목표 거리로는 닿을 수 없는 경유지 -> 경유지를 지나는 가장 짧은 원
+		waypoint = self.waypoint(3000, 0, '먼 가게')
+		route = self.engine.generate('시청', *START, 2.0, waypoints=[waypoint])
+
+		self.assertGreater(path_length_km(route), 6.0)
+		self.assertEqual(sum(point['is_partner'] for point in route), 1)
+
+	def test_rejects_non_positive_distance(self):
+		with self.assertRaises(ValueError):
+			self.engine.generate('시청', *START, 0)
+
+@override_settings(ROUTE_ENGINE_DEFAULT='gemini', ROUTE_ENGINE_FALLBACK='loop')
+class GenerateRouteFallbackTests(SimpleTestCase):
+	def service(self, result):
+		service = mock.Mock()
+		if isinstance(result, BaseException):
+			service.recommend_route.side_effect = result
+		else:
+			service.recommend_route.return_value = result
+		return service
+
+	def test_falls_back_to_loop_engine(self):
+		for error_cls in FALLBACK_ERRORS:
+			with self.assertLogs('routes.engines', 'WARNING'):
+				route, engine, length = generate_route('시청', START, 5.0, service=self.service(error_cls('실패')))
+
+			self.assertEqual(engine, 'loop', error_cls)
+			self.assertLessEqual(abs(length - 5.0), 5.0 * 0.1)
+			self.assertEqual((route[0]['lat'], route[0]['lng']), START)
+
+	def test_unfittable_route_falls_back(self):
+		# 목표 거리보다 훨씬 짧은 경로는 보정하지 않고 RouteValidationError -> 대체 엔진
+		with self.assertLogs('routes.engines', 'WARNING'):
+			_, engine, _ = generate_route('시청', START, 20.0, service=self.service(square_route(100)))
+		self.assertEqual(engine, 'loop')
+
+	def test_uses_gemini_route_when_valid(self):
+		route, engine, length = generate_route('시청', START, 4.0, service=self.service(square_route(1000)))
+
+		self.assertEqual(engine, 'gemini')
+		self.assertEqual(route, square_route(1000))
+		self.assertAlmostEqual(length, path_length_km(route), places=3)
+
+	def test_other_errors_are_not_replaced(self):
+		with self.assertRaises(RuntimeError):
+			generate_route('시청', START, 5.0, service=self.service(RuntimeError('버그')))
+
+	def test_no_fallback_configured(self):
+		with override_settings(ROUTE_ENGINE_FALLBACK=''):
+			with self.assertRaises(CircuitOpenError):
+				generate_route('시청', START, 5.0, service=self.service(CircuitOpenError('열림')))
+
+@override_settings(ROUTE_CACHE_GRID_METERS=200, ROUTE_CACHE_DISTANCE_STEP_KM=0.5)
+class RouteCacheKeyTests(SimpleTestCase):
+	def offset(self, north_m, east_m):
+		lat, lng = START
+		return lat + north_m / 111195.0, lng + east_m / (111195.0 * math.cos(math.radians(lat)))
+
+	def key(self, coords=START, distance=5.0, crew_type='running', waypoints=None, engine='gemini'):
+		return build_cache_key(*coords, distance, crew_type, waypoints, engine)
+
+	def test_snap_to_grid_cell_size(self):
+		cell = snap_to_grid(*START, 200)
+		neighbours = {snap_to_grid(*self.offset(dy, dx), 200) for dy in (-300, 0, 300) for dx in (-300, 0, 300)}
+
+		self.assertEqual(len(neighbours), 9)
+		self.assertIn(cell, neighbours)
+
+	def test_nearby_starts_share_key(self):
+		# 셀 안의 좌표는 모두 같은 키 (셀 경계에 걸리지 않도록 셀 중심 기준으로 확인)
+		lat_step = 200 / 111195.0
+		center_lat = (math.floor(START[0] / lat_step) + 0.5) * lat_step
+		lng_step = lat_step / math.cos(math.radians(center_lat))
+		center = (center_lat, (math.floor(START[1] / lng_step) + 0.5) * lng_step)
+		moved = (center[0] + 0.3 * lat_step, center[1] - 0.3 * lng_step)
+
+		self.assertEqual(self.key(center), self.key(moved))
+		self.assertNotEqual(self.key(center), self.key((center[0] + lat_step, center[1])))
+
+	def test_distance_buckets(self):
+		self.assertEqual(self.key(distance=4.9), self.key(distance=5.1))
+		self.assertNotEqual(self.key(distance=5.0), self.key(distance=5.4))
+
+	def test_other_parts_change_key(self):
+		stops = [{'store_id': 1}, {'store_id': 2}]
+		base = self.key(waypoints=stops)
+
+		self.assertNotEqual(base, self.key(waypoints=stops[::-1]))
+		self.assertNotEqual(base, self.key(waypoints=stops, crew_type='hiking'))
+		self.assertNotEqual(base, self.key(waypoints=stops, engine='loop'))
+		self.assertNotEqual(self.key(), self.key(waypoints=stops[:1]))
+
+def create_crew_member(n, crew_type='running'):
+	user = get_user_model().objects.create_user(email=f'runner{n}@example.com', nickname=f'runner{n}', password='pw')
+	crew = Crew.objects.create(leader=user, crewname=f'크루 {n}', crew_type=crew_type)
+	return CrewMember.objects.create(crew=crew, user=user)
+
+@override_settings(ROUTE_CACHE_ENABLED=True, ROUTE_CACHE_TTL_SECONDS=3600)
+class RouteCacheTests(TestCase):
+	def setUp(self):
+		reset_cache_policy()
+		self.addCleanup(reset_cache_policy)
+		patcher = mock.patch('routes.pipeline.plan_waypoints', return_value=[])
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.service = mock.Mock()
+
+	def recommend(self, crew_member, **kwargs):
+		return recommend_and_save_route(
+			crew_member, '시청', 5.0, service=self.service, start_coords=START, engine='loop', **kwargs,
+		)
+
+	def test_lookup_respects_ttl(self):
+		route = Route.objects.create(crew_type='running', start_location='시청', target_distance=5.0, cache_key='k')
+		self.assertEqual(lookup_cached_route('k'), route)
+
+		Route.objects.filter(pk=route.pk).update(created_at=timezone.now() - timedelta(seconds=3601))
+		self.assertIsNone(lookup_cached_route('k'))
+
+	def test_lookup_disabled_by_policy(self):
+		Route.objects.create(crew_type='running', start_location='시청', target_distance=5.0, cache_key='k')
+		with override_settings(ROUTE_CACHE_ENABLED=False):
+			reset_cache_policy()
+			self.assertIsNone(lookup_cached_route('k'))
+
+	def test_cached_route_is_copied_for_requester(self):
+		first_member, second_member = create_crew_member(1), create_crew_member(2)
+		first = self.recommend(first_member)
+		second = self.recommend(second_member)
+
+		self.assertFalse(first.cached)
+		self.assertTrue(second.cached)
+		self.assertNotEqual(second.route.route_id, first.route.route_id)
+		self.assertEqual(second.route.crew_member, second_member)
+		self.assertEqual(second.route_path, first.route_path)
+		self.assertIsNone(second.route.cache_key)
+		# 원본은 그대로 캐시로 남음
+		first.route.refresh_from_db()
+		self.assertEqual(first.route.crew_member, first_member)
+		self.assertEqual(lookup_cached_route(first.route.cache_key), first.route)
+
+	def test_force_refresh_generates_new_route(self):
+		member = create_crew_member(1)
+		first = self.recommend(member)
+		refreshed = self.recommend(member, force_refresh=True)
+
+		self.assertFalse(refreshed.cached)
+		self.assertIsNotNone(refreshed.route.cache_key)
+		self.assertEqual(Route.objects.filter(cache_key=first.route.cache_key).count(), 2)
+
+	def test_pregenerated_hit_returns_cached_route(self):
+		first = self.recommend(None, crew_type='running')
+		again = self.recommend(None, crew_type='running')
+
+		self.assertTrue(again.cached)
+		self.assertEqual(again.route.route_id, first.route.route_id)
+
+class RouteSpatialQueryTests(TestCase):
+	"""
+	RouteQuerySet.near/within_bbox: bbox 겹침으로 거른 뒤 실제 경로선까지의 거리/교차로 확인
+	"""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.square = Route.objects.create(crew_type='running', start_location='시청', target_distance=4.0, route_path=square_route(1000))
+		far_path = [{**point, 'lat': point['lat'] + 0.5} for point in square_route(1000)]
+		cls.far = Route.objects.create(crew_type='running', start_location='먼 곳', target_distance=4.0, route_path=far_path)
+
+	def offset(self, north_m, east_m):
+		lat, lng = START
+		return lat + north_m / 111195.0, lng + east_m / (111195.0 * math.cos(math.radians(lat)))
+
+	def test_near_uses_distance_to_path(self):
+		self.assertEqual(list(Route.objects.near(*self.offset(1030, 500), 50)), [self.square])
+		# 정사각형 안쪽 중심은 bbox에는 들어가지만 경로선에서 500m 떨어져 있음
+		self.assertFalse(Route.objects.near(*self.offset(500, 500), 100).exists())
+		self.assertTrue(Route.objects.near(*self.offset(500, 500), 510).filter(pk=self.square.pk).exists())
+
+	def test_within_bbox_requires_intersection(self):
+		lat, lng = self.offset(1000, 1000)
+		corner = (lng - 0.001, lat - 0.001, lng + 0.001, lat + 0.001)
+		self.assertEqual(list(Route.objects.within_bbox(*corner)), [self.square])
+
+		inner_lat, inner_lng = self.offset(500, 500)
+		inside = (inner_lng - 0.001, inner_lat - 0.001, inner_lng + 0.001, inner_lat + 0.001)
+		self.assertFalse(Route.objects.within_bbox(*inside).exists())
+
+class RouteNearbyViewTests(TestCase):
+	def setUp(self):
+		Route.objects.create(crew_type='running', start_location='시청', target_distance=4.0, route_path=square_route(1000))
+		self.client = APIClient()
+		self.client.force_authenticate(get_user_model().objects.create_user(email='viewer@example.com', nickname='viewer', password='pw'))
+
+	def get(self, **params):
+		return self.client.get('/routes/nearby/', params)
+
+	def test_point_and_bbox_queries(self):
+		response = self.get(lat=START[0], lng=START[1], radius=100)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.data['data']), 1)
+
+		bbox = f'{START[1] - 0.01},{START[0] - 0.01},{START[1] + 0.01},{START[0] + 0.01}'
+		self.assertEqual(len(self.get(bbox=bbox).data['data']), 1)
+
+	def test_rejects_invalid_point(self):
+		for params in (
+			{'lat': 'nan', 'lng': START[1]},
+			{'lat': START[0], 'lng': 'inf'},
+			{'lat': START[0], 'lng': START[1], 'radius': 'nan'},
+			{'lat': START[0], 'lng': START[1], 'radius': '-1'},
+			{'lat': '91', 'lng': START[1]},
+			{'lat': START[0], 'lng': '-181'},
+			{'lat': START[0]},
+		):
+			self.assertEqual(self.get(**params).status_code, 400, params)
+
+	def test_rejects_invalid_bbox(self):
+		for bbox in ('nan,37,127,38', '126,37,inf,38', '127,37,126,38', '-200,37,127,38', '126,37,127', 'a,b,c,d'):
+			self.assertEqual(self.get(bbox=bbox).status_code, 400, bbox)
+
+class FakeGeocodingService:
+	def __init__(self, coords):
+		self.coords = coords
+		self.calls = []
+		self._lock = threading.Lock()
+
+	def convert_location_to_coordinates(self, name):
+		with self._lock:
+			self.calls.append(name)
+		if name not in self.coords:
+			raise ValueError(f'위치를 찾을 수 없습니다: {name}')
+		return self.coords[name]
+
+class RecommendRoutesBatchTests(SimpleTestCase):
+	def setUp(self):
+		self.service = FakeGeocodingService({'시청': START, '한강공원': (37.52, 126.93)})
+		self.recommended = []
+		patchers = [
+			mock.patch('routes.batch.recommend_and_save_route', side_effect=self.fake_recommend),
+			mock.patch('routes.batch.close_old_connections'),
+			mock.patch('routes.batch.connection'),
+		]
+		for patcher in patchers:
+			patcher.start()
+			self.addCleanup(patcher.stop)
+
+	def fake_recommend(self, crew_member, start_location, target_distance, start_coords, **kwargs):
+		self.recommended.append((start_location, target_distance, start_coords))
+		if target_distance <= 0:
+			raise ValueError('목표 거리는 0보다 커야 합니다.')
+		if target_distance == 13:
+			raise RuntimeError('저장 실패')
+		# 앞 항목일수록 늦게 끝나도록
+		time.sleep(0.05 / target_distance)
+		route = mock.Mock(route_id=int(target_distance * 10), engine='loop', actual_distance=target_distance)
+		return RouteRecommendation(route, [{'lat': start_coords[0], 'lng': start_coords[1]}])
+
+	def batch(self, items):
+		return recommend_routes_batch(None, items, service=self.service)
+
+	def test_geocodes_each_location_once(self):
+		items = [
+			{'start_location': '시청', 'target_distance': 3},
+			{'start_location': '  시청 ', 'target_distance': 5},
+			{'start_location': '한강공원', 'target_distance': 5},
+		]
+		results = self.batch(items)
+
+		self.assertEqual(sorted(self.service.calls), ['시청', '한강공원'])
+		self.assertEqual([result['status'] for result in results], ['success'] * 3)
+		self.assertEqual({coords for _, _, coords in self.recommended}, {START, (37.52, 126.93)})
+
+	def test_results_follow_item_order(self):
+		items = [{'start_location': '시청', 'target_distance': distance} for distance in (1, 2, 4, 8)]
+		results = self.batch(items)
+
+		self.assertEqual([result['index'] for result in results], [0, 1, 2, 3])
+		self.assertEqual([result['route_id'] for result in results], [10, 20, 40, 80])
+
+	def test_failures_stay_in_their_item(self):
+		items = [
+			{'start_location': '없는 곳', 'target_distance': 5},
+			{'start_location': '시청', 'target_distance': 0},
+			{'start_location': '시청', 'target_distance': 13},
+			{'start_location': '한강공원', 'target_distance': 5},
+			{'start_location': '없는 곳', 'target_distance': 3},
+		]
+		with self.assertLogs('routes.batch', 'WARNING'):
+			results = self.batch(items)
+
+		self.assertEqual([result['status'] for result in results], ['error', 'error', 'error', 'success', 'error'])
+		self.assertEqual(results[0]['message'], '위치를 찾을 수 없습니다: 없는 곳')
+		self.assertEqual(results[1]['message'], '목표 거리는 0보다 커야 합니다.')
+		self.assertEqual(results[2]['message'], '경로 추천 중 오류 발생: 저장 실패')
+		# 위치 변환에 실패한 항목은 경로 생성을 시도하지 않음
+		self.assertNotIn('없는 곳', [location for location, _, _ in self.recommended])
+		self.assertEqual(self.service.calls.count('없는 곳'), 1)
+
+class WaypointPlannerTests(SimpleTestCase):
+	def setUp(self):
+		self.loop = LoopRouteEngine().generate('', *START, 5.0)
+
+	def store_near_vertex(self, store_id, vertex):
+		# 기준 경로 꼭짓점에서 약 10m 떨어진 가게
+		point = self.loop[vertex]
+		return {'store_id': store_id, 'name': f'가게 {store_id}', 'lat': point['lat'] + 10 / 111195.0, 'lng': point['lng']}
+
+	def plan(self, stores, **kwargs):
+		planner = WaypointPlanner(**{'candidates': 8, 'max_detour_ratio': 0.25, **kwargs})
+		with mock.patch.object(planner, 'nearest_stores', return_value=stores) as nearest:
+			waypoints = planner.plan(*START, 5.0)
+		return waypoints, nearest
+
+	def test_waypoints_follow_loop_order(self):
+		stores = [self.store_near_vertex(3, 18), self.store_near_vertex(1, 4), self.store_near_vertex(2, 11)]
+		waypoints, nearest = self.plan(stores, max_stops=3)
+
+		self.assertEqual([waypoint['store_id'] for waypoint in waypoints], [1, 2, 3])
+		self.assertTrue(all(waypoint['is_partner'] and waypoint['detour_m'] < 30 for waypoint in waypoints))
+		self.assertEqual(nearest.call_args[0][2], 8)
+
+	def test_max_stops_and_detour_limit(self):
+		far = {'store_id': 9, 'name': '먼 가게', 'lat': START[0] + 0.05, 'lng': START[1]}
+		stores = [far, self.store_near_vertex(1, 4), self.store_near_vertex(2, 11)]
+
+		waypoints, _ = self.plan(stores, max_stops=1)
+		self.assertEqual(len(waypoints), 1)
+		self.assertNotEqual(waypoints[0]['store_id'], 9)
+
+		waypoints, _ = self.plan([far], max_stops=3)
+		self.assertEqual(waypoints, [])
+
+	def test_no_stops_requested(self):
+		waypoints, nearest = self.plan([self.store_near_vertex(1, 4)], max_stops=0)
+
+		self.assertEqual(waypoints, [])
+		nearest.assert_not_called()
+
+	def test_nearest_stores_uses_store_index(self):
+		index = StoreIndex([1, 2, 3], [START[0], START[0] + 0.01, START[0] + 0.001], [START[1]] * 3, [10] * 3, ['a', 'b', 'c'])
+		with mock.patch('routes.waypoints.get_store_index', return_value=index), \
+				mock.patch('routes.waypoints.Store') as store_model:
+			stores = WaypointPlanner().nearest_stores(*START, 2)
+
+		self.assertEqual([store['store_id'] for store in stores], [1, 3])
+		store_model.objects.order_by.assert_not_called()
+
+class WaypointPlannerKNNTests(TestCase):
+	"""
+	가게 인덱스가 없을 때 PostGIS KNN(<->) 정렬로 같은 가게를 고르는지 확인
+	"""
+
+	@classmethod
+	def setUpTestData(cls):
+		stores = []
+		for i in range(30):
+			lat, lng = START[0] + (i % 6) * 0.003 - 0.008, START[1] + (i // 6) * 0.004 - 0.009
+			stores.append(Store(name=f'가게 {i}', lat=lat, lng=lng, location=Point(lng, lat, srid=4326)))
+		Store.objects.bulk_create(stores)
+
+	def test_knn_fallback_matches_index(self):
+		planner = WaypointPlanner()
+		with mock.patch('routes.waypoints.get_store_index', return_value=None):
+			fallback = [store['store_id'] for store in planner.nearest_stores(*START, 5)]
+		with mock.patch('routes.waypoints.get_store_index', return_value=StoreIndex.from_db()):
+			indexed = [store['store_id'] for store in planner.nearest_stores(*START, 5)]
+
+		self.assertEqual(fallback, indexed)
+
+class LegacyWaypointArgumentTests(SimpleTestCase):
+	def setUp(self):
+		patcher = mock.patch('routes.services.get_client_manager')
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.service = RouteRecommendationService()
+		self.store = {'store_id': 1, 'lat': 37.57, 'lng': 126.98, 'name': '제휴 가게'}
+
+	def requested_waypoints(self, *args, **kwargs):
+		with mock.patch.object(self.service, '_request_route', return_value=[]) as request_route:
+			self.service.recommend_route('시청', 5.0, 'running', *args, start_coords=START, **kwargs)
+		return request_route.call_args[0][5]
+
+	def test_waypoint_keyword_is_accepted(self):
+		self.assertEqual(self.requested_waypoints(waypoint=self.store), [self.store])
+
+	def test_single_store_dict_is_accepted(self):
+		self.assertEqual(self.requested_waypoints(self.store), [self.store])
+		self.assertEqual(self.requested_waypoints(waypoints=[self.store]), [self.store])
+
+	def test_both_arguments_are_rejected(self):
+		with self.assertRaises(TypeError):
+			self.requested_waypoints(waypoints=[self.store], waypoint=self.store)
+
+class RouteJobTests(TestCase):
+	def setUp(self):
+		self.crew_member = create_crew_member(1)
+		self.statuses = []
+		patchers = [
+			mock.patch('routes.jobs._backend', ImmediateJobBackend()),
+			mock.patch('routes.jobs.recommend_and_save_route', side_effect=self.fake_recommend),
+		]
+		for patcher in patchers:
+			patcher.start()
+			self.addCleanup(patcher.stop)
+		self.error = None
+
+	def fake_recommend(self, crew_member, start_location, target_distance, engine, max_stops):
+		# 실행 중에는 running 상태
+		self.statuses.append(RouteJob.objects.get(crew_member=crew_member).status)
+		if self.error is not None:
+			raise self.error
+		route = Route.objects.create(
+			crew_member=crew_member, crew_type='running', start_location=start_location,
+			target_distance=target_distance, route_path=square_route(1000), engine=engine or 'loop',
+		)
+		return RouteRecommendation(route, route.route_path)
+
+	def enqueue(self, **kwargs):
+		with self.captureOnCommitCallbacks() as callbacks:
+			job = enqueue_route_job(self.crew_member, '시청', 5.0, **kwargs)
+			# 커밋 전에는 실행하지 않음
+			self.assertEqual(self.statuses, [])
+		self.assertEqual(len(callbacks), 1)
+		callbacks[0]()
+		job.refresh_from_db()
+		return job
+
+	def test_job_runs_after_commit(self):
+		job = self.enqueue(engine='loop', max_stops=2)
+
+		self.assertEqual(self.statuses, ['running'])
+		self.assertEqual(job.status, 'succeeded')
+		self.assertEqual(job.route.engine, 'loop')
+		self.assertEqual(job.error, '')
+
+	def test_failed_job_records_error(self):
+		self.error = ValueError('위치를 찾을 수 없습니다.')
+		with self.assertLogs('routes.jobs', 'ERROR'):
+			job = self.enqueue()
+
+		self.assertEqual(job.status, 'failed')
+		self.assertEqual(job.error, '위치를 찾을 수 없습니다.')
+		self.assertIsNone(job.route)
+
+	def test_only_pending_job_runs(self):
+		job = RouteJob.objects.create(crew_member=self.crew_member, start_location='시청', target_distance=5.0, status='succeeded')
+		run_route_job(job.job_id)
+
+		self.assertEqual(self.statuses, [])
+		job.refresh_from_db()
+		self.assertEqual(job.status, 'succeeded')
@@ -6,6 +6,16 @@ app_name = 'routes'
 urlpatterns = [
 	# 경로 추천 및 저장
 	path('', views.RouteRecommendationView.as_view()),
+	# 여러 시작 위치/거리 일괄 경로 추천
+	path('batch/', views.RouteBatchView.as_view()),
+	# 경로 추천 스트리밍 (server-sent events)
+	path('stream/', views.RouteStreamView.as_view()),
 	# 경로 조회회
 	path('<int:route_id>/', views.RouteRetrieveView.as_view()),
+	# 비동기 경로 추천 작업 상태 조회
+	path('jobs/<uuid:job_id>/', views.RouteJobView.as_view()),
+	# 주변/영역 내 경로 검색
+	path('nearby/', views.RouteNearbyView.as_view()),
+	# 단계별 지연 시간 지표 (관리자)
+	path('metrics/', views.RouteMetricsView.as_view()),
 ]
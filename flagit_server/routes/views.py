@@ -1,12 +1,16 @@
+import math
+
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
 from django.contrib.gis.db.models.functions import Distance
 
-from .models import Route
+from .models import Route, RouteJob
 from stores.models import Store
 from routes.models import Route
 from location.models import Location
@@ -17,15 +21,27 @@ from member.views import assign_badges, assign_mvp_badge
 from .serializers import (
 	RouteSerializer, 
 	RouteRecommendationRequestSerializer,
+	RouteBatchRequestSerializer,
 	RouteRecommendationResponseSerializer,
+	RouteJobSerializer,
+	RouteSummarySerializer,
 )
-from .services import RouteRecommendationService
+from .batch import recommend_routes_batch
+from .formats import RoutePathFormatMixin
+from .jobs import enqueue_route_job
+from .metrics import StageTimer, route_counters, route_metrics
+from .pipeline import recommend_and_save_route, stream_and_save_route
+from .streaming import aiter_sync, sse_event
+from .route_cache import cache_stats
+from .llm import get_client_manager
 from crew.models import CrewMember
 from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
 
-class RouteRecommendationView(APIView):
+class RouteRecommendationView(RoutePathFormatMixin, APIView):
 	"""
 	경로 추천 및 저장
+	route_path 형식은 Accept 헤더(또는 ?format=)로 선택: 기본 JSON / polyline / geojson
 	"""
 	
 	def post(self, request):
@@ -36,58 +52,45 @@ class RouteRecommendationView(APIView):
 				crew_member = CrewMember.objects.filter(user=request.user).first()
 				if not crew_member:
 					return Response({'error': '사용자가 속한 크루가 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
-				crew_type = crew_member.crew.crew_type
 
 				start_location = serializer.validated_data['start_location']
 				target_distance = serializer.validated_data['target_distance']
+				engine = serializer.validated_data.get('engine')
+				force_refresh = serializer.validated_data.get('force_refresh', False)
+				max_stops = serializer.validated_data.get('max_stops')
 
-				# 추천 서비스 생성
-				recommendation_service = RouteRecommendationService()
-				
-				# 시작 위치를 위도/경도로 변환
-				start_lat, start_lng = recommendation_service.convert_location_to_coordinates(start_location)
-
-				# PostGIS로 시작점 반경 내 제휴 가게 1곳 찾기 
-				user_point = Point(start_lng, start_lat, srid=4326)
-				candidate = (
-					Store.objects.filter(
-						location__distance_lte=(user_point, D(km=target_distance))
-					)
-					.first()
-				)
-
-				waypoint = None
-				if candidate:
-					waypoint = {
-						'lat': candidate.lat,
-						'lng': candidate.lng,
-						'name': candidate.name,
-						'is_partner': True,
-					}
-
-				# 추천 생성
-				route_path = recommendation_service.recommend_route(
-					start_location=start_location,
-					target_distance=target_distance,
-					crew_type=crew_type,
-					waypoint=waypoint,
-				)
+				# 비동기 모드: 작업만 등록하고 바로 job_id 반환
+				if serializer.validated_data.get('mode') == 'async':
+					job = enqueue_route_job(crew_member, start_location, target_distance, engine, max_stops)
+					return Response({"status" : "success", "code" : 202, "message" : "경로 추천 작업이 등록되었습니다.", "data" : {"job_id" : str(job.job_id), "status" : job.status}}
+						, status=status.HTTP_202_ACCEPTED)
 
-				# 저장
-				created_route = Route.objects.create(
+				# 위치 변환 1회 + 경로 생성 1회 (단계별 시간 기록)
+				timer = StageTimer()
+				result = recommend_and_save_route(
 					crew_member=crew_member,
-					crew_type=crew_type,
 					start_location=start_location,
 					target_distance=target_distance,
-					route_path=route_path,
+					timer=timer,
+					engine=engine,
+					# 강제 재생성은 관리자만 가능
+					force_refresh=force_refresh and request.user.is_staff,
+					max_stops=max_stops,
 				)
+				timer.finish()
 
 				response_data = {
-					'route_id': created_route.route_id,
-					'route_path': route_path,
+					'route_id': result.route.route_id,
+					'engine': result.route.engine,
+					'actual_distance': result.route.actual_distance,
+					'cached': result.cached,
+					'route_path': result.route_path,
 				}
-				return Response({"status" : "success", "code" : 200, "message" : "경로 추천 성공", "data" : RouteRecommendationResponseSerializer(response_data).data}
+				data = self.with_path(request, RouteRecommendationResponseSerializer(response_data).data, result.route_path)
+				response = Response({"status" : "success", "code" : 200, "message" : "경로 추천 성공", "data" : data}
 					, status=status.HTTP_200_OK)
+				response['Server-Timing'] = timer.server_timing_header()
+				return response
 
 			except ValueError as e:
 				return Response({"status" : "error", "code" : 400, "message" : str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -96,18 +99,103 @@ class RouteRecommendationView(APIView):
 
 		return Response({"status" : "error", "code" : 400, "message" : serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
-class RouteRetrieveView(APIView):
+class RouteBatchView(RoutePathFormatMixin, APIView):
+	"""
+	여러 (시작 위치, 목표 거리) 조합의 경로를 한 번에 추천 및 저장
+	같은 시작 위치의 위치 변환은 한 번만 하고, 경로 생성은 동시에 실행합니다.
+	항목별 결과(status: success/error)를 요청 순서대로 반환합니다.
+	"""
+
+	def post(self, request):
+		serializer = RouteBatchRequestSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({"status" : "error", "code" : 400, "message" : serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+		crew_member = CrewMember.objects.select_related('crew').filter(user=request.user).first()
+		if not crew_member:
+			return Response({'error': '사용자가 속한 크루가 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		try:
+			timer = StageTimer()
+			results = recommend_routes_batch(
+				crew_member=crew_member,
+				items=serializer.validated_data['items'],
+				engine=serializer.validated_data.get('engine'),
+				max_stops=serializer.validated_data.get('max_stops'),
+				timer=timer,
+			)
+			timer.finish('batch_total')
+		except Exception as e:
+			return Response({"status" : "error", "code" : 500, "message" : f'경로 추천 중 오류 발생: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+		results = [self.with_path(request, item, item['route_path']) if 'route_path' in item else item for item in results]
+		response = Response({"status" : "success", "code" : 200, "message" : "일괄 경로 추천 완료", "data" : results}
+			, status=status.HTTP_200_OK)
+		response['Server-Timing'] = timer.server_timing_header()
+		return response
+
+class RouteStreamView(APIView):
+	"""
+	경로 추천 스트리밍 (server-sent events)
+	start(시작 좌표) -> point(경로 지점, 생성되는 대로) ... -> done(저장된 경로) 순으로 전송하고,
+	실패하면 error 이벤트를 보냅니다.
+	"""
+
+	def post(self, request):
+		serializer = RouteRecommendationRequestSerializer(data=request.data)
+		if not serializer.is_valid():
+			return Response({"status" : "error", "code" : 400, "message" : serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+		crew_member = CrewMember.objects.select_related('crew').filter(user=request.user).first()
+		if not crew_member:
+			return Response({'error': '사용자가 속한 크루가 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+		events = self._events(
+			crew_member=crew_member,
+			start_location=serializer.validated_data['start_location'],
+			target_distance=serializer.validated_data['target_distance'],
+			engine=serializer.validated_data.get('engine'),
+			force_refresh=serializer.validated_data.get('force_refresh', False) and request.user.is_staff,
+			max_stops=serializer.validated_data.get('max_stops'),
+		)
+		# ASGI에서는 비동기 이터레이터여야 조각 단위로 전송됨
+		if isinstance(request._request, ASGIRequest):
+			events = aiter_sync(events)
+		response = StreamingHttpResponse(events, content_type='text/event-stream')
+		response['Cache-Control'] = 'no-cache'
+		response['X-Accel-Buffering'] = 'no'
+		return response
+
+	@staticmethod
+	def _events(**kwargs):
+		timer = StageTimer()
+		try:
+			for event, data in stream_and_save_route(timer=timer, **kwargs):
+				if event == 'done':
+					timer.finish()
+					data = {**data, 'timings': timer.as_ms()}
+				yield sse_event(event, data)
+		except ValueError as e:
+			yield sse_event('error', {"status" : "error", "code" : 400, "message" : str(e)})
+		except Exception as e:
+			yield sse_event('error', {"status" : "error", "code" : 500, "message" : f'경로 추천 중 오류 발생: {str(e)}'})
+
+class RouteRetrieveView(RoutePathFormatMixin, APIView):
 	"""
 	저장된 경로 단건 조회 API (route_id로 조회)
+	route_path 형식은 Accept 헤더(또는 ?format=)로 선택: 기본 JSON / polyline / geojson
 	"""
 	
 	def get(self, request, route_id: int):
 		route = get_object_or_404(Route, route_id=route_id)
 		response_data = {
 			'route_id': route.route_id,
+			'engine': route.engine,
+			'actual_distance': route.actual_distance,
 			'route_path': route.route_path,
 		}
-		return Response({"status" : "success", "code" : 200, "message" : "경로 조회 성공", "data" : RouteRecommendationResponseSerializer(response_data).data}
+		data = self.with_path(request, RouteRecommendationResponseSerializer(response_data).data, route.route_path)
+		return Response({"status" : "success", "code" : 200, "message" : "경로 조회 성공", "data" : data}
 				  , status=status.HTTP_200_OK)
 	def post(self, request, route_id: int):
 		try:
@@ -169,4 +257,68 @@ class RouteRetrieveView(APIView):
                 "recorded_target_distance": route.target_distance,
                 "updated_total_distance": member.total_distance
             }
-        }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        }, status=status.HTTP_201_CREATED)
+
+class RouteJobView(RoutePathFormatMixin, APIView):
+	"""
+	비동기 경로 추천 작업 상태 조회 (완료 시 route_path 포함)
+	"""
+
+	def get(self, request, job_id):
+		job = RouteJob.objects.select_related('route').filter(job_id=job_id, crew_member__user=request.user).first()
+		if not job:
+			return Response({"status" : "error", "code" : 404, "message" : "해당 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+		data = RouteJobSerializer(job).data
+		if data.get('route_path'):
+			data = self.with_path(request, data, data['route_path'])
+		return Response({"status" : "success", "code" : 200, "message" : "작업 상태 조회 성공", "data" : data}
+				  , status=status.HTTP_200_OK)
+
+class RouteNearbyView(APIView):
+	"""
+	공간 인덱스를 이용한 저장된 경로 검색
+	- ?lat=&lng=&radius= : 지점에서 radius(m, 기본 500) 이내를 지나는 경로
+	- ?bbox=min_lng,min_lat,max_lng,max_lat : 영역을 지나는 경로
+	"""
+	DEFAULT_RADIUS_M = 500
+	MAX_RADIUS_M = 20000
+	DEFAULT_LIMIT = 50
+	MAX_LIMIT = 200
+
+	def get(self, request):
+		try:
+			limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+			bbox = request.query_params.get('bbox')
+			if bbox:
+				min_lng, min_lat, max_lng, max_lat = (float(v) for v in bbox.split(','))
+				# nan/inf는 비교 연산을 모두 통과할 수 있으므로 먼저 거름
+				if not all(map(math.isfinite, (min_lng, min_lat, max_lng, max_lat))):
+					raise ValueError
+				if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+					raise ValueError
+				routes = Route.objects.within_bbox(min_lng, min_lat, max_lng, max_lat)
+			else:
+				lat = float(request.query_params['lat'])
+				lng = float(request.query_params['lng'])
+				radius = float(request.query_params.get('radius', self.DEFAULT_RADIUS_M))
+				if not all(map(math.isfinite, (lat, lng, radius))):
+					raise ValueError
+				if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius <= 0:
+					raise ValueError
+				routes = Route.objects.near(lat, lng, min(radius, self.MAX_RADIUS_M))
+		except (KeyError, TypeError, ValueError):
+			return Response({"status" : "error", "code" : 400, "message" : "lat, lng(또는 bbox) 형식이 올바르지 않습니다."}, status=status.HTTP_400_BAD_REQUEST)
+
+		routes = routes.order_by('-route_id')[:max(limit, 1)]
+		return Response({"status" : "success", "code" : 200, "message" : "주변 경로 조회 성공", "data" : RouteSummarySerializer(routes, many=True).data}
+				  , status=status.HTTP_200_OK)
+
+class RouteMetricsView(APIView):
+	"""
+	경로 추천 단계별 지연 시간(p50/p95) 조회 - 관리자 전용, 현재 워커 프로세스 기준
+	"""
+	permission_classes = [IsAdminUser]
+
+	def get(self, request):
+		return Response({"status" : "success", "code" : 200, "message" : "경로 추천 지표 조회 성공", "data" : {"stages" : route_metrics.summary(), "route_cache" : cache_stats(), "gemini" : get_client_manager().stats(), "counters" : route_counters.snapshot()}}
+				  , status=status.HTTP_200_OK)
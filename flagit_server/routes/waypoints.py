@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.geos import Point
+
+from stores.index import get_store_index
+from stores.models import Store
+from .engines import LoopRouteEngine
+from .geometry import LocalProjection, cheapest_insertion
+
+class WaypointPlanner:
+	"""
+	경로에 끼워 넣을 제휴 가게 경유지를 고릅니다.
+	1. 시작점에서 출발하는 기준 원형 경로(LoopRouteEngine, 경유지 없음)를 만들고
+	2. 그 중심에서 가까운 가게 후보를 공간 인덱스 KNN(<-> 정렬)으로 candidates개만 조회한 뒤
+	3. 기준 경로에 끼워 넣을 때의 우회 거리가 작은 가게부터 max_stops곳까지 선택합니다.
+	   (가게 하나의 우회 거리가 목표 거리 x max_detour_ratio를 넘으면 선택하지 않음)
+	반환하는 경유지는 기준 경로를 따라가는 순서입니다.
+	"""
+
+	def __init__(
+		self,
+		max_stops: Optional[int] = None,
+		candidates: Optional[int] = None,
+		max_detour_ratio: Optional[float] = None,
+	):
+		self.max_stops = max_stops if max_stops is not None else getattr(settings, 'ROUTE_WAYPOINT_STOPS', 1)
+		self.candidates = candidates or getattr(settings, 'ROUTE_WAYPOINT_CANDIDATES', 32)
+		self.max_detour_ratio = (
+			max_detour_ratio if max_detour_ratio is not None
+			else getattr(settings, 'ROUTE_WAYPOINT_MAX_DETOUR_RATIO', 0.25)
+		)
+
+	def nearest_stores(self, lat: float, lng: float, limit: int) -> List[Dict[str, Any]]:
+		"""
+		지점에서 가까운 가게 limit곳
+		프로세스 내 가게 인덱스(stores.index)가 있으면 DB 없이, 없으면 location의 GiST 인덱스를 타는 KNN 정렬로 조회
+		"""
+		index = get_store_index()
+		if index is not None:
+			return index.nearest(lat, lng, limit)
+		center = Point(lng, lat, srid=4326)
+		return list(
+			Store.objects.order_by(GeometryDistance('location', center))
+			.values('store_id', 'name', 'lat', 'lng')[:limit]
+		)
+
+	def plan(
+		self,
+		start_lat: float,
+		start_lng: float,
+		target_distance: float,
+		crew_type: str = 'running',
+		max_stops: Optional[int] = None,
+	) -> List[Dict[str, Any]]:
+		max_stops = self.max_stops if max_stops is None else max_stops
+		if max_stops <= 0 or target_distance <= 0:
+			return []
+
+		projection = LocalProjection(start_lat, start_lng)
+		loop = LoopRouteEngine().generate('', start_lat, start_lng, target_distance, crew_type)
+		loop_xy = np.column_stack(projection.to_xy(
+			np.array([point['lat'] for point in loop]),
+			np.array([point['lng'] for point in loop]),
+		))
+
+		center_x, center_y = loop_xy[:-1].mean(axis=0)
+		center_lat, center_lng = projection.to_latlng(center_x, center_y)
+		stores = self.nearest_stores(center_lat, center_lng, self.candidates)
+		if not stores:
+			return []
+
+		stores_xy = np.column_stack(projection.to_xy(
+			np.array([store['lat'] for store in stores], dtype=float),
+			np.array([store['lng'] for store in stores], dtype=float),
+		))
+		_, chosen = cheapest_insertion(
+			loop_xy,
+			stores_xy,
+			max_stops=max_stops,
+			max_detour=target_distance * 1000 * self.max_detour_ratio,
+		)
+		return [
+			{
+				'store_id': stores[index]['store_id'],
+				'lat': stores[index]['lat'],
+				'lng': stores[index]['lng'],
+				'name': stores[index]['name'],
+				'is_partner': True,
+				'detour_m': round(detour, 1),
+			}
+			for index, detour in chosen
+		]
+
+def plan_waypoints(
+	start_lat: float,
+	start_lng: float,
+	target_distance: float,
+	crew_type: str = 'running',
+	max_stops: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+	"""
+	요청당 경유할 제휴 가게 목록 (max_stops는 ROUTE_WAYPOINT_MAX_STOPS를 넘을 수 없음)
+	"""
+	if max_stops is not None:
+		max_stops = min(max_stops, getattr(settings, 'ROUTE_WAYPOINT_MAX_STOPS', 3))
+	return WaypointPlanner().plan(start_lat, start_lng, target_distance, crew_type, max_stops)
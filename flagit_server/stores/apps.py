@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class StoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stores'
+
+    def ready(self):
+        # 가게 변경을 프로세스 내 공간 인덱스(stores.index)에 반영
+        from .index import store_deleted, store_pre_save, store_saved
+        from .models import Store
+        pre_save.connect(store_pre_save, sender=Store, dispatch_uid='stores.index.store_pre_save')
+        post_save.connect(store_saved, sender=Store, dispatch_uid='stores.index.store_saved')
+        post_delete.connect(store_deleted, sender=Store, dispatch_uid='stores.index.store_deleted')
+
+        # 가게 변경 시 이전/새 위치를 덮는 캐시 타일(stores.tiles) 무효화
+        from . import tiles
+        pre_save.connect(tiles.store_pre_save, sender=Store, dispatch_uid='stores.tiles.store_pre_save')
+        post_save.connect(tiles.store_saved, sender=Store, dispatch_uid='stores.tiles.store_saved')
+        post_delete.connect(tiles.store_deleted, sender=Store, dispatch_uid='stores.tiles.store_deleted')
@@ -0,0 +1,58 @@
+import math
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from .index import EARTH_RADIUS_M, get_store_index
+from .models import Store
+
+
+class StoreFence(NamedTuple):
+    """
+    가게의 인증 범위 (가게 위치를 중심으로 geofence_meters 반경의 원)
+    """
+    store_id: int
+    lat: float
+    lng: float
+    geofence_meters: int
+
+    def distance(self, lat: float, lng: float) -> float:
+        """
+        가게까지의 구면 거리(m) (PostGIS ST_DistanceSphere와 같은 계산)
+        """
+        p1, p2 = math.radians(self.lat), math.radians(lat)
+        a = (math.sin((p2 - p1) / 2) ** 2
+             + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng - self.lng) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+    def contains(self, lat: float, lng: float) -> bool:
+        return self.distance(lat, lng) <= self.geofence_meters
+
+
+def default_geofence_meters() -> int:
+    """
+    가게별 반경이 없을 때의 인증 반경(m), 사용하는 인증 흐름(CERTIFICATION_FLOW)에 따라 다름
+    - button: 인증 완료 버튼 흐름 (CertificationStatusView2), 함께 인증 반경 5km
+    - window: 유예 창 흐름 (CertificationStatusView), 가게 앞 50m
+    """
+    if getattr(settings, 'CERTIFICATION_FLOW', 'button') == 'window':
+        return getattr(settings, 'CERTIFICATION_WINDOW_GEOFENCE_METERS', 50)
+    return getattr(settings, 'CERTIFICATION_BUTTON_GEOFENCE_METERS', 5000)
+
+
+def get_store_fence(store_id: int) -> Optional[StoreFence]:
+    """
+    가게의 인증 범위, 가게가 없으면 None
+    프로세스 내 가게 인덱스(stores.index)에서 먼저 찾고, 꺼져 있거나 아직 반영 전인 가게만 DB에서 읽습니다.
+    """
+    index = get_store_index()
+    if index is not None:
+        fence = index.fence(store_id)
+        if fence is not None:
+            lat, lng, geofence_meters = fence
+            return StoreFence(store_id, lat, lng, geofence_meters or default_geofence_meters())
+    row = Store.objects.filter(pk=store_id).values_list('lat', 'lng', 'geofence_meters').first()
+    if row is None:
+        return None
+    lat, lng, geofence_meters = row
+    return StoreFence(store_id, lat, lng, geofence_meters or default_geofence_meters())
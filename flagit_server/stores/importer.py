@@ -0,0 +1,253 @@
+import codecs
+import csv
+import io
+import json
+import math
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import transaction
+
+from routes.streaming import iter_json_array_items
+from .index import bump_version
+from .models import Store
+from .tiles import tile_cache
+
+IMPORT_FORMATS = ('csv', 'geojson')
+UPDATE_FIELDS = ['name', 'lat', 'lng', 'location', 'required_count']
+MAX_REPORTED_ERRORS = 50
+
+_FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+
+
+class StoreImportError(ValueError):
+    """
+    가져올 행의 값이 올바르지 않음 (해당 행만 건너뜀)
+    """
+
+
+def guess_format(filename: str) -> str:
+    """
+    파일 확장자로 형식 추정 (.csv -> csv, .geojson/.json -> geojson)
+    """
+    lower = (filename or '').lower()
+    if lower.endswith('.csv'):
+        return 'csv'
+    if lower.endswith(('.geojson', '.json')):
+        return 'geojson'
+    raise ValueError(f"파일 형식을 알 수 없습니다: {filename} (csv 또는 geojson)")
+
+
+def iter_text_chunks(byte_chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[str]:
+    # 여러 바이트 조각에 걸친 멀티바이트 문자도 올바르게 디코딩
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_csv_rows(binary_file, encoding: str = 'utf-8-sig') -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    CSV 파일 -> (행 번호, 행) 한 줄씩 (파일 전체를 메모리에 올리지 않음)
+    필수 열: external_id, name, lat, lng / 선택 열: required_count
+    """
+    text = io.TextIOWrapper(binary_file, encoding=encoding, newline='')
+    reader = csv.DictReader(text)
+    try:
+        missing = {'external_id', 'name', 'lat', 'lng'} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"CSV에 필요한 열이 없습니다: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        # 필드 크기 초과, NUL 문자 등 파일 자체가 잘못된 경우 -> 파일 전체 실패
+        raise ValueError(f"CSV 형식이 올바르지 않습니다 ({reader.line_num + 1}행): {e}") from e
+    finally:
+        # 호출한 쪽의 파일을 닫지 않도록 분리
+        text.detach()
+
+
+def iter_geojson_rows(byte_chunks: Iterable[bytes], encoding: str = 'utf-8-sig') -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    GeoJSON FeatureCollection -> (feature 번호, 행) 하나씩
+    "features" 배열의 feature를 조각 단위로 파싱하므로 파일 크기와 무관하게 feature 하나 분량만 메모리에 둡니다.
+    geometry는 Point [lng, lat], properties에 external_id(없으면 feature id), name, required_count
+    """
+    def features_array(chunks: Iterator[str]) -> Iterator[str]:
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            match = _FEATURES_START.search(buffer)
+            if match:
+                yield buffer[match.end() - 1:]
+                yield from chunks
+                return
+            # "features" 키가 조각 경계에 걸칠 수 있으므로 끝부분만 남김
+            buffer = buffer[-64:]
+        raise json.JSONDecodeError("FeatureCollection의 features 배열이 없습니다.", buffer, 0)
+
+    chunks = iter_text_chunks(byte_chunks, encoding)
+    for number, feature in enumerate(iter_json_array_items(features_array(chunks)), start=1):
+        if not isinstance(feature, dict):
+            yield number, {'_error': 'feature가 객체가 아닙니다.'}
+            continue
+        properties = feature.get('properties') or {}
+        geometry = feature.get('geometry') or {}
+        coordinates = geometry.get('coordinates') if geometry.get('type') == 'Point' else None
+        if not isinstance(coordinates, list) or len(coordinates) < 2:
+            yield number, {'_error': 'geometry는 Point여야 합니다.'}
+            continue
+        yield number, {
+            'external_id': properties.get('external_id', feature.get('id')),
+            'name': properties.get('name'),
+            'lat': coordinates[1],
+            'lng': coordinates[0],
+            'required_count': properties.get('required_count'),
+        }
+
+
+def build_store(row: Dict[str, Any]) -> Store:
+    """
+    행 -> 저장 전 Store (좌표 범위/필수 값 검증, location 생성), 잘못된 값이면 StoreImportError
+    """
+    if row.get('_error'):
+        raise StoreImportError(row['_error'])
+
+    external_id = str(row.get('external_id') or '').strip()
+    if not external_id or len(external_id) > 100:
+        raise StoreImportError('external_id가 없거나 100자를 넘습니다.')
+    name = str(row.get('name') or '').strip()
+    if not name or len(name) > 100:
+        raise StoreImportError('name이 없거나 100자를 넘습니다.')
+
+    try:
+        lat, lng = float(row.get('lat')), float(row.get('lng'))
+    except (TypeError, ValueError):
+        raise StoreImportError('lat, lng가 숫자가 아닙니다.')
+    if not (math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180):
+        raise StoreImportError('lat, lng 범위가 올바르지 않습니다.')
+
+    required_count = row.get('required_count')
+    if required_count in (None, ''):
+        required_count = Store._meta.get_field('required_count').default
+    else:
+        try:
+            required_count = int(required_count)
+        except (TypeError, ValueError):
+            raise StoreImportError('required_count가 정수가 아닙니다.')
+        if required_count <= 0:
+            raise StoreImportError('required_count는 1 이상이어야 합니다.')
+
+    return Store(
+        external_id=external_id,
+        name=name,
+        lat=lat,
+        lng=lng,
+        location=Point(lng, lat, srid=4326),
+        required_count=required_count,
+    )
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'message': message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def _flush(batch: Dict[str, Store], result: ImportResult, dry_run: bool) -> None:
+    existing = set(Store.objects.filter(external_id__in=list(batch)).values_list('external_id', flat=True))
+    result.updated += len(existing)
+    result.created += len(batch) - len(existing)
+    if dry_run:
+        return
+    # external_id 기준 upsert (INSERT ... ON CONFLICT (external_id) DO UPDATE)
+    Store.objects.bulk_create(
+        list(batch.values()),
+        update_conflicts=True,
+        unique_fields=['external_id'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def import_stores(
+    rows: Iterable[Tuple[int, Dict[str, Any]]],
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+) -> ImportResult:
+    """
+    (행 번호, 행) 스트림을 batch_size개씩 검증 후 external_id 기준으로 upsert 합니다.
+    - 잘못된 행은 건너뛰고 errors에 기록 (앞의 MAX_REPORTED_ERRORS개까지)
+    - 같은 배치 안에서 external_id가 겹치면 뒤의 행을 사용
+    - 파일 전체를 한 트랜잭션으로 처리: 파일 형식 오류(ValueError)로 중간에 멈추면 앞의 배치도 모두 되돌림
+    - bulk_create는 post_save signal이 없으므로 커밋 후 가게 인덱스 버전을 올리고 타일 캐시를 비움
+    """
+    batch_size = batch_size or getattr(settings, 'STORE_IMPORT_BATCH_SIZE', 2000)
+    result = ImportResult()
+    started = time.perf_counter()
+    batch: Dict[str, Store] = {}
+
+    with transaction.atomic():
+        for row_number, row in rows:
+            result.rows += 1
+            try:
+                store = build_store(row)
+            except StoreImportError as e:
+                result.add_error(row_number, str(e))
+                continue
+            batch[store.external_id] = store
+            if len(batch) >= batch_size:
+                _flush(batch, result, dry_run)
+                batch = {}
+        if batch:
+            _flush(batch, result, dry_run)
+
+        if not dry_run and result.created + result.updated:
+            transaction.on_commit(bump_version)
+            transaction.on_commit(tile_cache.clear)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def import_store_file(binary_file, file_format: str, batch_size: Optional[int] = None, dry_run: bool = False) -> ImportResult:
+    """
+    바이너리 파일 객체(열린 파일, 업로드 파일)에서 가게를 가져옵니다.
+    """
+    if file_format == 'csv':
+        rows = iter_csv_rows(binary_file)
+    elif file_format == 'geojson':
+        chunk_size = getattr(settings, 'STORE_IMPORT_CHUNK_BYTES', 64 * 1024)
+        rows = iter_geojson_rows(iter(lambda: binary_file.read(chunk_size), b''))
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {file_format} (csv 또는 geojson)")
+    return import_stores(rows, batch_size=batch_size, dry_run=dry_run)
@@ -0,0 +1,397 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Store, StoreIndexVersion
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8  # ST_DistanceSphere와 같은 평균 반지름
+VERSION_ROW_ID = 1
+# 인덱스에 들어가는 가게 필드 (이 필드가 바뀔 때만 인덱스에 반영)
+INDEX_FIELDS = frozenset(['lat', 'lng', 'location', 'name', 'required_count', 'geofence_meters'])
+
+
+def haversine_m(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    (lat, lng)에서 각 지점까지의 구면 거리(m) (PostGIS ST_DistanceSphere와 같은 계산)
+    """
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlng = np.radians(lngs - lng)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StoreIndex:
+    """
+    전체 가게의 위치를 담는 프로세스 내 격자(grid) 공간 인덱스
+    - 가게를 cell_degrees 크기 격자 칸 순서로 정렬한 배열(id, 위도, 경도, 필요 인원, 인증 반경)로 보관
+    - 이름은 UTF-8로 이어 붙인 bytes 하나와 오프셋 배열로 보관 (가게마다 str 객체를 두지 않음)
+    - 같은 위도 줄의 칸들은 배열에서 연속이므로, 반경 조회는 위도 줄마다 한 구간을 잘라 거리만 계산
+    인덱스를 만든 뒤 바뀐 가게는 apply/remove로 덮어쓰기(overlay)에 반영하고, 다음 재적재 때 배열에 합칩니다.
+    """
+
+    def __init__(
+        self,
+        ids: Iterable[int],
+        lats: Iterable[float],
+        lngs: Iterable[float],
+        required_counts: Iterable[int],
+        names: Iterable[str],
+        cell_degrees: Optional[float] = None,
+        geofence_meters: Optional[Iterable[int]] = None,
+    ):
+        self.cell_degrees = cell_degrees or getattr(settings, 'STORE_INDEX_CELL_DEGREES', 0.01)
+        self._columns = int(math.ceil(360.0 / self.cell_degrees)) + 1
+
+        ids = np.asarray(ids, dtype=np.int32)
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        required_counts = np.asarray(required_counts, dtype=np.int32)
+        # 0은 가게별 값 없음 (인증 흐름별 기본값 사용)
+        if geofence_meters is None:
+            geofence_meters = np.zeros(len(ids), dtype=np.int32)
+        geofence_meters = np.fromiter((fence or 0 for fence in geofence_meters), dtype=np.int32, count=len(ids))
+        encoded = [name.encode() for name in names]
+
+        keys = self._cell_keys(lats, lngs)
+        order = np.argsort(keys, kind='stable')
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lngs = lngs[order]
+        self.required_counts = required_counts[order]
+        self.geofence_meters = geofence_meters[order]
+        self.cell_keys, self.cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_starts = np.append(self.cell_starts, len(order)).astype(np.int64)
+
+        lengths = np.fromiter((len(encoded[i]) for i in order), dtype=np.uint32, count=len(order))
+        self.name_offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.uint64))).astype(np.uint64)
+        self.names = b''.join(encoded[i] for i in order)
+        self._by_id = np.argsort(self.ids)
+
+        self._lock = threading.Lock()
+        self._removed: set = set()
+        self._extra: Dict[int, Tuple[float, float, str, int, int]] = {}
+
+    @classmethod
+    def from_db(cls, cell_degrees: Optional[float] = None) -> 'StoreIndex':
+        ids, lats, lngs, required_counts, names, geofence_meters = [], [], [], [], [], []
+        rows = Store.objects.values_list('store_id', 'lat', 'lng', 'required_count', 'name', 'geofence_meters')
+        for store_id, lat, lng, required_count, name, fence in rows.iterator(chunk_size=10000):
+            ids.append(store_id)
+            lats.append(lat)
+            lngs.append(lng)
+            required_counts.append(required_count)
+            names.append(name)
+            geofence_meters.append(fence)
+        return cls(ids, lats, lngs, required_counts, names, cell_degrees, geofence_meters)
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self._removed) + len(self._extra)
+
+    def nbytes(self) -> Dict[str, int]:
+        """
+        배열별 메모리 사용량(bytes)
+        """
+        sizes = {
+            'ids': self.ids.nbytes,
+            'coords': self.lats.nbytes + self.lngs.nbytes,
+            'required_counts': self.required_counts.nbytes,
+            'geofences': self.geofence_meters.nbytes,
+            'cells': self.cell_keys.nbytes + self.cell_starts.nbytes,
+            'names': len(self.names) + self.name_offsets.nbytes,
+            'id_lookup': self._by_id.nbytes,
+        }
+        sizes['total'] = sum(sizes.values())
+        return sizes
+
+    def _cell_keys(self, lats, lngs):
+        rows = np.floor((np.asarray(lats) + 90.0) / self.cell_degrees).astype(np.int64)
+        cols = np.floor((np.asarray(lngs) + 180.0) / self.cell_degrees).astype(np.int64)
+        return rows * self._columns + cols
+
+    def _name(self, position: int) -> str:
+        return self.names[int(self.name_offsets[position]):int(self.name_offsets[position + 1])].decode()
+
+    def _row(self, position: int, distance: Optional[float] = None) -> Dict[str, Any]:
+        row = {
+            'store_id': int(self.ids[position]),
+            'name': self._name(position),
+            'lat': float(self.lats[position]),
+            'lng': float(self.lngs[position]),
+            'required_count': int(self.required_counts[position]),
+        }
+        if distance is not None:
+            row['distance'] = float(distance)
+        return row
+
+    # 덮어쓰기(overlay): 인덱스를 다시 만들기 전까지의 변경 사항
+    def apply(
+        self, store_id: int, lat: float, lng: float, name: str, required_count: int,
+        geofence_meters: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            self._hide(store_id)
+            self._extra = {**self._extra, store_id: (lat, lng, name, required_count, geofence_meters)}
+
+    def remove(self, store_id: int) -> None:
+        with self._lock:
+            self._hide(store_id)
+            self._extra = {key: value for key, value in self._extra.items() if key != store_id}
+
+    def _hide(self, store_id: int) -> None:
+        # 배열에 있는 가게만 _removed에 넣음 (__len__이 배열 가게 수에서 뺌)
+        if self._position(store_id) is not None:
+            self._removed = self._removed | {store_id}
+
+    def get(self, store_id: int) -> Optional[Dict[str, Any]]:
+        extra = self._extra.get(store_id)
+        if extra is not None:
+            lat, lng, name, required_count, _ = extra
+            return {'store_id': store_id, 'name': name, 'lat': lat, 'lng': lng, 'required_count': required_count}
+        position = self._position(store_id)
+        return None if position is None else self._row(position)
+
+    def fence(self, store_id: int) -> Optional[Tuple[float, float, Optional[int]]]:
+        """
+        가게의 인증 범위 -> (위도, 경도, geofence_meters), 가게가 없으면 None
+        가게별 반경이 없으면 geofence_meters는 None (인증 흐름별 기본값 사용)
+        """
+        extra = self._extra.get(store_id)
+        if extra is not None:
+            return extra[0], extra[1], extra[4]
+        position = self._position(store_id)
+        if position is None:
+            return None
+        return float(self.lats[position]), float(self.lngs[position]), int(self.geofence_meters[position]) or None
+
+    def _position(self, store_id: int) -> Optional[int]:
+        if store_id in self._removed or not len(self.ids):
+            return None
+        i = np.searchsorted(self.ids, store_id, sorter=self._by_id)
+        if i < len(self.ids) and self.ids[self._by_id[i]] == store_id:
+            return int(self._by_id[i])
+        return None
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        radius_m: float,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        (lat, lng)에서 radius_m 이내의 가게를 (거리, store_id) 순으로 limit곳까지 반환합니다. (distance: m)
+        after=(거리, store_id)면 그 뒤의 가게만 (keyset 페이지네이션)
+        반경/after 조건과 limit은 배열에서 먼저 적용하고, 남은 가게만 dict로 만듭니다.
+        """
+        removed, extra = self._removed, self._extra
+        positions, distances = self._candidates(lat, lng, radius_m)
+        ids = self.ids[positions]
+        keep = distances <= radius_m
+        if after is not None:
+            keep &= (distances > after[0]) | ((distances == after[0]) & (ids > after[1]))
+        if removed:
+            keep &= ~np.isin(ids, list(removed))
+        positions, distances, ids = positions[keep], distances[keep], ids[keep]
+        if limit is not None and len(positions) > limit:
+            # 정렬 전에 limit번째로 가까운 거리까지만 남김 (같은 거리는 모두 남겨 store_id 순서 유지)
+            cutoff = np.partition(distances, limit - 1)[limit - 1]
+            near = distances <= cutoff
+            positions, distances, ids = positions[near], distances[near], ids[near]
+        order = np.lexsort((ids, distances))
+        if limit is not None:
+            order = order[:limit]
+
+        results = [self._row(int(positions[i]), distances[i]) for i in order]
+        if extra:
+            for store_id, (e_lat, e_lng, name, required_count, _) in extra.items():
+                distance = float(haversine_m(lat, lng, np.array([e_lat]), np.array([e_lng]))[0])
+                if distance > radius_m or (after is not None and (distance, store_id) <= after):
+                    continue
+                results.append({
+                    'store_id': store_id, 'name': name, 'lat': e_lat, 'lng': e_lng,
+                    'required_count': required_count, 'distance': distance,
+                })
+            results.sort(key=lambda row: (row['distance'], row['store_id']))
+            if limit is not None:
+                results = results[:limit]
+        return results
+
+    def _candidates(self, lat: float, lng: float, radius_m: float) -> Tuple[np.ndarray, np.ndarray]:
+        # 반경을 덮는 격자 칸의 가게 위치(배열 인덱스)와 거리
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        widest_lat = min(89.9, abs(lat) + dlat)
+        dlng = min(180.0, dlat / math.cos(math.radians(widest_lat)))
+
+        row_lo, row_hi = (int(math.floor((v + 90.0) / self.cell_degrees)) for v in (lat - dlat, lat + dlat))
+        col_lo = max(0, int(math.floor((lng - dlng + 180.0) / self.cell_degrees)))
+        col_hi = min(self._columns - 1, int(math.floor((lng + dlng + 180.0) / self.cell_degrees)))
+
+        # 위도 줄마다 [col_lo, col_hi] 칸이 배열에서 한 구간
+        starts = np.arange(row_lo, row_hi + 1, dtype=np.int64) * self._columns
+        lo = np.searchsorted(self.cell_keys, starts + col_lo, side='left')
+        hi = np.searchsorted(self.cell_keys, starts + col_hi, side='right')
+        slices = [np.arange(self.cell_starts[a], self.cell_starts[b]) for a, b in zip(lo, hi) if b > a]
+        positions = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+        return positions, haversine_m(lat, lng, self.lats[positions], self.lngs[positions])
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius_m: float = math.inf) -> List[Dict[str, Any]]:
+        """
+        (lat, lng)에서 가까운 가게 k곳 (반경을 두 배씩 넓혀 k곳 이상 찾으면 그 안의 순서가 정확한 순서)
+        """
+        radius = min(max_radius_m, EARTH_RADIUS_M * math.radians(self.cell_degrees) / 2)
+        while True:
+            results = self.within(lat, lng, radius, limit=k)
+            if len(results) >= k or radius >= max_radius_m or radius >= math.pi * EARTH_RADIUS_M:
+                return results
+            radius = min(max_radius_m, radius * 2)
+
+
+_index: Optional[StoreIndex] = None
+_loaded_version = None
+_loaded_at = 0.0
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def current_version() -> int:
+    """
+    가게 인덱스 버전 (DB의 StoreIndexVersion 1행, 프로세스별 캐시와 달리 모든 워커가 같은 값을 봄)
+    """
+    version = StoreIndexVersion.objects.filter(pk=VERSION_ROW_ID).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_version() -> None:
+    """
+    가게가 바뀌었음을 다른 프로세스에 알립니다. (signal이 없는 bulk_create/update 뒤에는 직접 호출)
+    """
+    if StoreIndexVersion.objects.filter(pk=VERSION_ROW_ID).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            StoreIndexVersion.objects.create(pk=VERSION_ROW_ID, version=1)
+    except IntegrityError:
+        # 다른 프로세스가 먼저 행을 만듦
+        StoreIndexVersion.objects.filter(pk=VERSION_ROW_ID).update(version=F('version') + 1)
+
+
+def reload_store_index() -> StoreIndex:
+    """
+    DB에서 인덱스를 새로 만들어 교체합니다. (만드는 동안에는 이전 인덱스로 조회)
+    """
+    global _index, _loaded_version, _loaded_at
+    with _reload_lock:
+        version = current_version()
+        started = time.perf_counter()
+        index = StoreIndex.from_db()
+        _index, _loaded_version, _loaded_at = index, version, time.monotonic()
+        logger.info("가게 인덱스 적재: %d곳, %.0f ms", len(index), (time.perf_counter() - started) * 1000)
+        return index
+
+
+def _reload_in_background() -> None:
+    if _reload_lock.locked():
+        return
+
+    def run():
+        from django.db import connection
+        try:
+            reload_store_index()
+        except Exception:
+            logger.exception("가게 인덱스 적재 실패")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name='store-index-reload', daemon=True).start()
+
+
+def warm_up() -> None:
+    """
+    서버 시작 시 백그라운드에서 인덱스를 적재합니다. (wsgi/asgi에서 호출)
+    """
+    if getattr(settings, 'STORE_INDEX_ENABLED', True):
+        _reload_in_background()
+
+
+def get_store_index() -> Optional[StoreIndex]:
+    """
+    현재 프로세스의 가게 인덱스 (꺼져 있거나 아직 적재 전이면 None -> 호출하는 쪽은 PostGIS로 조회)
+    버전 확인은 STORE_INDEX_CHECK_SECONDS마다 한 번, 버전이 바뀌었거나 STORE_INDEX_MAX_AGE_SECONDS가 지나면
+    백그라운드에서 다시 적재합니다.
+    """
+    global _checked_at
+    if not getattr(settings, 'STORE_INDEX_ENABLED', True):
+        return None
+    if _index is None:
+        _reload_in_background()
+        return None
+
+    now = time.monotonic()
+    if now - _checked_at >= getattr(settings, 'STORE_INDEX_CHECK_SECONDS', 5):
+        _checked_at = now
+        try:
+            stale = current_version() != _loaded_version
+        except Exception:
+            stale = False
+        if stale or now - _loaded_at >= getattr(settings, 'STORE_INDEX_MAX_AGE_SECONDS', 600):
+            _reload_in_background()
+    return _index
+
+
+def _index_fields_changed(update_fields) -> bool:
+    return update_fields is None or bool(INDEX_FIELDS & set(update_fields))
+
+
+def store_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # 저장 전 위치/인증 반경을 기억 (실제로 바뀐 경우에만 다른 프로세스에 알림)
+    instance._index_old_fence = None
+    if raw or instance.pk is None or not _index_fields_changed(update_fields):
+        return
+    instance._index_old_fence = (
+        Store.objects.filter(pk=instance.pk).values_list('lat', 'lng', 'geofence_meters').first()
+    )
+
+
+def store_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """
+    가게 저장 후 (커밋 시) 이 프로세스의 인덱스에 덮어쓰기
+    인증 창 시각(success_window_started_at)처럼 인덱스에 없는 필드만 저장하면 무시하고,
+    새 가게이거나 위치/인증 반경이 바뀐 경우에만 bump_version으로 다른 프로세스가 다시 적재하게 합니다.
+    (이름/필요 인원만 바뀐 경우 다른 프로세스는 STORE_INDEX_MAX_AGE_SECONDS 안에 반영)
+    """
+    if raw or not _index_fields_changed(update_fields):
+        return
+    fence = (instance.lat, instance.lng, instance.geofence_meters)
+    moved = created or getattr(instance, '_index_old_fence', None) != fence
+
+    def apply():
+        if _index is not None:
+            _index.apply(
+                instance.store_id, instance.lat, instance.lng, instance.name, instance.required_count,
+                instance.geofence_meters,
+            )
+        if moved:
+            bump_version()
+    transaction.on_commit(apply)
+
+
+def store_deleted(sender, instance, **kwargs):
+    store_id = instance.store_id
+
+    def remove():
+        if _index is not None:
+            _index.remove(store_id)
+        bump_version()
+    transaction.on_commit(remove)
@@ -0,0 +1,91 @@
+import csv
+import json
+import math
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stores.importer import import_store_file
+from stores.serializers import StoreSerializer
+
+
+class Command(BaseCommand):
+    help = "가게 일괄 가져오기(CSV/GeoJSON, bulk upsert)와 기존 방식(가게마다 StoreSerializer.create)의 rows/s를 비교합니다. (트랜잭션 롤백으로 삭제)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help="가져올 가상 가게 수")
+        parser.add_argument('--legacy-rows', type=int, default=2000, help="기존 방식으로 저장할 가게 수")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rows = self._rows(options)
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'stores.csv')
+            geojson_path = os.path.join(tmp, 'stores.geojson')
+            self._write_csv(csv_path, rows)
+            self._write_geojson(geojson_path, [dict(row, external_id=f"geo-{row['external_id']}") for row in rows])
+
+            self.stdout.write(f"{'case':<28} {'rows':>8} {'seconds':>9} {'rows/s':>10}")
+            with transaction.atomic():
+                self._legacy(rows[:options['legacy_rows']])
+                self._import('csv insert', csv_path, 'csv', options)
+                self._import('csv upsert (all existing)', csv_path, 'csv', options)
+                self._import('geojson insert', geojson_path, 'geojson', options)
+                transaction.set_rollback(True)
+
+    def _rows(self, options):
+        rng = random.Random(options['seed'])
+        center_lat, center_lng = (float(v) for v in options['center'].split(','))
+        scale = 111320.0 * math.cos(math.radians(center_lat))
+        return [
+            {
+                'external_id': f'bench-{i}',
+                'name': f'벤치마크 제휴 가게 {i}',
+                'lat': round(center_lat + rng.uniform(-20000, 20000) / 111320.0, 7),
+                'lng': round(center_lng + rng.uniform(-20000, 20000) / scale, 7),
+                'required_count': rng.randint(3, 20),
+            }
+            for i in range(options['rows'])
+        ]
+
+    def _write_csv(self, path, rows):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['external_id', 'name', 'lat', 'lng', 'required_count'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def _write_geojson(self, path, rows):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "FeatureCollection", "features": [\n')
+            for i, row in enumerate(rows):
+                feature = {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [row['lng'], row['lat']]},
+                    'properties': {k: row[k] for k in ('external_id', 'name', 'required_count')},
+                }
+                f.write((',\n' if i else '') + json.dumps(feature, ensure_ascii=False))
+            f.write('\n]}\n')
+
+    def _legacy(self, rows):
+        started = time.perf_counter()
+        for row in rows:
+            serializer = StoreSerializer(data={**row, 'external_id': f"legacy-{row['external_id']}"})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        self._report('legacy StoreSerializer', len(rows), time.perf_counter() - started)
+
+    def _import(self, name, path, file_format, options):
+        with open(path, 'rb') as f:
+            result = import_store_file(f, file_format, options['batch_size'])
+        if result.skipped:
+            self.stderr.write(f"{name}: 건너뛴 행 {result.skipped}개 ({result.errors[:3]})")
+        self._report(name, result.rows, result.seconds)
+
+    def _report(self, name, rows, seconds):
+        self.stdout.write(f"{name:<28} {rows:>8} {seconds:>9.2f} {rows / seconds if seconds else 0:>10.0f}")
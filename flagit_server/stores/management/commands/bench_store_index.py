@@ -0,0 +1,65 @@
+import math
+import random
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from stores.index import StoreIndex
+
+
+class Command(BaseCommand):
+    help = "가상 가게로 프로세스 내 가게 인덱스(stores.index)의 메모리 사용량, 적재 시간, 조회 지연 시간을 측정합니다. (DB 사용 안 함)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=1000000)
+        parser.add_argument('--spread-km', type=float, default=200.0, help="가상 가게를 흩뿌릴 범위(중심에서 km)")
+        parser.add_argument('--center', default='36.5,127.8')
+        parser.add_argument('--radius', type=float, default=1000.0, help="반경 조회 반경(m)")
+        parser.add_argument('--k', type=int, default=32, help="최근접 조회 가게 수")
+        parser.add_argument('--runs', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        center_lat, center_lng = (float(v) for v in options['center'].split(','))
+        n = options['stores']
+        rng = np.random.default_rng(options['seed'])
+        dlat = options['spread_km'] * 1000 / 111320.0
+        dlng = dlat / math.cos(math.radians(center_lat))
+        lats = center_lat + rng.uniform(-dlat, dlat, n)
+        lngs = center_lng + rng.uniform(-dlng, dlng, n)
+        names = [f'플래그잇 제휴 가게 {i}' for i in range(n)]
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = StoreIndex(np.arange(1, n + 1), lats, lngs, np.full(n, 10), names)
+        build_s = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        sizes = index.nbytes()
+        self.stdout.write(f"가게 {n}곳, 인덱스 생성 {build_s:.2f}s (생성 중 최대 할당 {peak / 1024 / 1024:.1f} MB)")
+        for name, size in sizes.items():
+            self.stdout.write(f"  {name:<16} {size / 1024 / 1024:>8.2f} MB")
+        self.stdout.write(f"  가게당 {sizes['total'] / n:.1f} bytes")
+
+        points = random.Random(options['seed'])
+        queries = [
+            (center_lat + points.uniform(-dlat, dlat), center_lng + points.uniform(-dlng, dlng))
+            for _ in range(options['runs'])
+        ]
+        self.stdout.write(f"{'query':<22} {'p50 ms':>9} {'p95 ms':>9} {'rows':>7}")
+        self._time(f"within {options['radius']:.0f}m", queries, lambda lat, lng: index.within(lat, lng, options['radius']))
+        self._time(f"nearest k={options['k']}", queries, lambda lat, lng: index.nearest(lat, lng, options['k']))
+
+    def _time(self, name, queries, query):
+        durations, rows = [], []
+        for lat, lng in queries:
+            started = time.perf_counter()
+            rows.append(len(query(lat, lng)))
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+        self.stdout.write(f"{name:<22} {statistics.median(durations):>9.3f} {p95:>9.3f} {statistics.mean(rows):>7.1f}")
@@ -0,0 +1,102 @@
+import math
+import random
+import statistics
+import time
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from stores.models import Store
+from stores.nearby import NearbyCursor, nearby_store_queryset
+
+
+class Command(BaseCommand):
+    help = "기존 주변 가게 조회(전체 가게 거리 계산 후 정렬)와 반경/페이지 조회(ST_DWithin + KNN keyset)의 지연 시간을 비교합니다. (가상 가게는 트랜잭션 롤백으로 삭제)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=100000, help="임시로 만들 가상 가게 수 (0이면 기존 데이터만 사용)")
+        parser.add_argument('--spread-km', type=float, default=20.0, help="가상 가게를 흩뿌릴 범위(중심에서 km)")
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--radius', type=float, default=5000.0, help="검색 반경(m)")
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--pages', type=int, default=3, help="cursor로 이어서 조회할 페이지 수")
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--explain', action='store_true', help="첫 페이지 쿼리의 실행 계획 출력")
+
+    def handle(self, *args, **options):
+        center_lat, center_lng = (float(v) for v in options['center'].split(','))
+        with transaction.atomic():
+            if options['stores']:
+                self._seed(center_lat, center_lng, options)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE stores_store')
+            self._bench(center_lat, center_lng, options)
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _offset(lat, lng, dx, dy):
+        return lat + dy / 111320.0, lng + dx / (111320.0 * math.cos(math.radians(lat)))
+
+    def _seed(self, center_lat, center_lng, options):
+        rng = random.Random(options['seed'])
+        spread = options['spread_km'] * 1000
+        stores = []
+        for i in range(options['stores']):
+            lat, lng = self._offset(center_lat, center_lng, rng.uniform(-spread, spread), rng.uniform(-spread, spread))
+            stores.append(Store(name=f'bench-{i}', lat=lat, lng=lng, location=Point(lng, lat, srid=4326)))
+        Store.objects.bulk_create(stores, batch_size=5000)
+        self.stdout.write(f"가상 가게 {len(stores)}곳 생성 (롤백 예정)")
+
+    def _bench(self, center_lat, center_lng, options):
+        rng = random.Random(options['seed'] + 1)
+        radius, limit = options['radius'], options['limit']
+        legacy_ms, first_ms, paged_ms, returned, overlap = [], [], [], [], []
+
+        for run in range(options['runs']):
+            lat, lng = self._offset(center_lat, center_lng, rng.uniform(-5000, 5000), rng.uniform(-5000, 5000))
+            point = Point(lng, lat, srid=4326)
+
+            # 기존 방식: 모든 가게의 거리를 계산해 정렬한 뒤 전부 직렬화
+            started = time.perf_counter()
+            legacy = list(Store.objects.annotate(distance=Distance('location', point)).order_by('distance'))
+            legacy_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            page = list(nearby_store_queryset(lat, lng, radius)[:limit + 1])
+            first_ms.append((time.perf_counter() - started) * 1000)
+
+            # 첫 페이지는 반경 안 가게만, KNN(<->) 순서와 실제 거리 순서는 경계에서만 조금 다를 수 있음
+            expected = [store.store_id for store in legacy if store.distance.m <= radius][:limit]
+            if any(store.distance.m > radius for store in page):
+                self.stderr.write(f"run {run}: 첫 페이지에 반경 밖 가게가 있습니다.")
+            overlap.append(len({store.store_id for store in page[:limit]} & set(expected)) / max(1, len(expected)))
+
+            started = time.perf_counter()
+            seen = [store.store_id for store in page[:limit]]
+            for _ in range(options['pages'] - 1):
+                if len(page) <= limit:
+                    break
+                last = page[limit - 1]
+                page = list(nearby_store_queryset(lat, lng, radius, NearbyCursor(last.knn, last.store_id, knn=True))[:limit + 1])
+                seen.extend(store.store_id for store in page[:limit])
+            paged_ms.append((time.perf_counter() - started) * 1000)
+            if len(seen) != len(set(seen)):
+                self.stderr.write(f"run {run}: cursor 페이지에 중복된 가게가 있습니다.")
+            returned.append(len(seen))
+
+        def row(name, durations, rows):
+            durations.sort()
+            p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+            self.stdout.write(f"{name:<22} {statistics.median(durations):>9.2f} {p95:>9.2f} {rows:>9.0f}")
+
+        self.stdout.write(f"{'query':<22} {'p50 ms':>9} {'p95 ms':>9} {'rows':>9}")
+        row('legacy (full scan)', legacy_ms, Store.objects.count())
+        row('first page', first_ms, limit)
+        row(f"next {options['pages'] - 1} pages (cursor)", paged_ms, statistics.mean(returned) - limit)
+        self.stdout.write(f"첫 페이지와 기존 정렬 앞 {limit}곳의 평균 일치율: {statistics.mean(overlap):.3f}")
+
+        if options['explain']:
+            self.stdout.write(nearby_store_queryset(center_lat, center_lng, radius)[:limit + 1].explain(analyze=True))
@@ -0,0 +1,111 @@
+import math
+import random
+import statistics
+import tempfile
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stores.models import Store
+from stores.tiles import TileCache, render_tile, tile_for_point
+
+
+class Command(BaseCommand):
+    help = "가게 벡터 타일 렌더링 시간과 디스크 캐시 적중률을 측정합니다. (가상 가게는 트랜잭션 롤백으로 삭제, 캐시는 임시 디렉터리 사용)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stores', type=int, default=100000, help="임시로 만들 가상 가게 수 (0이면 기존 데이터만 사용)")
+        parser.add_argument('--spread-km', type=float, default=20.0, help="가상 가게를 흩뿌릴 범위(중심에서 km)")
+        parser.add_argument('--center', default='37.5665,126.9780')
+        parser.add_argument('--zooms', default='10,12,14,16', help="측정할 줌 레벨 목록, 쉼표 구분")
+        parser.add_argument('--requests', type=int, default=2000, help="캐시 적중률 측정용 타일 요청 수")
+        parser.add_argument('--moves', type=int, default=50, help="요청 중간에 이동시킬 가게 수 (무효화 영향 측정)")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        center_lat, center_lng = (float(v) for v in options['center'].split(','))
+        zooms = [int(v) for v in options['zooms'].split(',')]
+        with transaction.atomic():
+            if options['stores']:
+                self._seed(center_lat, center_lng, options)
+            tiles = self._tiles(center_lat, center_lng, zooms, options['spread_km'])
+            self._bench_render(tiles)
+            self._bench_cache(center_lat, center_lng, tiles, options)
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _offset(lat, lng, dx, dy):
+        return lat + dy / 111320.0, lng + dx / (111320.0 * math.cos(math.radians(lat)))
+
+    def _seed(self, center_lat, center_lng, options):
+        rng = random.Random(options['seed'])
+        spread = options['spread_km'] * 1000
+        stores = []
+        for i in range(options['stores']):
+            lat, lng = self._offset(center_lat, center_lng, rng.uniform(-spread, spread), rng.uniform(-spread, spread))
+            stores.append(Store(name=f'bench-{i}', lat=lat, lng=lng, location=Point(lng, lat, srid=4326)))
+        Store.objects.bulk_create(stores, batch_size=5000)
+        self.stdout.write(f"가상 가게 {len(stores)}곳 생성 (롤백 예정)")
+
+    def _tiles(self, center_lat, center_lng, zooms, spread_km):
+        # 가게가 흩어진 범위를 덮는 줌별 타일 목록
+        tiles = {}
+        spread = spread_km * 1000
+        for z in zooms:
+            min_x, max_y = tile_for_point(*self._offset(center_lat, center_lng, -spread, -spread), z)
+            max_x, min_y = tile_for_point(*self._offset(center_lat, center_lng, spread, spread), z)
+            tiles[z] = [(z, x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+        return tiles
+
+    def _bench_render(self, tiles):
+        self.stdout.write(f"{'zoom':>4} {'tiles':>6} {'p50 ms':>9} {'p95 ms':>9} {'avg KB':>8}")
+        for z, coords in tiles.items():
+            sample = coords if len(coords) <= 100 else random.Random(z).sample(coords, 100)
+            durations, sizes = [], []
+            for coord in sample:
+                started = time.perf_counter()
+                sizes.append(len(render_tile(*coord)))
+                durations.append((time.perf_counter() - started) * 1000)
+            durations.sort()
+            p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+            self.stdout.write(
+                f"{z:>4} {len(coords):>6} {statistics.median(durations):>9.2f} {p95:>9.2f} {statistics.mean(sizes) / 1024:>8.1f}"
+            )
+
+    def _bench_cache(self, center_lat, center_lng, tiles, options):
+        # 지도 요청처럼 도심(중심에 가까운 타일)에 몰리는 분포로 요청
+        rng = random.Random(options['seed'] + 1)
+        spread = options['spread_km'] * 1000
+        zooms = list(tiles)
+        move_every = options['requests'] // options['moves'] if options['moves'] else 0
+        stores = list(Store.objects.order_by('?').values_list('store_id', flat=True)[:options['moves']])
+
+        with tempfile.TemporaryDirectory() as root:
+            cache = TileCache(root)
+            hit_ms, miss_ms = [], []
+            for i in range(options['requests']):
+                lat, lng = self._offset(center_lat, center_lng, rng.gauss(0, spread / 4), rng.gauss(0, spread / 4))
+                z = rng.choice(zooms)
+                coord = (z, *tile_for_point(lat, lng, z))
+                misses = cache.misses
+                started = time.perf_counter()
+                cache.get_or_render(*coord)
+                (miss_ms if cache.misses > misses else hit_ms).append((time.perf_counter() - started) * 1000)
+
+                if move_every and i % move_every == move_every - 1 and stores:
+                    # StoreSerializer.update와 같은 무효화 (이전/새 위치)
+                    store = Store.objects.get(store_id=stores.pop())
+                    cache.invalidate_point(store.lat, store.lng)
+                    store.lat, store.lng = self._offset(store.lat, store.lng, rng.uniform(-500, 500), rng.uniform(-500, 500))
+                    store.location = Point(store.lng, store.lat, srid=4326)
+                    store.save(update_fields=['lat', 'lng', 'location'])
+                    cache.invalidate_point(store.lat, store.lng)
+
+            stats = cache.stats()
+        self.stdout.write(
+            f"요청 {options['requests']}회, 가게 이동 {options['moves']}회: 적중률 {stats['hit_ratio']:.1%} "
+            f"(hit p50 {statistics.median(hit_ms) if hit_ms else float('nan'):.2f} ms, "
+            f"miss p50 {statistics.median(miss_ms) if miss_ms else float('nan'):.2f} ms)"
+        )
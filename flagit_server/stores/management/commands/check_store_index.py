@@ -0,0 +1,72 @@
+import math
+import random
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand, CommandError
+
+from stores.index import StoreIndex
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = "프로세스 내 가게 인덱스(stores.index)의 반경/최근접 조회 결과가 PostGIS 결과와 같은지 확인합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=200, help="확인할 임의 지점 수")
+        parser.add_argument('--radius', type=float, default=1000.0, help="반경 조회 반경(m)")
+        parser.add_argument('--k', type=int, default=10, help="최근접 조회 가게 수")
+        parser.add_argument('--tolerance', type=float, default=0.01, help="경계/순서 비교 시 허용하는 거리 차이(m)")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        index = StoreIndex.from_db()
+        if not len(index):
+            raise CommandError("가게가 없습니다.")
+        self.stdout.write(f"인덱스 가게 {len(index)}곳, 메모리 {index.nbytes()['total'] / 1024 / 1024:.1f} MB")
+
+        rng = random.Random(options['seed'])
+        sample_ids = list(Store.objects.values_list('store_id', flat=True).order_by('?')[:options['samples']])
+        radius, k, tolerance = options['radius'], options['k'], options['tolerance']
+        mismatches = 0
+
+        for store_id in sample_ids:
+            # 가게 주변(반경 안쪽) 임의 지점에서 조회
+            base = index.get(store_id)
+            angle, offset = rng.uniform(0, 2 * math.pi), rng.uniform(0, radius)
+            lat = base['lat'] + offset * math.sin(angle) / 111320.0
+            lng = base['lng'] + offset * math.cos(angle) / (111320.0 * math.cos(math.radians(base['lat'])))
+            point = Point(lng, lat, srid=4326)
+
+            expected = {
+                store.store_id: store.distance.m
+                for store in Store.objects.filter(location__distance_lte=(point, D(m=radius)))
+                .annotate(distance=Distance('location', point))
+            }
+            actual = {row['store_id']: row['distance'] for row in index.within(lat, lng, radius)}
+            # 반경 경계에 걸친 가게는 계산 오차로 갈릴 수 있으므로 제외하고 비교
+            differs = {
+                sid for sid in set(expected) ^ set(actual)
+                if abs(expected.get(sid, actual.get(sid)) - radius) > tolerance
+            }
+            differs |= {sid for sid in set(expected) & set(actual) if abs(expected[sid] - actual[sid]) > tolerance}
+            if differs:
+                mismatches += 1
+                self.stderr.write(f"within ({lat:.6f}, {lng:.6f}): 다른 가게 {sorted(differs)[:10]}")
+
+            nearest_db = [
+                (store.distance.m, store.store_id)
+                for store in Store.objects.annotate(distance=Distance('location', point)).order_by('distance', 'store_id')[:k]
+            ]
+            nearest_index = [(row['distance'], row['store_id']) for row in index.nearest(lat, lng, k)]
+            # 거리가 같은(허용 오차 이내) 가게끼리는 순서가 바뀌어도 같은 결과로 봄
+            if len(nearest_db) != len(nearest_index) or any(
+                abs(a[0] - b[0]) > tolerance for a, b in zip(nearest_db, nearest_index)
+            ):
+                mismatches += 1
+                self.stderr.write(f"nearest ({lat:.6f}, {lng:.6f}): {nearest_db[:3]} != {nearest_index[:3]}")
+
+        if mismatches:
+            raise CommandError(f"{len(sample_ids)}개 지점 중 {mismatches}건 불일치")
+        self.stdout.write(self.style.SUCCESS(f"{len(sample_ids)}개 지점에서 반경/최근접 조회 결과가 PostGIS와 일치합니다."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stores.importer import IMPORT_FORMATS, guess_format, import_store_file
+
+
+class Command(BaseCommand):
+    help = "CSV/GeoJSON 파일의 가게를 external_id 기준으로 일괄 upsert 합니다. (파일을 스트리밍으로 읽음)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV(external_id,name,lat,lng[,required_count]) 또는 GeoJSON FeatureCollection")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None, help="미지정 시 확장자로 추정")
+        parser.add_argument('--batch-size', type=int, default=None, help="미지정 시 STORE_IMPORT_BATCH_SIZE")
+        parser.add_argument('--dry-run', action='store_true', help="검증과 생성/수정 건수만 확인")
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options['format'] or guess_format(options['path'])
+            with open(options['path'], 'rb') as f:
+                result = import_store_file(f, file_format, options['batch_size'], options['dry_run'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"{error['row']}행: {error['message']}")
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result.rows}행: 생성 {result.created}, 수정 {result.updated}, 건너뜀 {result.skipped} "
+            f"({result.seconds:.2f}s, {result.rows_per_second:.0f} rows/s)"
+        ))
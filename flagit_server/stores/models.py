@@ -5,10 +5,16 @@ from django.contrib.gis.db.models import PointField
 class Store(models.Model):
     store_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True) # 제휴사 가게 식별자 (일괄 가져오기 upsert 기준)
     lat = models.FloatField() # 위도
     lng = models.FloatField() # 경도
     location = PointField() # 위치
     required_count = models.IntegerField(default=10)
+    geofence_meters = models.IntegerField(null=True, blank=True) # 인증 요청을 받는 가게 반경(m), 밖에서 보낸 요청은 거절 (비우면 인증 흐름별 기본값)
     success_window_started_at = models.DateTimeField(null=True, blank=True)
     success_window_seconds = models.IntegerField(default=5)
 
+
+class StoreIndexVersion(models.Model):
+    # 프로세스 내 가게 인덱스(stores.index)의 버전 (가게가 바뀔 때마다 증가, 모든 프로세스가 DB에서 확인하는 1행)
+    version = models.BigIntegerField(default=0)
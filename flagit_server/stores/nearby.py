@@ -0,0 +1,128 @@
+import base64
+import binascii
+import json
+import math
+from typing import NamedTuple, Optional
+
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db.models import Q
+
+from .index import get_store_index
+from .models import Store
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def degree_radius(lat: float, radius_m: float) -> float:
+    """
+    반경(m)을 덮는 평면 각도 반경(도)
+    SRID 4326 geometry의 ST_DWithin은 도 단위로만 비교하므로, 경도 방향이 가장 넓어지는 위도 기준으로 잡습니다.
+    """
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    widest_lat = min(89.9, abs(lat) + dlat)
+    return dlat / math.cos(math.radians(widest_lat))
+
+
+class NearbyCursor(NamedTuple):
+    """
+    이전 페이지 마지막 가게의 정렬 키
+    - knn=False: 실제 거리(m) 순 (프로세스 내 가게 인덱스)
+    - knn=True: PostGIS KNN(<->) 값 순 (nearby_store_queryset)
+    """
+    distance: float
+    store_id: int
+    knn: bool = False
+
+
+def encode_cursor(distance: float, store_id: int, knn: bool = False) -> str:
+    """
+    마지막 가게의 (정렬 키, store_id) -> 다음 페이지 cursor 문자열
+    """
+    values = [distance, store_id, 1] if knn else [distance, store_id]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[NearbyCursor]:
+    """
+    cursor 문자열 -> NearbyCursor, 형식이 잘못되면 ValueError
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        distance, store_id, *kind = json.loads(raw)
+        distance, store_id = float(distance), int(store_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError('cursor 형식이 올바르지 않습니다.') from e
+    if not math.isfinite(distance) or kind not in ([], [1]):
+        raise ValueError('cursor 형식이 올바르지 않습니다.')
+    return NearbyCursor(distance, store_id, knn=bool(kind))
+
+
+def nearby_store_queryset(lat: float, lng: float, radius_m: float, cursor: Optional[NearbyCursor] = None):
+    """
+    (lat, lng)에서 radius_m 안의 가게를 가까운 순으로 조회하는 queryset (distance(m), knn 주석 포함)
+    - location__dwithin: GiST 인덱스로 반경을 덮는 범위의 가게만 후보로 (전체 가게 거리 계산 방지)
+    - location__distance_lte: 실제 거리(m)로 반경 밖 후보 제외
+    - 정렬: GeometryDistance(<->)로 GiST 인덱스의 KNN 순서를 그대로 사용해, limit만큼만 읽고 멈춤
+    - cursor: 이전 페이지 마지막 가게 이후만 (keyset 페이지네이션, OFFSET 없이 일정한 비용)
+    4326 geometry의 <->는 도 단위 평면 거리라 실제 거리(m) 순서와 조금 어긋날 수 있으므로,
+    다음 페이지도 같은 <-> 값(knn)으로 이어갑니다.
+    프로세스 내 인덱스가 만든 실제 거리 cursor(knn=False)로 이어지는 경우에만 실제 거리 순으로 정렬합니다.
+    """
+    point = Point(lng, lat, srid=4326)
+    queryset = (
+        Store.objects
+        .filter(location__dwithin=(point, degree_radius(lat, radius_m)))
+        .filter(location__distance_lte=(point, D(m=radius_m)))
+        .annotate(distance=Distance('location', point), knn=GeometryDistance('location', point))
+    )
+    if cursor is None or cursor.knn:
+        if cursor is not None:
+            queryset = queryset.filter(
+                Q(knn__gt=cursor.distance) | Q(knn=cursor.distance, store_id__gt=cursor.store_id)
+            )
+        return queryset.order_by('knn', 'store_id')
+
+    queryset = queryset.filter(
+        Q(distance__gt=D(m=cursor.distance)) | Q(distance=D(m=cursor.distance), store_id__gt=cursor.store_id)
+    )
+    return queryset.order_by('distance', 'store_id')
+
+
+def nearby_stores(lat: float, lng: float, radius_m: float, limit: int, cursor: Optional[NearbyCursor] = None):
+    """
+    주변 가게 한 페이지 -> ([{store_id, name, lat, lng, required_count, distance(m)}], next_cursor)
+    프로세스 내 인덱스(stores.index)가 적재되어 있으면 DB를 조회하지 않고, 아니면 nearby_store_queryset으로 조회합니다.
+    DB에서 시작한 페이지(knn cursor)는 인덱스가 적재된 프로세스에서도 DB에서 이어서 조회합니다.
+    """
+    index = get_store_index()
+    # 다음 페이지는 cursor를 만든 쪽과 같은 정렬로 이어감
+    knn = index is None if cursor is None else cursor.knn
+    if index is not None and not knn:
+        rows = index.within(lat, lng, radius_m, limit=limit + 1, after=cursor and cursor[:2])
+        keys = [row['distance'] for row in rows]
+    else:
+        stores = list(nearby_store_queryset(lat, lng, radius_m, cursor)[:limit + 1])
+        rows = [
+            {
+                'store_id': store.store_id,
+                'name': store.name,
+                'lat': store.lat,
+                'lng': store.lng,
+                'required_count': store.required_count,
+                'distance': store.distance.m,
+            }
+            for store in stores
+        ]
+        keys = [store.knn if knn else store.distance.m for store in stores]
+
+    # limit + 1개를 조회해 다음 페이지 존재 여부 확인
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(keys[limit - 1], rows[-1]['store_id'], knn=knn)
+    return rows, next_cursor
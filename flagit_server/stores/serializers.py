@@ -8,7 +8,7 @@ class StoreSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Store
-        fields = ['store_id', 'name', 'lat', 'lng', 'required_count']
+        fields = ['store_id', 'external_id', 'name', 'lat', 'lng', 'required_count', 'geofence_meters']
     
     def create(self, validated_data):
         # lat, lng을 location으로 변환
@@ -25,9 +25,21 @@ class StoreSerializer(serializers.ModelSerializer):
             location=location,
             **validated_data
         )
-        
         return store
 
+    def update(self, instance, validated_data):
+        # 위치가 바뀌면 location도 함께 갱신 (캐시 타일 무효화는 stores.tiles의 signal이 처리)
+        lat = validated_data.pop('lat', instance.lat)
+        lng = validated_data.pop('lng', instance.lng)
+
+        instance.lat = lat
+        instance.lng = lng
+        instance.location = Point(x=lng, y=lat, srid=4326)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save()
+        return instance
+
 class StoreListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Store
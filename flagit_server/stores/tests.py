@@ -1,3 +1,229 @@
-from django.test import TestCase
+import math
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .geofence import StoreFence, default_geofence_meters
+from . import index as store_index
+from .index import StoreIndex
+from .models import Store
+from .nearby import NearbyCursor, decode_cursor, encode_cursor
+
+CENTER = (37.5665, 126.9780)
+# 인덱스(haversine)와 PostGIS(ST_DistanceSphere) 거리의 허용 차이(m)
+TOLERANCE_M = 0.5
+
+
+def random_points(n, seed=7, spread=0.05):
+    rng = random.Random(seed)
+    lat, lng = CENTER
+    return [(lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread)) for _ in range(n)]
+
+
+def build_index(points):
+    ids = range(1, len(points) + 1)
+    return StoreIndex(
+        ids, [p[0] for p in points], [p[1] for p in points], [10] * len(points),
+        [f'가게 {i}' for i in ids], cell_degrees=0.01,
+    )
+
+
+class StoreIndexOverlayTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index(random_points(200))
+
+    def test_apply_adds_new_store(self):
+        lat, lng = CENTER
+        self.index.apply(1000, lat, lng, '새 가게', 3, 50)
+
+        self.assertEqual(len(self.index), 201)
+        self.assertEqual(self.index.get(1000)['name'], '새 가게')
+        self.assertEqual(self.index.fence(1000), (lat, lng, 50))
+        self.assertEqual(self.index.nearest(lat, lng, 1)[0]['store_id'], 1000)
+
+    def test_apply_moves_existing_store(self):
+        lat, lng = 37.7, 127.2
+        self.index.apply(1, lat, lng, '옮긴 가게', 10, 5000)
+
+        self.assertEqual(len(self.index), 200)
+        self.assertEqual((self.index.get(1)['lat'], self.index.get(1)['lng']), (lat, lng))
+        near_old = {row['store_id'] for row in self.index.within(*CENTER, 10000)}
+        self.assertNotIn(1, near_old)
+        self.assertEqual([row['store_id'] for row in self.index.within(lat, lng, 10)], [1])
+
+    def test_remove_hides_store(self):
+        self.index.apply(1000, *CENTER, '새 가게', 3, 50)
+        self.index.remove(1000)
+        self.index.remove(1)
+
+        self.assertEqual(len(self.index), 199)
+        self.assertIsNone(self.index.get(1))
+        self.assertIsNone(self.index.fence(1000))
+        ids = {row['store_id'] for row in self.index.within(*CENTER, 20000)}
+        self.assertFalse(ids & {1, 1000})
+
+
+class StoreIndexCursorTests(SimpleTestCase):
+    def setUp(self):
+        self.index = build_index(random_points(500))
+        self.index.apply(1000, *CENTER, '새 가게', 3, 50)
+
+    def test_pages_follow_full_order(self):
+        expected = [row['store_id'] for row in self.index.within(*CENTER, 3000)]
+        pages, after = [], None
+        while True:
+            page = self.index.within(*CENTER, 3000, limit=21, after=after)
+            pages.extend(row['store_id'] for row in page[:20])
+            if len(page) <= 20:
+                break
+            # API처럼 cursor 문자열을 거쳐 다음 페이지 조회
+            after = decode_cursor(encode_cursor(page[19]['distance'], page[19]['store_id']))
+
+        self.assertEqual(pages, expected)
+
+    def test_limit_keeps_distance_order(self):
+        rows = self.index.within(*CENTER, 3000, limit=10)
+        keys = [(row['distance'], row['store_id']) for row in rows]
+
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(rows[0]['store_id'], 1000)
+
+    def test_cursor_keeps_ordering_kind(self):
+        self.assertEqual(decode_cursor(encode_cursor(12.5, 3)), NearbyCursor(12.5, 3, knn=False))
+        self.assertEqual(decode_cursor(encode_cursor(0.0012, 3, knn=True)), NearbyCursor(0.0012, 3, knn=True))
+
+    def test_decode_cursor_rejects_invalid_values(self):
+        self.assertIsNone(decode_cursor(''))
+        # 'WzEuMCwxLDJd' = [1.0,1,2] (알 수 없는 정렬 종류)
+        for cursor in ('not-base64!', encode_cursor(float('nan'), 1), 'WzEuMCwxLDJd'):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class StoreFenceTests(SimpleTestCase):
+    def test_default_radius_follows_certification_flow(self):
+        with override_settings(CERTIFICATION_FLOW='button'):
+            self.assertEqual(default_geofence_meters(), 5000)
+        with override_settings(CERTIFICATION_FLOW='window'):
+            self.assertEqual(default_geofence_meters(), 50)
+
+    def test_contains(self):
+        fence = StoreFence(1, *CENTER, 50)
+        lat, lng = CENTER
+
+        self.assertTrue(fence.contains(lat + 40 / 111195.0, lng))
+        self.assertFalse(fence.contains(lat + 60 / 111195.0, lng))
+
+    def test_index_fence_without_store_radius(self):
+        index = build_index(random_points(10))
+        index.apply(1000, *CENTER, '새 가게', 3)
+
+        self.assertIsNone(index.fence(1)[2])
+        self.assertIsNone(index.fence(1000)[2])
+
+
+class StoreIndexSignalTests(SimpleTestCase):
+    """
+    가게 저장 signal: 인덱스 필드가 바뀐 저장만 반영하고, 위치/인증 반경이 바뀐 경우에만 버전 증가
+    """
+
+    def setUp(self):
+        self.index = build_index(random_points(10))
+        patchers = [
+            mock.patch('stores.index._index', self.index),
+            mock.patch('stores.index.transaction.on_commit', side_effect=lambda func: func()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('stores.index.bump_version')
+        self.bump_version = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def store(self, store_id=1, **kwargs):
+        lat, lng = CENTER
+        values = {'name': '가게', 'lat': lat, 'lng': lng, 'required_count': 10, 'geofence_meters': None, **kwargs}
+        store = Store(store_id=store_id, location=Point(values['lng'], values['lat'], srid=4326), **values)
+        store._index_old_fence = (lat, lng, None)
+        return store
+
+    def test_window_only_save_is_ignored(self):
+        store = self.store(name='바뀐 이름')
+        store_index.store_saved(Store, store, update_fields=frozenset(['success_window_started_at']))
+
+        self.assertEqual(self.index.get(1)['name'], '가게 1')
+        self.bump_version.assert_not_called()
+
+    def test_name_change_applies_without_bump(self):
+        store_index.store_saved(Store, self.store(name='바뀐 이름'))
+
+        self.assertEqual(self.index.get(1)['name'], '바뀐 이름')
+        self.bump_version.assert_not_called()
+
+    def test_move_and_create_bump_version(self):
+        store_index.store_saved(Store, self.store(lat=37.6))
+        store_index.store_saved(Store, self.store(store_id=1000), created=True)
+
+        self.assertEqual(self.index.get(1)['lat'], 37.6)
+        self.assertIsNotNone(self.index.get(1000))
+        self.assertEqual(self.bump_version.call_count, 2)
+
+
+class StoreIndexPostGISTests(TestCase):
+    """
+    인덱스의 반경/최근접 조회가 PostGIS Distance 조회와 같은지 확인
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Store.objects.bulk_create([
+            Store(name=f'가게 {i}', lat=lat, lng=lng, location=Point(lng, lat, srid=4326))
+            for i, (lat, lng) in enumerate(random_points(300, seed=11))
+        ])
+
+    def setUp(self):
+        self.index = StoreIndex.from_db()
+
+    def test_within_matches_postgis(self):
+        radius = 2000
+        for lat, lng in random_points(20, seed=3):
+            point = Point(lng, lat, srid=4326)
+            expected = {
+                store.store_id: store.distance.m
+                for store in Store.objects.filter(location__distance_lte=(point, D(m=radius)))
+                .annotate(distance=Distance('location', point))
+            }
+            actual = {row['store_id']: row['distance'] for row in self.index.within(lat, lng, radius)}
+
+            # 반경 경계에 걸친 가게는 계산 오차로 갈릴 수 있으므로 제외
+            differs = {
+                store_id for store_id in set(expected) ^ set(actual)
+                if abs(expected.get(store_id, actual.get(store_id)) - radius) > TOLERANCE_M
+            }
+            self.assertEqual(differs, set())
+            for store_id in set(expected) & set(actual):
+                self.assertAlmostEqual(expected[store_id], actual[store_id], delta=TOLERANCE_M)
+
+    def test_nearest_matches_postgis(self):
+        for lat, lng in random_points(20, seed=5):
+            point = Point(lng, lat, srid=4326)
+            expected = list(
+                Store.objects.annotate(distance=Distance('location', point))
+                .order_by('distance', 'store_id').values_list('store_id', flat=True)[:10]
+            )
+            actual = [row['store_id'] for row in self.index.nearest(lat, lng, 10)]
+            self.assertEqual(actual, expected)
+
+    def test_from_db_keeps_store_values(self):
+        store = Store.objects.order_by('store_id').first()
+        row = self.index.get(store.store_id)
+
+        self.assertEqual(len(self.index), 300)
+        self.assertEqual(row['name'], store.name)
+        self.assertTrue(math.isclose(row['lat'], store.lat) and math.isclose(row['lng'], store.lng))
+        self.assertEqual(self.index.fence(store.store_id)[2], store.geofence_meters)
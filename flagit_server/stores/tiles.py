@@ -0,0 +1,182 @@
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Store
+
+TILE_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+TILE_LAYER = 'stores'
+TILE_EXTENT = 4096
+# 타일 feature에 들어가는 가게 필드 (이 필드가 바뀔 때만 타일을 무효화)
+TILE_FIELDS = frozenset(['lat', 'lng', 'location', 'name', 'required_count'])
+
+
+def tile_in_range(z: int, x: int, y: int) -> bool:
+    max_zoom = getattr(settings, 'STORE_TILE_MAX_ZOOM', 20)
+    return 0 <= z <= max_zoom and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tile_for_point(lat: float, lng: float, z: int) -> Tuple[int, int]:
+    """
+    (lat, lng)를 포함하는 z 레벨 타일 (x, y) (XYZ / Web Mercator)
+    """
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lng + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_etag(data: bytes) -> str:
+    # 타일 내용으로 만든 strong ETag
+    return '"%s"' % hashlib.sha1(data).hexdigest()
+
+
+def render_tile(z: int, x: int, y: int) -> bytes:
+    """
+    ST_AsMVT로 z/x/y 타일 안의 가게를 'stores' 레이어로 렌더링합니다. (가게가 없으면 빈 bytes)
+    타일 범위(ST_TileEnvelope)를 4326으로 바꿔 location && 비교하므로 공간 인덱스를 사용합니다.
+    """
+    sql = f"""
+        WITH bounds AS (SELECT ST_TileEnvelope(%s, %s, %s) AS geom),
+        features AS (
+            SELECT
+                ST_AsMVTGeom(ST_Transform(s.location, 3857), bounds.geom, {TILE_EXTENT}, 64, true) AS geom,
+                s.store_id, s.name, s.required_count
+            FROM {Store._meta.db_table} s, bounds
+            WHERE s.location && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(features.*, %s, {TILE_EXTENT}, 'geom') FROM features
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [z, x, y, TILE_LAYER])
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b''
+
+
+class TileCache:
+    """
+    렌더링한 타일을 {root}/{z}/{x}/{y}.mvt 파일로 보관하는 디스크 캐시
+    같은 서버의 워커 프로세스들이 공유하며, 가게가 생성/이동되면 그 위치를 덮는 타일만 지웁니다.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.STORE_TILE_CACHE_DIR)
+
+    def path(self, z: int, x: int, y: int) -> Path:
+        return self.root / str(z) / str(x) / f'{y}.mvt'
+
+    def get(self, z: int, x: int, y: int) -> Optional[bytes]:
+        try:
+            return self.path(z, x, y).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, z: int, x: int, y: int, data: bytes) -> None:
+        path = self.path(z, x, y)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체해 읽는 쪽이 쓰다 만 타일을 보지 않도록
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get_or_render(self, z: int, x: int, y: int) -> bytes:
+        data = self.get(z, x, y)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if data is None:
+            data = render_tile(z, x, y)
+            if getattr(settings, 'STORE_TILE_CACHE_ENABLED', True):
+                self.put(z, x, y, data)
+        return data
+
+    def invalidate_point(self, lat: float, lng: float) -> int:
+        """
+        (lat, lng)를 덮는 모든 줌 레벨의 타일을 지웁니다. -> 지운 타일 수
+        """
+        removed = 0
+        for z in range(getattr(settings, 'STORE_TILE_MAX_ZOOM', 20) + 1):
+            x, y = tile_for_point(lat, lng, z)
+            try:
+                self.path(z, x, y).unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+tile_cache = TileCache()
+
+
+def _tile_fields_changed(update_fields) -> bool:
+    return update_fields is None or bool(TILE_FIELDS & set(update_fields))
+
+
+def store_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    # 저장 전 위치를 기억 (위치가 바뀌면 이전 위치의 타일도 무효화)
+    instance._tile_old_position = None
+    if raw or instance.pk is None or not _tile_fields_changed(update_fields):
+        return
+    instance._tile_old_position = Store.objects.filter(pk=instance.pk).values_list('lat', 'lng').first()
+
+
+def store_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    가게 저장 후 (커밋 시) 이전/새 위치를 덮는 캐시 타일 무효화 (serializer, admin, save() 모두)
+    """
+    if raw or not _tile_fields_changed(update_fields):
+        return
+    positions = {(instance.lat, instance.lng)}
+    old_position = getattr(instance, '_tile_old_position', None)
+    if old_position is not None:
+        positions.add(old_position)
+
+    def invalidate():
+        for lat, lng in positions:
+            tile_cache.invalidate_point(lat, lng)
+    transaction.on_commit(invalidate)
+
+
+def store_deleted(sender, instance, **kwargs):
+    lat, lng = instance.lat, instance.lng
+    transaction.on_commit(lambda: tile_cache.invalidate_point(lat, lng))
@@ -1,7 +1,10 @@
 from django.urls import path
-from .views import StoreView
+from .views import StoreBBoxView, StoreImportView, StoreTileView, StoreView
 
 urlpatterns = [
     path('admin/', StoreView.as_view()), 
+    path('admin/import/', StoreImportView.as_view()),
     path('nearby/', StoreView.as_view()),
+    path('bbox/', StoreBBoxView.as_view()),
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', StoreTileView.as_view()),
 ]
\ No newline at end of file
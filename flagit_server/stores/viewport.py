@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db.models import Avg, Count, F
+from django.db.models.functions import Floor
+
+from .models import Store
+
+# 압축 응답의 배열 필드 순서
+STORE_FIELDS = ['store_id', 'name', 'lat', 'lng', 'required_count']
+CLUSTER_FIELDS = ['lat', 'lng', 'count']
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """
+    'min_lng,min_lat,max_lng,max_lat' -> (min_lng, min_lat, max_lng, max_lat), 형식이 잘못되면 ValueError
+    """
+    min_lng, min_lat, max_lng, max_lat = (float(v) for v in value.split(','))
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError('bbox 범위가 올바르지 않습니다.')
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def cluster_cell_degrees(zoom: int) -> float:
+    """
+    줌 레벨에서 화면 STORE_BBOX_CLUSTER_CELL_PX 픽셀에 해당하는 격자 크기(경도 기준, 도)
+    256px 타일 하나가 360 / 2^zoom 도를 덮습니다.
+    """
+    cell_px = getattr(settings, 'STORE_BBOX_CLUSTER_CELL_PX', 64)
+    return 360.0 / (2 ** zoom) * cell_px / 256.0
+
+
+def stores_in_bbox(bbox: Tuple[float, float, float, float], zoom: int) -> Dict[str, Any]:
+    """
+    bbox 안의 가게를 압축 배열 형식으로 반환합니다.
+    - location && envelope (bboverlaps): 공간 인덱스로 bbox 안의 가게만 조회
+    - zoom < STORE_BBOX_CLUSTER_MAX_ZOOM: 격자 칸별 개수/평균 위치로 묶은 클러스터
+    - 가게/클러스터 모두 STORE_BBOX_MAX_RESULTS개까지 (넘으면 truncated)
+    """
+    limit = getattr(settings, 'STORE_BBOX_MAX_RESULTS', 500)
+    envelope = Polygon.from_bbox(bbox)
+    envelope.srid = 4326
+    queryset = Store.objects.filter(location__bboverlaps=envelope)
+
+    if zoom < getattr(settings, 'STORE_BBOX_CLUSTER_MAX_ZOOM', 14):
+        size = cluster_cell_degrees(zoom)
+        rows = list(
+            queryset
+            .annotate(cell_x=Floor(F('lng') / size), cell_y=Floor(F('lat') / size))
+            .values('cell_x', 'cell_y')
+            .annotate(count=Count('store_id'), lat=Avg('lat'), lng=Avg('lng'))
+            .order_by('-count', 'cell_x', 'cell_y')[:limit + 1]
+        )
+        clusters: List[List[Any]] = [
+            [round(row['lat'], 6), round(row['lng'], 6), row['count']]
+            for row in rows[:limit]
+        ]
+        return {
+            'mode': 'clusters',
+            'fields': CLUSTER_FIELDS,
+            'clusters': clusters,
+            'cell_degrees': size,
+            'truncated': len(rows) > limit,
+        }
+
+    rows = list(queryset.order_by('store_id').values_list(*STORE_FIELDS)[:limit + 1])
+    return {
+        'mode': 'stores',
+        'fields': STORE_FIELDS,
+        'stores': [list(row) for row in rows[:limit]],
+        'truncated': len(rows) > limit,
+    }
@@ -1,12 +1,21 @@
+import math
+
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from .serializers import StoreSerializer
 from .models import Store
-from django.contrib.gis.geos import Point
-from django.contrib.gis.db.models.functions import Distance
+from django.conf import settings
+from .nearby import decode_cursor, nearby_stores
+from .viewport import parse_bbox, stores_in_bbox
+from .importer import guess_format, import_store_file
+from .tiles import TILE_CONTENT_TYPE, tile_cache, tile_etag, tile_in_range
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 
 # Create your views here.
 class StoreView(APIView):
@@ -29,29 +38,53 @@ class StoreView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def get(self, request): # 가게 목록 조회
+        """
+        (lat, lng)에서 가까운 순으로 가게 목록을 반환합니다.
+        - radius: 검색 반경(m, 기본 STORE_NEARBY_DEFAULT_RADIUS_M, 최대 STORE_NEARBY_MAX_RADIUS_M)
+        - limit: 페이지 크기 (기본 STORE_NEARBY_DEFAULT_LIMIT, 최대 STORE_NEARBY_MAX_LIMIT)
+        - cursor: 이전 응답의 next_cursor (다음 페이지)
+        (거리, store_id) 기준 keyset 페이지네이션, 프로세스 내 가게 인덱스가 있으면 DB 조회 없이 응답
+        """
         try:
             user_lat = request.query_params.get('lat')
             user_lng = request.query_params.get('lng')
 
             if user_lat and user_lng:
-                user_location = Point(x=float(user_lng), y=float(user_lat), srid=4326)
-                nearby_stores = Store.objects.annotate(distance=Distance('location', user_location)).order_by('distance')
-                stores_data=[]
-                for store in nearby_stores:
-                    stores_data.append({
-                        'store_id': store.store_id,
-                        'name': store.name,
-                        'lat': store.lat,
-                        'lng': store.lng,
-                        'required_count': store.required_count,
-                        'distance': round(store.distance.m, 1) # 미터 단위
-                    })
+                try:
+                    lat, lng = float(user_lat), float(user_lng)
+                    radius = min(
+                        float(request.query_params.get('radius', getattr(settings, 'STORE_NEARBY_DEFAULT_RADIUS_M', 5000))),
+                        getattr(settings, 'STORE_NEARBY_MAX_RADIUS_M', 50000),
+                    )
+                    limit = min(
+                        int(request.query_params.get('limit', getattr(settings, 'STORE_NEARBY_DEFAULT_LIMIT', 50))),
+                        getattr(settings, 'STORE_NEARBY_MAX_LIMIT', 200),
+                    )
+                    cursor = decode_cursor(request.query_params.get('cursor'))
+                    # nan/inf는 비교 연산을 모두 통과할 수 있으므로 먼저 거름
+                    if not all(map(math.isfinite, (lat, lng, radius))):
+                        raise ValueError
+                    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or radius <= 0 or limit <= 0:
+                        raise ValueError
+                except (TypeError, ValueError):
+                    return Response({
+                        'status': 'error',
+                        'code': 400,
+                        'message': 'lat, lng, radius, limit, cursor 형식이 올바르지 않습니다.'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+
+                nearby, next_cursor = nearby_stores(lat, lng, radius, limit, cursor)
+                stores_data = [
+                    {**store, 'distance': round(store['distance'], 1)} # 미터 단위
+                    for store in nearby
+                ]
 
                 return Response({
                     'status': 'success',
                     'code': 200,
                     'message': '가게 목록 조회가 완료되었습니다.',
-                    'stores': stores_data
+                    'stores': stores_data,
+                    'next_cursor': next_cursor,
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
@@ -67,3 +100,105 @@ class StoreView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class StoreBBoxView(APIView):
+    """
+    지도 화면 영역(bbox) 안의 가게 조회
+    GET /stores/bbox/?bbox=min_lng,min_lat,max_lng,max_lat&zoom=15
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        try:
+            bbox = parse_bbox(request.query_params.get('bbox', ''))
+            zoom = int(request.query_params.get('zoom', getattr(settings, 'STORE_BBOX_CLUSTER_MAX_ZOOM', 14)))
+            if not 0 <= zoom <= 22:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({
+                'status': 'error',
+                'code': 400,
+                'message': 'bbox(min_lng,min_lat,max_lng,max_lat)와 zoom(0~22) 형식이 올바르지 않습니다.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return Response({
+                'status': 'success',
+                'code': 200,
+                'message': '가게 목록 조회가 완료되었습니다.',
+                **stores_in_bbox(bbox, zoom),
+            }, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({
+                'status': 'error',
+                'code': 500,
+                'message': f'서버 오류가 발생했습니다: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class StoreTileView(APIView):
+    """
+    가게 벡터 타일 (Mapbox Vector Tile, 'stores' 레이어)
+    GET /stores/tiles/{z}/{x}/{y}.mvt
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, z, x, y):
+        if not tile_in_range(z, x, y):
+            return Response({
+                'status': 'error',
+                'code': 404,
+                'message': '존재하지 않는 타일입니다.'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        data = tile_cache.get_or_render(z, x, y)
+        etag = tile_etag(data)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(data, content_type=TILE_CONTENT_TYPE)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'STORE_TILE_MAX_AGE', 60))
+        return response
+
+
+class StoreImportView(APIView):
+    """
+    CSV/GeoJSON 파일로 가게 일괄 등록/수정 (external_id 기준 upsert, 관리자 전용)
+    POST /stores/admin/import/ (multipart: file, format=csv|geojson, dry_run=true|false)
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'status': 'error',
+                'code': 400,
+                'message': 'file이 필요합니다.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        try:
+            file_format = request.data.get('format') or guess_format(upload.name)
+            result = import_store_file(upload.file, file_format, dry_run=dry_run)
+        except ValueError as e:
+            # 파일 형식 오류(JSON/CSV 파싱, 필수 열 누락)는 파일 전체를 되돌림
+            return Response({
+                'status': 'error',
+                'code': 400,
+                'message': f'{str(e)} (가져온 가게 없음)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'status': 'error',
+                'code': 500,
+                'message': f'서버 오류가 발생했습니다: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({
+            'status': 'success',
+            'code': 200,
+            'message': '가게 가져오기가 완료되었습니다.',
+            'data': result.as_dict(),
+        }, status=status.HTTP_200_OK)